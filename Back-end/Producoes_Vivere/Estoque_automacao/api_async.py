@@ -0,0 +1,291 @@
+from quart import Quart, Response, jsonify, request
+from quart_cors import cors
+from servicos.estoque_async import EstoqueServiceAsync
+from servicos.movimentacao import MaterialNaoEncontradoError, EstoqueInsuficienteError
+from servicos.paginacao import pedido_paginado, ler_paginacao, ler_periodo, ParametrosInvalidosError
+from servicos import streaming
+from servicos.condicional import avaliar, marcar
+from servicos.busca import LIMITE_PADRAO as LIMITE_BUSCA, LIMITE_MAXIMO as LIMITE_BUSCA_MAXIMO
+from servicos.diario import obter_diario
+from servicos.auditoria import auditoria
+
+# Versão ASGI (asyncio) das rotas de inventário, estoque e movimentos do
+# app.py, com os mesmos formatos, códigos de erro e chaves de erro ("error" no
+# inventário, "erro" nos movimentos). Uma requisição esperando o MySQL não
+# prende thread, então dashboards em polling e check-ins simultâneos não
+# esgotam os workers.
+#
+# Divisão no proxy: cada caminho abaixo é servido inteiro por este app, com
+# todos os métodos (GET e POST vão para o mesmo lugar):
+#   /api/inventario        GET (lista ou página), POST
+#   /api/categorias        GET
+#   /api/materiais         GET, e /busca e /<categoria>
+#   /api/estoque           GET (lista ou página), POST
+#   /api/movimentos        GET (lista ou página), POST, /exportar e /lote
+# Todo o resto (eventos, disponibilidade, alocações, depósitos, transferências,
+# alertas, resumo, análise, logs, usuários e /api/sync) continua só no Flask
+# (servir.py). No nginx, por exemplo:
+#   location ~ ^/api/(inventario|categorias|materiais|estoque|movimentos)(/|$) { proxy_pass http://127.0.0.1:5001; }
+#   location / { proxy_pass http://127.0.0.1:5000; }
+#
+# Uso:
+#   hypercorn api_async:app --bind 0.0.0.0:5001   -> produção (ou uvicorn api_async:app --port 5001)
+#   python api_async.py                           -> desenvolvimento
+#
+# Comparação de carga com o api.py: benchmarks/bench_carga_api.py
+
+app = cors(Quart(__name__), allow_origin=[
+    "http://localhost:3000",
+    "http://localhost:8080",
+    "http://192.168.15.21:8080",
+    "http://192.168.84.5:8080",
+])
+
+estoque = EstoqueServiceAsync()
+
+MAX_ITENS_LOTE = 500
+
+
+@app.before_serving
+async def abrir_pool():
+    await estoque.pool.abrir()
+
+
+@app.after_serving
+async def fechar_pool():
+    await estoque.pool.fechar()
+    estoque.fechar()
+
+
+async def resposta_condicional(tabelas, gerar):
+    # Como servicos.condicional.resposta_condicional, com gerar assíncrono
+    etag, modificado, atual = avaliar(tabelas, request)
+    if atual:
+        resposta = Response("", status=304)
+    else:
+        resposta = await gerar()
+        if isinstance(resposta, tuple) or resposta.status_code != 200:
+            return resposta
+    return marcar(resposta, etag, modificado)
+
+
+async def _json(leitura):
+    return jsonify(await leitura)
+
+
+async def responder_paginado(colunas, chave):
+    # Como rotas.comum.responder_paginado, sobre a tabela inventario
+    try:
+        pagina = ler_paginacao(request.args, colunas)
+        return jsonify(await estoque.obter_pagina(colunas, chave, pagina))
+    except ParametrosInvalidosError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def auditar(acao, descricao):
+    auditoria.registrar(acao, descricao, rota=f"{request.method} {request.path}")
+
+# --------------------- INVENTÁRIO ---------------------
+
+async def gerar_inventario():
+    if pedido_paginado(request.args):
+        return await responder_paginado(estoque.COLUNAS_INVENTARIO, estoque.CHAVE_INVENTARIO)
+    return jsonify(await estoque.obter_inventario())
+
+@app.route("/api/inventario", methods=["GET"])
+async def listar_inventario():
+    return await resposta_condicional("inventario", gerar_inventario)
+
+@app.route("/api/inventario", methods=["POST"])
+async def cadastrar_material():
+    dados = await request.get_json()
+    categoria = dados.get("categoria")
+    material = dados.get("material")
+    quantidade = dados.get("quantidade")
+
+    if not (categoria and material and isinstance(quantidade, int)):
+        return jsonify({"error": "Dados inválidos"}), 400
+
+    try:
+        novo_id = await estoque.cadastrar_material(categoria, material, quantidade)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    auditar("cadastro", f"Material {material} ({categoria}) cadastrado com {quantidade}")
+    return jsonify({
+        "id": novo_id,
+        "categoria": categoria,
+        "material": material,
+        "quantidade": quantidade
+    }), 201
+
+@app.route("/api/categorias", methods=["GET"])
+async def listar_categorias():
+    return await resposta_condicional("inventario", lambda: _json(estoque.listar_categorias()))
+
+# --------------------- MATERIAIS ---------------------
+
+@app.route("/api/materiais", methods=["GET"])
+async def listar_materiais():
+    try:
+        materiais = await estoque.listar_materiais()
+    except Exception as e:
+        materiais = [{"id": 0, "nome_item": "Erro ao buscar", "categoria": str(e)}]
+    return jsonify(materiais)
+
+@app.route("/api/materiais/busca", methods=["GET"])
+async def buscar_materiais():
+    q = request.args.get("q", "").strip()
+    if not q:
+        return jsonify({"error": "Informe o parâmetro q."}), 400
+    try:
+        limite = int(request.args.get("limite", LIMITE_BUSCA))
+    except ValueError:
+        return jsonify({"error": "limite deve ser um número inteiro."}), 400
+    if not 1 <= limite <= LIMITE_BUSCA_MAXIMO:
+        return jsonify({"error": f"limite deve estar entre 1 e {LIMITE_BUSCA_MAXIMO}."}), 400
+
+    try:
+        return jsonify(await estoque.buscar_materiais(q, limite, request.args.get("categoria")))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/materiais/<categoria>", methods=["GET"])
+async def listar_por_categoria(categoria):
+    return await resposta_condicional("inventario", lambda: _json(estoque.obter_materiais_por_categoria(categoria)))
+
+# --------------------- ESTOQUE ---------------------
+
+async def gerar_estoque():
+    if pedido_paginado(request.args):
+        return await responder_paginado(estoque.COLUNAS_ESTOQUE, estoque.CHAVE_ESTOQUE)
+    return jsonify(await estoque.obter_estoque_completo())
+
+@app.route("/api/estoque", methods=["GET"])
+async def listar_estoque():
+    return await resposta_condicional("inventario", gerar_estoque)
+
+@app.route("/api/estoque", methods=["POST"])
+async def registrar_entrada():
+    dados = await request.get_json()
+    material_id = dados.get("material_id")
+    quantidade = dados.get("quantidade")
+    observacao = dados.get("observacao", "")
+
+    if not (material_id and isinstance(quantidade, int) and quantidade > 0):
+        return jsonify({"error": "Dados inválidos. Informe material_id (str) e quantidade (> 0)."}), 400
+
+    try:
+        diario = obter_diario()
+        if diario is not None:
+            # Confirmado no diário local; o reprodutor aplica no banco (servicos/diario.py)
+            seq = await estoque.registrar_no_diario(diario.registrar_entrada, material_id, quantidade, observacao)
+            return jsonify({"message": "Entrada registrada no diário", "seq": seq,
+                            "material_id": material_id, "quantidade_adicionada": quantidade}), 202
+
+        material = await estoque.registrar_entrada(material_id, quantidade, observacao)
+        return jsonify({
+            "message": "Estoque atualizado com sucesso",
+            "material_id": material_id,
+            "material": material,
+            "quantidade_adicionada": quantidade
+        }), 200
+    except MaterialNaoEncontradoError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# --------------------- MOVIMENTOS ---------------------
+
+@app.route("/api/movimentos", methods=["GET"])
+async def listar_movimentos():
+    # ?limit=&after=&desde=&ate=&campos= -> página com proximo_cursor
+    if pedido_paginado(request.args):
+        try:
+            pagina = ler_paginacao(request.args, estoque.COLUNAS_MOVIMENTOS)
+            return jsonify(await estoque.obter_movimentacoes_paginadas(pagina))
+        except ParametrosInvalidosError as e:
+            return jsonify({"erro": str(e)}), 400
+
+    movimentos = await estoque.obter_movimentacoes()
+    return jsonify(movimentos)
+
+@app.route("/api/movimentos/exportar", methods=["GET"])
+async def exportar_movimentos():
+    # Histórico completo em streaming: ?formato=json (array) ou ndjson (uma linha por movimento)
+    formato = request.args.get("formato", "json")
+    if formato not in streaming.FORMATOS:
+        return jsonify({"erro": "Formato deve ser json ou ndjson"}), 400
+    try:
+        desde, ate = ler_periodo(request.args)
+    except ParametrosInvalidosError as e:
+        return jsonify({"erro": str(e)}), 400
+
+    lotes = estoque.iterar_movimentacoes(desde=desde, ate=ate)
+    resposta = Response(
+        streaming.gerar_async(formato, lotes),
+        mimetype=streaming.MIMETYPES[formato],
+        headers={"X-Accel-Buffering": "no"},
+    )
+    # Exportação grande pode passar do RESPONSE_TIMEOUT padrão do Quart (60s)
+    resposta.timeout = None
+    return resposta
+
+@app.route("/api/movimentos", methods=["POST"])
+async def registrar_movimento():
+    data = await request.get_json()
+    nome = data.get("nome")
+    tipo = data.get("tipo")
+    quantidade = data.get("quantidade")
+    # Nome repetido em mais de uma categoria: informe "categoria" ou "material_id" (id da linha do inventário)
+    categoria = data.get("categoria")
+    material_id = data.get("material_id")
+
+    if not all([nome or material_id, tipo, quantidade]):
+        return jsonify({"erro": "Dados incompletos"}), 400
+
+    try:
+        diario = obter_diario()
+        if diario is not None:
+            # Confirmado no diário local; o reprodutor aplica no banco (servicos/diario.py)
+            seq = await estoque.registrar_no_diario(diario.registrar_movimento, nome, tipo, int(quantidade),
+                                                    data.get("deposito"), categoria, material_id)
+            return jsonify({"mensagem": "Movimento registrado no diário", "seq": seq}), 202
+        await estoque.registrar_movimento(nome, tipo, int(quantidade), data.get("deposito"),
+                                          categoria, material_id)
+        return jsonify({"mensagem": "Movimento registrado com sucesso!"})
+    except MaterialNaoEncontradoError as e:
+        return jsonify({"erro": str(e)}), 404
+    except EstoqueInsuficienteError as e:
+        return jsonify({"erro": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@app.route("/api/movimentos/lote", methods=["POST"])
+async def registrar_movimentos_lote():
+    data = await request.get_json() or {}
+    itens = data.get("itens")
+    modo = data.get("modo", "tudo_ou_nada")
+
+    if not isinstance(itens, list) or not itens:
+        return jsonify({"erro": "Informe a lista de itens do lote"}), 400
+    if len(itens) > MAX_ITENS_LOTE:
+        return jsonify({"erro": f"Lote limitado a {MAX_ITENS_LOTE} itens"}), 400
+    if not all(isinstance(item, dict) for item in itens):
+        return jsonify({"erro": "Itens do lote devem ser objetos"}), 400
+
+    try:
+        resultado = await estoque.registrar_movimentos_lote(itens, modo)
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+    status = 409 if modo == "tudo_ou_nada" and not resultado["aplicado"] else 200
+    return jsonify(resultado), status
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=5001)
@@ -0,0 +1,102 @@
+import argparse
+import ast
+import glob
+import os
+import re
+
+from tabulate import tabulate
+
+from servicos.conexao import obter_pool
+
+# Roda EXPLAIN em todo SQL literal encontrado no código e aponta varreduras completas.
+#
+# Uso:
+#   python auditar_consultas.py                      -> app.py + rotas, servicos e modelos
+#   python auditar_consultas.py app.py api.py        -> arquivos escolhidos
+#
+# Sai com código 1 se alguma consulta com filtro (WHERE/JOIN) varrer a tabela inteira.
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+ARQUIVOS_PADRAO = ["app.py", "rotas/*.py", "servicos/*.py", "modelos/*.py"]
+PADRAO_SQL = re.compile(r"^\s*(SELECT\s.+\bFROM\b|UPDATE\s+\w+\s+SET\b|DELETE\s+FROM\b)", re.IGNORECASE | re.DOTALL)
+PADRAO_FILTRO = re.compile(r"\b(WHERE|JOIN)\b", re.IGNORECASE)
+
+
+def extrair_consultas(caminho):
+    with open(caminho, encoding="utf-8") as f:
+        arvore = ast.parse(f.read(), filename=caminho)
+    consultas = [
+        (no.lineno, " ".join(no.value.split()))
+        for no in ast.walk(arvore)
+        if isinstance(no, ast.Constant) and isinstance(no.value, str) and PADRAO_SQL.match(no.value)
+    ]
+    return sorted(consultas)
+
+
+def preencher_parametros(sql):
+    # LIMIT/OFFSET precisam de número; no resto usa string para não forçar
+    # conversão implícita em colunas VARCHAR (o que anularia o índice).
+    sql = re.sub(r"\b(LIMIT|OFFSET)\s+%s", r"\1 1", sql, flags=re.IGNORECASE)
+    return sql.replace("%s", "'0'")
+
+
+def classificar(sql, plano):
+    alertas = []
+    for linha in plano:
+        tipo = linha.get("type")
+        extra = linha.get("Extra") or ""
+        tabela = linha.get("table")
+        if tipo == "ALL":
+            if PADRAO_FILTRO.search(sql):
+                alertas.append(f"VARREDURA COMPLETA em {tabela}")
+            else:
+                alertas.append(f"leitura integral de {tabela} (consulta sem filtro)")
+        elif tipo == "index":
+            alertas.append(f"varredura do índice inteiro em {tabela}")
+        if "filesort" in extra:
+            alertas.append(f"filesort em {tabela}")
+    return alertas
+
+
+def auditar(padroes):
+    arquivos = []
+    for padrao in padroes:
+        arquivos.extend(sorted(glob.glob(os.path.join(BASE, padrao))))
+
+    linhas_relatorio = []
+    criticos = 0
+    with obter_pool().conexao() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            for caminho in arquivos:
+                relativo = os.path.relpath(caminho, BASE)
+                for lineno, sql in extrair_consultas(caminho):
+                    try:
+                        cursor.execute("EXPLAIN " + preencher_parametros(sql))
+                        plano = cursor.fetchall()
+                    except Exception as e:
+                        linhas_relatorio.append([f"{relativo}:{lineno}", sql[:70], "-", "-", "-", "-", f"erro: {e}"])
+                        continue
+                    alertas = classificar(sql, plano)
+                    criticos += sum(1 for a in alertas if a.startswith("VARREDURA COMPLETA"))
+                    for linha in plano:
+                        linhas_relatorio.append([
+                            f"{relativo}:{lineno}", sql[:70], linha.get("table"), linha.get("type"),
+                            linha.get("key"), linha.get("rows"),
+                        ])
+                    linhas_relatorio[-1].append("; ".join(alertas) or "ok")
+            conn.rollback()
+        finally:
+            cursor.close()
+
+    print(tabulate(linhas_relatorio, headers=["Origem", "SQL", "Tabela", "Tipo", "Índice", "Linhas", "Alertas"],
+                   tablefmt="github"))
+    print(f"\n{criticos} consulta(s) com filtro fazendo varredura completa.")
+    return criticos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN de todas as consultas do back-end")
+    parser.add_argument("arquivos", nargs="*", default=ARQUIVOS_PADRAO)
+    args = parser.parse_args()
+    raise SystemExit(1 if auditar(args.arquivos) else 0)
@@ -0,0 +1,39 @@
+import argparse
+import time
+from datetime import date
+
+from servicos.analise import backfill
+from servicos.conexao import obter_pool
+
+# Preenche os rollups de movimentos (V008) com o histórico já gravado.
+# Lê movimentos em fluxo, agrega cada lote vetorizado (numpy) e grava tudo numa transação.
+#
+# Uso:
+#   python backfill_analise.py                   -> tudo antes de hoje
+#   python backfill_analise.py --ate 2025-06-01  -> tudo antes do dia informado
+#   python backfill_analise.py --hoje            -> tudo, inclusive hoje
+#
+# O dia de corte em diante fica com o que as escritas já somaram; pode rodar de
+# novo a qualquer momento (refaz o período antes do corte).
+# --hoje conserta também os rollups do dia corrente (depois de uma escrita feita
+# por fora, restauração de backup...). Enquanto roda, novos movimentos esperam o
+# commit para somar nos rollups, como num reconstruir_resumo.py.
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill dos rollups de movimentos")
+    parser.add_argument("--ate", type=date.fromisoformat, default=None, help="dia de corte (AAAA-MM-DD)")
+    parser.add_argument("--hoje", action="store_true", help="refaz também o dia de hoje (trava os rollups)")
+    parser.add_argument("--lote", type=int, default=100_000, help="linhas lidas por lote")
+    args = parser.parse_args()
+    if args.hoje and args.ate:
+        parser.error("use --ate ou --hoje, não os dois")
+    inicio = time.perf_counter()
+    try:
+        with obter_pool().conexao() as conn:
+            relatorio = backfill(conn, ate=args.ate, tamanho_lote=args.lote, hoje=args.hoje)
+    except Exception as e:
+        print(f"❌ Erro: {e}")
+        raise SystemExit(1)
+    print(f"✅ Rollups refeitos até {relatorio['ate']}: {relatorio['horas']} linhas por hora, "
+          f"{relatorio['dias']} por dia ({time.perf_counter() - inicio:.1f}s)")
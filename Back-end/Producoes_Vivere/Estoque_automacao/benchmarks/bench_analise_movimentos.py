@@ -0,0 +1,164 @@
+# Benchmark da análise de movimentos com 10 milhões de movimentos sintéticos.
+#
+# 1. Backfill: agregação por (material, tipo, hora) e por dia em lotes
+#    vetorizados (servicos/analise.py) contra um laço Python com dict só das
+#    horas, lote a lote como viriam do cursor.
+# 2. Consulta: saídas semanais de um material e categorias mais movimentadas
+#    por mês, no rollup diário contra o GROUP BY nos movimentos brutos. Sem
+#    MySQL, as duas rodam num SQLite em memória com índices equivalentes.
+#   python benchmarks/bench_analise_movimentos.py --movimentos 10000000
+import argparse
+import os
+import resource
+import sqlite3
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicos.analise import agregar_historico, com_categorias, hora_de
+
+INICIO = np.datetime64("2024-01-01T00:00:00")
+SEGUNDOS = 2 * 365 * 86400
+CATEGORIAS = ["Q15", "Q25", "Q30", "Q50", "TENDAS NOVAS", "GUARDA CORPO", "ALMOXARIFADO"]
+
+
+def gerar_lotes(total, materiais, tamanho, semente=3):
+    # Lotes de tuplas (material, tipo, quantidade, horario), como o fetchmany devolve
+    aleatorio = np.random.default_rng(semente)
+    nomes = np.array([f"MATERIAL {i:05d}" for i in range(materiais)], dtype=object)
+    tipos = np.array(["entrada", "saida"], dtype=object)
+    for inicio in range(0, total, tamanho):
+        n = min(tamanho, total - inicio)
+        # Poucos materiais concentram a maior parte do giro (Zipf truncado)
+        material = nomes[np.minimum(aleatorio.zipf(1.3, n) - 1, materiais - 1)]
+        tipo = tipos[(aleatorio.random(n) < 0.6).astype(int)]
+        quantidade = aleatorio.integers(1, 50, n)
+        horario = np.sort(INICIO + aleatorio.integers(0, SEGUNDOS, n).astype("timedelta64[s]"))
+        horario = np.char.replace(np.datetime_as_string(horario, unit="s"), "T", " ")
+        yield list(zip(material.tolist(), tipo.tolist(), quantidade.tolist(), horario.tolist()))
+
+
+class Cronometrado:
+    # Itera os lotes medindo quanto se gasta gerando, para descontar do total
+    def __init__(self, lotes):
+        self.lotes, self.geracao = lotes, 0.0
+
+    def __iter__(self):
+        while True:
+            inicio = time.perf_counter()
+            linhas = next(self.lotes, None)
+            self.geracao += time.perf_counter() - inicio
+            if linhas is None:
+                return
+            yield linhas
+
+
+def agregar_vetorizado(lotes):
+    lotes = Cronometrado(lotes)
+    inicio = time.perf_counter()
+    horas, dias = agregar_historico(lotes)
+    return horas, dias, time.perf_counter() - inicio - lotes.geracao
+
+
+def agregar_laco(lotes):
+    tempo, horas = 0.0, {}
+    for linhas in lotes:
+        inicio = time.perf_counter()
+        for material, tipo, quantidade, horario in linhas:
+            chave = (material, tipo, hora_de(horario))
+            atual = horas.get(chave)
+            if atual is None:
+                horas[chave] = [1, quantidade]
+            else:
+                atual[0] += 1
+                atual[1] += quantidade
+        tempo += time.perf_counter() - inicio
+    return horas, tempo
+
+
+def latencias(banco, sql, parametros, repeticoes):
+    tempos = []
+    for params in parametros[:repeticoes]:
+        inicio = time.perf_counter()
+        banco.execute(sql, params).fetchall()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos), max(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Análise de movimentos: rollups vs histórico bruto")
+    parser.add_argument("--movimentos", type=int, default=10_000_000)
+    parser.add_argument("--materiais", type=int, default=2000)
+    parser.add_argument("--lote", type=int, default=100_000)
+    parser.add_argument("--laco", type=int, default=2_000_000, help="movimentos no laço Python (0 = todos)")
+    parser.add_argument("--consultas", type=int, default=20)
+    args = parser.parse_args()
+
+    horas, dias, tempo = agregar_vetorizado(gerar_lotes(args.movimentos, args.materiais, args.lote))
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # pico do processo, geração inclusa
+    print(f"{args.movimentos} movimentos -> {len(horas)} linhas por hora")
+    print(f"{'agregação':<28} {'tempo':>9} {'mov/s':>12}")
+    print(f"{'numpy (chaves int64)':<28} {tempo:8.1f}s {args.movimentos / tempo:12,.0f}   RSS máx. {pico:.0f} MiB")
+
+    laco = args.laco or args.movimentos
+    horas_laco, tempo_laco = agregar_laco(gerar_lotes(laco, args.materiais, args.lote))
+    print(f"{'laço Python (dict)':<28} {tempo_laco:8.1f}s {laco / tempo_laco:12,.0f}   ({laco} movimentos)")
+    if laco == args.movimentos:
+        assert len(horas_laco) == len(horas)
+    del horas_laco
+
+    categorias = {f"MATERIAL {i:05d}": CATEGORIAS[i % len(CATEGORIAS)] for i in range(args.materiais)}
+    dias = com_categorias(dias, categorias)
+    print(f"rollup diário: {len(dias)} linhas (hora + dia agregados no mesmo passo)")
+
+    # SQLite: movimentos brutos (índice por material, horario) e rollup diário (PK como na V008)
+    banco = sqlite3.connect(":memory:")
+    banco.execute("CREATE TABLE movimentos (material TEXT, categoria TEXT, tipo TEXT, quantidade INT, horario TEXT)")
+    inicio = time.perf_counter()
+    for linhas in gerar_lotes(args.movimentos, args.materiais, args.lote):
+        banco.executemany("INSERT INTO movimentos VALUES (?, ?, ?, ?, ?)",
+                          [(m, categorias[m], t, q, h) for m, t, q, h in linhas])
+    banco.execute("CREATE INDEX idx_material_horario ON movimentos (material, horario)")
+    banco.execute("CREATE INDEX idx_horario ON movimentos (horario)")
+    print(f"carga do histórico bruto no SQLite: {time.perf_counter() - inicio:.0f}s")
+
+    banco.execute("CREATE TABLE movimentos_dia_material (material TEXT, categoria TEXT, tipo TEXT, dia TEXT, "
+                  "movimentos INT, quantidade INT, PRIMARY KEY (material, categoria, tipo, dia))")
+    banco.execute("CREATE INDEX idx_dia ON movimentos_dia_material (dia)")
+    banco.executemany("INSERT INTO movimentos_dia_material VALUES (?, ?, ?, ?, ?, ?)", zip(
+        dias["material"], dias["categoria"], dias["tipo"], dias["dia"].dt.strftime("%Y-%m-%d"),
+        dias["movimentos"].tolist(), dias["quantidade"].tolist()))
+
+    semana = "date(dia, '-' || ((strftime('%w', dia) + 6) % 7) || ' days')"
+    consultas = {
+        "saídas semanais de 1 material": (
+            f"SELECT {semana} AS p, SUM(quantidade) FROM movimentos_dia_material "
+            "WHERE material = ? AND categoria = ? AND tipo = 'saida' AND dia >= '2025-01-01' GROUP BY p",
+            "SELECT date(horario, '-' || ((strftime('%w', horario) + 6) % 7) || ' days') AS p, SUM(quantidade) "
+            "FROM movimentos WHERE material = ? AND categoria = ? AND tipo = 'saida' AND horario >= '2025-01-01' "
+            "GROUP BY p",
+        ),
+        "categorias por mês (1 ano)": (
+            "SELECT substr(dia, 1, 7) AS p, categoria, SUM(quantidade) FROM movimentos_dia_material "
+            "WHERE dia >= '2025-01-01' AND ? IS NOT NULL AND ? IS NOT NULL GROUP BY p, categoria",
+            "SELECT substr(horario, 1, 7) AS p, categoria, SUM(quantidade) FROM movimentos "
+            "WHERE horario >= '2025-01-01' AND ? IS NOT NULL AND ? IS NOT NULL GROUP BY p, categoria",
+        ),
+    }
+    parametros = [(f"MATERIAL {i:05d}", categorias[f"MATERIAL {i:05d}"]) for i in range(args.consultas)]
+    print(f"\n{'consulta':<32} {'rollup p50':>11} {'bruto p50':>11}")
+    for nome, (sql_rollup, sql_bruto) in consultas.items():
+        repeticoes = args.consultas if "1 material" in nome else 3
+        assert sorted(banco.execute(sql_rollup, parametros[0]).fetchall()) == \
+            sorted(banco.execute(sql_bruto, parametros[0]).fetchall())
+        rollup, _ = latencias(banco, sql_rollup, parametros, repeticoes)
+        bruto, _ = latencias(banco, sql_bruto, parametros, repeticoes)
+        print(f"{nome:<32} {rollup:9.2f}ms {bruto:9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Custo da auditoria para a requisição: INSERT na hora (um round trip por
+# entrada, como o logs_estoque do /api/estoque fazia) contra a fila com
+# gravação em lote (servicos/auditoria.py). N threads registram entradas;
+# mede a latência de cada chamada (p50/p99), o tempo até a fila esvaziar e
+# quantos lotes foram gravados.
+#
+# Sem MySQL, --latencia simula o round trip (ms por INSERT/lote mais 5 µs por
+# linha). Com --mysql grava de verdade em logs (apague depois:
+# DELETE FROM logs WHERE acao = 'bench').
+#   python benchmarks/bench_auditoria.py --threads 16 --entradas 2000
+#   python benchmarks/bench_auditoria.py --mysql
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicos.auditoria import Auditoria, SQL_LOG, gravar_lote
+
+
+def gravador_simulado(latencia):
+    def gravar(lote):
+        time.sleep(latencia + 0.000005 * len(lote))
+    return gravar
+
+
+def executar(registrar, threads, entradas):
+    latencias = []
+    lock = threading.Lock()
+
+    def trabalhar(t):
+        minhas = []
+        for i in range(entradas):
+            inicio = time.perf_counter()
+            registrar("bench", f"thread {t}, entrada {i}")
+            minhas.append(time.perf_counter() - inicio)
+        with lock:
+            latencias.extend(minhas)
+
+    inicio = time.perf_counter()
+    trabalhadores = [threading.Thread(target=trabalhar, args=(t,)) for t in range(threads)]
+    for w in trabalhadores:
+        w.start()
+    for w in trabalhadores:
+        w.join()
+    latencias.sort()
+    return time.perf_counter() - inicio, latencias
+
+
+def percentil(latencias, p):
+    return latencias[min(len(latencias) - 1, int(len(latencias) * p))] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auditoria: INSERT por requisição x fila em lote")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--entradas", type=int, default=2000, help="por thread")
+    parser.add_argument("--latencia", type=float, default=1.0, help="ms por round trip simulado")
+    parser.add_argument("--mysql", action="store_true", help="grava na tabela logs de verdade")
+    args = parser.parse_args()
+
+    gravar = gravar_lote if args.mysql else gravador_simulado(args.latencia / 1000)
+    total = args.threads * args.entradas
+    print(f"{args.threads} threads x {args.entradas} entradas "
+          f"({'MySQL' if args.mysql else f'round trip simulado de {args.latencia} ms'})\n")
+    print(f"{'modo':<10} {'p50 µs':>9} {'p99 µs':>9} {'chamadas s':>11} {'até gravar s':>13} {'lotes':>7} {'perdidas':>9}")
+
+    def sincrono(acao, descricao):
+        gravar([(SQL_LOG, (None, acao, descricao, "bench", None))])
+
+    tempo, latencias = executar(sincrono, args.threads, args.entradas)
+    print(f"{'sincrono':<10} {percentil(latencias, 0.5):9.1f} {percentil(latencias, 0.99):9.1f} "
+          f"{tempo:11.2f} {tempo:13.2f} {total:7d} {0:9d}")
+
+    # Fila do tamanho do teste: mede o custo de enfileirar, não a política de descarte
+    auditoria = Auditoria(gravar=gravar, tamanho_fila=total)
+    tempo, latencias = executar(lambda a, d: auditoria.registrar(a, d, "bench"), args.threads, args.entradas)
+    inicio = time.perf_counter()
+    auditoria.encerrar(timeout=600)
+    e = auditoria.estatisticas()
+    print(f"{'fila':<10} {percentil(latencias, 0.5):9.1f} {percentil(latencias, 0.99):9.1f} "
+          f"{tempo:11.2f} {tempo + time.perf_counter() - inicio:13.2f} {e['lotes']:7d} "
+          f"{e['perdidas'] + e['descartadas']:9d}")
+
+
+if __name__ == "__main__":
+    main()
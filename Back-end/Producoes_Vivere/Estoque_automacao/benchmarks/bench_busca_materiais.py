@@ -0,0 +1,125 @@
+# Benchmark da busca de materiais: índice em memória (servicos/busca.py) contra
+# a varredura com LIKE '%...%' das consultas em data/Banco de Dados Vivere.sql.
+#
+# Sem MySQL aqui, a varredura roda num SQLite em memória com os mesmos dados
+# (mesmo plano: full scan) e também como laço Python sobre os nomes normalizados.
+# Por último, buscas enquanto o índice é relido em segundo plano.
+#   python benchmarks/bench_busca_materiais.py --materiais 100000
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicos.busca import IndiceMateriais, normalizar
+
+PALAVRAS = ["TRELIÇA", "FECHAMENTO", "MÃO FRANCESA", "CALHA", "PARAFUSO", "TENDA", "CANTONEIRA",
+            "SAPATA", "PISO", "LONA", "CABO DE AÇO", "ESTICADOR", "PORCA", "ARRUELA", "GUARDA CORPO"]
+MEDIDAS = ["0,5M", "1M", "1,5M", "2M", "3M", "4M", "5M", "10X10", "5X5", "3/8", "1/2", "M12", "M16"]
+CATEGORIAS = ["Q15", "Q25", "Q30", "Q50", "TENDAS NOVAS", "GUARDA CORPO", "ALMOXARIFADO"]
+CONSULTAS = ["treliça", "TRELICA 2m", "mão francesa", "mao fr", "calha", "parafuso m12", "tenda",
+             "fechamento", "ca", "esticador 3/8", "inexistente"]
+
+
+def gerar_inventario(total, semente=42):
+    aleatorio = random.Random(semente)
+    linhas = []
+    for i in range(1, total + 1):
+        material = f"{aleatorio.choice(PALAVRAS)} {aleatorio.choice(MEDIDAS)} {aleatorio.choice(['', 'GALV', 'PRETO', 'REFORÇADO'])} {i}"
+        linhas.append((i, " ".join(material.split()), aleatorio.choice(CATEGORIAS), aleatorio.randint(0, 500)))
+    return linhas
+
+
+def latencias(funcao, repeticoes):
+    tempos = []
+    for consulta in CONSULTAS:
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao(consulta)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return statistics.median(tempos), tempos[int(len(tempos) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca de materiais: índice vs LIKE")
+    parser.add_argument("--materiais", type=int, default=100_000)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--atraso", type=float, default=200.0, help="ms de cada leitura do inventário")
+    args = parser.parse_args()
+
+    linhas = gerar_inventario(args.materiais)
+
+    indice = IndiceMateriais(carregar=lambda: linhas, ttl=float("inf"), intervalo=float("inf"))
+    inicio = time.perf_counter()
+    indice.atualizar(forcar=True)
+    print(f"{args.materiais} materiais, índice montado em {time.perf_counter() - inicio:.2f}s "
+          f"({indice.estatisticas()['trigramas']} trigramas)")
+
+    # Incremental: muda 100 nomes e 1000 quantidades, reaplica a tabela inteira
+    alteradas = list(linhas)
+    for i in range(0, 100_000 if args.materiais >= 100_000 else args.materiais, 1000):
+        id_, material, categoria, quantidade = alteradas[i]
+        alteradas[i] = (id_, material + " NOVO", categoria, quantidade)
+    for i in range(0, len(alteradas), max(1, len(alteradas) // 1000)):
+        id_, material, categoria, quantidade = alteradas[i]
+        alteradas[i] = (id_, material, categoria, quantidade + 1)
+    inicio = time.perf_counter()
+    reindexados = indice.aplicar(alteradas)
+    print(f"atualização incremental: {reindexados} reindexados em {(time.perf_counter() - inicio) * 1000:.0f}ms")
+
+    banco = sqlite3.connect(":memory:")
+    banco.execute("CREATE TABLE inventario (id INTEGER PRIMARY KEY, material TEXT, categoria TEXT, quantidade INT)")
+    banco.executemany("INSERT INTO inventario VALUES (?, ?, ?, ?)", alteradas)
+    normalizados = [(normalizar(m), m) for _, m, _, _ in alteradas]
+
+    # Como nas consultas do .sql: sem LIMIT, o cliente recebe todas as linhas
+    def like(q):
+        return banco.execute("SELECT * FROM inventario WHERE material LIKE ?", (f"%{q}%",)).fetchall()
+
+    def laco(q):
+        q = normalizar(q)
+        return [m for n, m in normalizados if q in n][:20]
+
+    print(f"{'método':<22} {'p50':>9} {'p99':>9}")
+    for nome, funcao, repeticoes in (("índice", indice.buscar, args.repeticoes),
+                                     ("LIKE (sqlite)", like, max(1, args.repeticoes // 10)),
+                                     ("laço Python", laco, max(1, args.repeticoes // 10))):
+        p50, p99 = latencias(funcao, repeticoes)
+        print(f"{nome:<22} {p50:8.3f}ms {p99:8.3f}ms")
+
+    # Índice sempre vencido e banco lento (--atraso ms por leitura): a releitura
+    # roda em segundo plano sem parar, alternando as duas versões da tabela, e
+    # a busca continua respondendo com o índice atual
+    versoes = [linhas, alteradas]
+
+    def carregar_lento():
+        time.sleep(args.atraso / 1000)
+        versoes.reverse()
+        return versoes[0]
+
+    vencido = IndiceMateriais(carregar=carregar_lento, ttl=0.0, intervalo=0.0)
+    vencido.atualizar(forcar=True)
+    tempos = []
+    while vencido.estatisticas()["atualizacoes"] < 4:
+        for consulta in CONSULTAS:
+            inicio = time.perf_counter()
+            vencido.buscar(consulta)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    p50, p99 = statistics.median(tempos), tempos[int(len(tempos) * 0.99) - 1]
+    e = vencido.estatisticas()
+    print(f"{'índice em releitura':<22} {p50:8.3f}ms {p99:8.3f}ms  "
+          f"({e['atualizacoes'] - 1} releituras, {len(tempos)} buscas)")
+
+    print()
+    for consulta in ("mao francesa 2m", "treli"):
+        print(consulta, "->", [r["material"] for r in indice.buscar(consulta, 3)])
+
+
+if __name__ == "__main__":
+    main()
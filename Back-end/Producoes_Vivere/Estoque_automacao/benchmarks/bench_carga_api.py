@@ -0,0 +1,146 @@
+# Teste de carga: api.py (Flask) contra api_async.py (Quart/aiomysql) com N
+# clientes simultâneos em keep-alive. Mede req/s e latência p50/p99 por alvo.
+# Só exercita as rotas que existem nos dois (as do api_async.py); o restante do
+# app.py não tem versão ASGI.
+#
+# Mistura padrão (o que os dashboards e os check-ins fazem): inventário,
+# categorias, materiais de uma categoria e a primeira página de movimentos. Com
+# --material, 5% das requisições viram entradas/saídas alternadas de 1 unidade
+# desse material (o saldo volta ao original).
+#
+# Suba os dois servidores com o cache desligado para medir o caminho até o MySQL:
+#   VIVERE_CACHE_TTL=0 python api.py                                    (porta 5000)
+#   VIVERE_CACHE_TTL=0 hypercorn api_async:app --bind 0.0.0.0:5001      (porta 5001)
+# e rode (a partir de Estoque_automacao):
+#   python benchmarks/bench_carga_api.py --clientes 500 --duracao 30 \
+#       --alvo flask=http://127.0.0.1:5000 --alvo asgi=http://127.0.0.1:5001
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlsplit
+
+LEITURAS = [
+    (0.45, "GET", "/api/inventario"),
+    (0.20, "GET", "/api/categorias"),
+    (0.15, "GET", "/api/materiais/Q15"),
+    (0.20, "GET", "/api/movimentos?limit=50"),
+]
+
+
+class ClienteHttp:
+    # HTTP/1.1 mínimo com keep-alive: Content-Length ou chunked, sem dependências
+    def __init__(self, host, porta):
+        self.host, self.porta = host, porta
+        self.leitor = self.escritor = None
+
+    async def _conectar(self):
+        self.leitor, self.escritor = await asyncio.open_connection(self.host, self.porta)
+
+    async def pedir(self, metodo, caminho, corpo=None):
+        if self.escritor is None:
+            await self._conectar()
+        dados = json.dumps(corpo).encode() if corpo is not None else b""
+        cabecalho = (f"{metodo} {caminho} HTTP/1.1\r\nHost: {self.host}\r\nConnection: keep-alive\r\n"
+                     f"Content-Type: application/json\r\nContent-Length: {len(dados)}\r\n\r\n")
+        self.escritor.write(cabecalho.encode() + dados)
+        await self.escritor.drain()
+
+        status = int((await self.leitor.readline()).split()[1])
+        cabecalhos = {}
+        while True:
+            linha = await self.leitor.readline()
+            if linha in (b"\r\n", b""):
+                break
+            nome, _, valor = linha.decode("latin-1").partition(":")
+            cabecalhos[nome.strip().lower()] = valor.strip()
+
+        if cabecalhos.get("transfer-encoding") == "chunked":
+            while True:
+                tamanho = int((await self.leitor.readline()).split(b";")[0], 16)
+                await self.leitor.readexactly(tamanho + 2)
+                if tamanho == 0:
+                    break
+        else:
+            await self.leitor.readexactly(int(cabecalhos.get("content-length", 0)))
+        if cabecalhos.get("connection", "").lower() == "close":
+            self.fechar()
+        return status
+
+    def fechar(self):
+        if self.escritor is not None:
+            self.escritor.close()
+        self.leitor = self.escritor = None
+
+
+def sortear(aleatorio, material, contador, leituras=LEITURAS):
+    if material and aleatorio.random() < 0.05:
+        tipo = "entrada" if contador % 2 == 0 else "saida"
+        return "POST", "/api/movimentos", {"nome": material, "tipo": tipo, "quantidade": 1}
+    x = aleatorio.random()
+    for peso, metodo, caminho in leituras:
+        x -= peso
+        if x <= 0:
+            return metodo, caminho, None
+    return leituras[-1][1], leituras[-1][2], None
+
+
+async def cliente(url, ate, inicio_medicao, material, semente, latencias, erros, leituras=LEITURAS):
+    partes = urlsplit(url)
+    http = ClienteHttp(partes.hostname, partes.port or 80)
+    aleatorio = random.Random(semente)
+    contador = 0
+    while time.monotonic() < ate:
+        metodo, caminho, corpo = sortear(aleatorio, material, contador, leituras)
+        contador += 1
+        inicio = time.monotonic()
+        try:
+            status = await http.pedir(metodo, caminho, corpo)
+            ok = status < 500
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+            http.fechar()
+            ok = False
+        if inicio >= inicio_medicao:
+            if ok:
+                latencias.append(time.monotonic() - inicio)
+            else:
+                erros[0] += 1
+    http.fechar()
+
+
+async def medir(url, clientes, duracao, aquecimento, material=None, leituras=LEITURAS):
+    latencias, erros = [], [0]
+    inicio_medicao = time.monotonic() + aquecimento
+    ate = inicio_medicao + duracao
+    await asyncio.gather(*(cliente(url, ate, inicio_medicao, material, i, latencias, erros, leituras)
+                           for i in range(clientes)))
+    latencias.sort()
+
+    def percentil(p):
+        return latencias[min(len(latencias) - 1, int(len(latencias) * p))] * 1000 if latencias else float("nan")
+
+    return {"req_s": len(latencias) / duracao, "p50": percentil(0.50), "p99": percentil(0.99),
+            "ok": len(latencias), "erros": erros[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga: Flask (api.py) x ASGI (api_async.py)")
+    parser.add_argument("--alvo", action="append", metavar="NOME=URL",
+                        help="repetível; padrão: flask=http://127.0.0.1:5000 e asgi=http://127.0.0.1:5001")
+    parser.add_argument("--clientes", type=int, default=500)
+    parser.add_argument("--duracao", type=float, default=30.0, help="segundos medidos por alvo")
+    parser.add_argument("--aquecimento", type=float, default=5.0)
+    parser.add_argument("--material", help="material existente para as escritas (sem ele, só leituras)")
+    args = parser.parse_args()
+
+    alvos = [a.split("=", 1) for a in (args.alvo or ["flask=http://127.0.0.1:5000", "asgi=http://127.0.0.1:5001"])]
+    print(f"{args.clientes} clientes, {args.duracao:.0f}s por alvo\n")
+    print(f"{'alvo':<10} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'ok':>9} {'erros':>7}")
+    for nome, url in alvos:
+        r = asyncio.run(medir(url, args.clientes, args.duracao, args.aquecimento, args.material))
+        print(f"{nome:<10} {r['req_s']:9.0f} {r['p50']:9.1f} {r['p99']:9.1f} {r['ok']:9d} {r['erros']:7d}")
+
+
+if __name__ == "__main__":
+    main()
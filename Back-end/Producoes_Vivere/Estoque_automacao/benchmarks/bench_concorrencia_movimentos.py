@@ -0,0 +1,142 @@
+# Benchmark de concorrência: N threads fazem saídas de 1 unidade do mesmo material
+# até o estoque acabar. Mede vazão e verifica se houve venda além do saldo (oversell).
+# O modo motor informa a categoria, como os tablets: cada saída é um UPDATE
+# condicional só (servicos/movimentacao.py), sem SELECT antes.
+#
+# Uso (a partir de Estoque_automacao, com o MySQL do vivere_estoque no ar):
+#   python benchmarks/bench_concorrencia_movimentos.py --threads 16 --estoque 2000
+#   python benchmarks/bench_concorrencia_movimentos.py --modo legado
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicos.conexao import DB_CONFIG, PoolConexoes
+from servicos.estoque import EstoqueService
+from servicos.movimentacao import EstoqueInsuficienteError, agora
+
+MATERIAL = "__BENCH_MATERIAL_QUENTE__"
+CATEGORIA = "BENCH"
+
+
+def saida_legada(pool, material, quantidade):
+    # Reproduz o registrar_movimento antigo: SELECT, checagem em Python e UPDATE absoluto
+    with pool.conexao() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT material, quantidade FROM inventario WHERE material = %s", (material,))
+            equipamento = cursor.fetchone()
+            if equipamento['quantidade'] < quantidade:
+                raise EstoqueInsuficienteError("Quantidade insuficiente para saída.")
+            cursor.execute(
+                "UPDATE inventario SET quantidade = %s WHERE material = %s",
+                (equipamento['quantidade'] - quantidade, material)
+            )
+            cursor.execute(
+                "INSERT INTO movimentos (material, tipo, quantidade, horario) VALUES (%s, %s, %s, %s)",
+                (material, "saida", quantidade, agora())
+            )
+            conn.commit()
+        finally:
+            cursor.close()
+
+
+def preparar(pool, estoque_inicial):
+    with pool.conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM inventario WHERE material = %s", (MATERIAL,))
+        cursor.execute("DELETE FROM movimentos WHERE material = %s", (MATERIAL,))
+        cursor.execute(
+            "INSERT INTO inventario (categoria, material, quantidade) VALUES (%s, %s, %s)",
+            (CATEGORIA, MATERIAL, estoque_inicial)
+        )
+        conn.commit()
+        cursor.close()
+
+
+def limpar(pool):
+    with pool.conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM inventario WHERE material = %s", (MATERIAL,))
+        cursor.execute("DELETE FROM movimentos WHERE material = %s", (MATERIAL,))
+        conn.commit()
+        cursor.close()
+
+
+def saldo_final(pool):
+    with pool.conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT quantidade FROM inventario WHERE material = %s", (MATERIAL,))
+        (quantidade,) = cursor.fetchone()
+        cursor.execute("SELECT COUNT(*) FROM movimentos WHERE material = %s", (MATERIAL,))
+        (registrados,) = cursor.fetchone()
+        cursor.close()
+        return quantidade, registrados
+
+
+def executar(modo, threads, estoque_inicial):
+    pool = PoolConexoes(DB_CONFIG, tamanho=threads, overflow=0, timeout=60)
+    servico = EstoqueService(pool=pool)
+    preparar(pool, estoque_inicial)
+
+    sucessos = [0] * threads
+    erros = [0] * threads
+    barreira = threading.Barrier(threads + 1)
+
+    def trabalhador(i):
+        barreira.wait()
+        while True:
+            try:
+                if modo == "motor":
+                    servico.registrar_movimento(MATERIAL, "saida", 1, categoria=CATEGORIA)
+                else:
+                    saida_legada(pool, MATERIAL, 1)
+                sucessos[i] += 1
+            except EstoqueInsuficienteError:
+                return
+            except Exception:
+                # Deadlock/lock wait timeout contam como erro e a thread tenta de novo
+                erros[i] += 1
+
+    ts = [threading.Thread(target=trabalhador, args=(i,)) for i in range(threads)]
+    for t in ts:
+        t.start()
+    barreira.wait()
+    inicio = time.perf_counter()
+    for t in ts:
+        t.join()
+    duracao = time.perf_counter() - inicio
+
+    quantidade, registrados = saldo_final(pool)
+    limpar(pool)
+    pool.fechar()
+
+    total = sum(sucessos)
+    print(f"modo={modo} threads={threads} estoque_inicial={estoque_inicial}")
+    print(f"  saídas confirmadas : {total}")
+    print(f"  movimentos gravados: {registrados}")
+    print(f"  saldo final        : {quantidade}")
+    print(f"  erros/retentativas : {sum(erros)}")
+    print(f"  duração            : {duracao:.3f}s")
+    print(f"  vazão              : {total / duracao:.0f} saídas/s")
+    oversell = total - (estoque_inicial - quantidade)
+    print(f"  oversell           : {oversell} {'<-- ERRO' if oversell or quantidade < 0 else 'OK'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concorrência de saídas sobre um material quente")
+    parser.add_argument("--modo", choices=["motor", "legado", "ambos"], default="ambos")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--estoque", type=int, default=2000)
+    args = parser.parse_args()
+
+    modos = ["legado", "motor"] if args.modo == "ambos" else [args.modo]
+    for modo in modos:
+        executar(modo, args.threads, args.estoque)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# Diário local de movimentos (servicos/diario.py). Duas partes:
+#
+# 1. Vazão: N threads acrescentam movimentos com fsync; com várias threads um
+#    fsync cobre as linhas de todas (group commit), então movimentos/s sobem
+#    bem mais que os fsyncs. Roda também sem fsync para comparar.
+# 2. --recuperacao: um processo filho grava e imprime cada seq confirmado e
+#    leva SIGKILL no meio; ao fim sobra uma linha cortada ao meio. Reabre o
+#    diário e confere que todo seq confirmado está lá, a linha cortada sumiu e
+#    a sequência continua. Depois reproduz contra um serviço em memória que
+#    cai no meio de um lote e confere que cada seq foi aplicado uma vez só.
+#
+#   python benchmarks/bench_diario.py --threads 1 8 32 --movimentos 2000
+#   python benchmarks/bench_diario.py --recuperacao
+import argparse
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicos.diario import Diario, ReprodutorDiario
+
+
+def vazao(pasta, threads, movimentos, fsync):
+    diario = Diario(pasta, "bench/0", fsync=fsync).abrir()
+
+    def trabalhar():
+        for _ in range(movimentos // threads):
+            diario.registrar_movimento("Cabo XLR", "saida", 1)
+
+    inicio = time.perf_counter()
+    trabalhadores = [threading.Thread(target=trabalhar) for _ in range(threads)]
+    for w in trabalhadores:
+        w.start()
+    for w in trabalhadores:
+        w.join()
+    tempo = time.perf_counter() - inicio
+    e = diario.estatisticas()
+    diario.fechar()
+    shutil.rmtree(pasta)
+    return tempo, e
+
+
+# ---------- recuperação ----------
+
+def filho(pasta):
+    # Confirma cada seq em stdout só depois de acrescentar() voltar (fsync feito)
+    diario = Diario(pasta, "bench/0", tamanho_segmento=4096).abrir()
+    while True:
+        seq = diario.registrar_movimento("Cabo XLR", "entrada", 1)
+        sys.stdout.write(f"{seq}\n")
+        sys.stdout.flush()
+
+
+class ServicoMemoria:
+    # Faz o papel do EstoqueService: seq aplicado e movimentos na mesma "transação"
+    def __init__(self, cair_em=None):
+        self.aplicado = 0
+        self.aplicados = []
+        self.cair_em = cair_em
+
+    def ultimo_aplicado_diario(self, diario, legado=None):
+        return self.aplicado
+
+    def aplicar_diario(self, diario, registros):
+        novos = [seq for seq, _ in registros if seq > self.aplicado]
+        if self.cair_em is not None and self.cair_em in novos:
+            self.cair_em = None
+            raise ConnectionError("banco caiu no meio do lote")
+        self.aplicados.extend(novos)
+        self.aplicado = registros[-1][0]
+        return {"aplicados": len(novos), "recusados": 0}
+
+
+def recuperacao(pasta, segundos):
+    processo = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--filho", pasta],
+                                stdout=subprocess.PIPE, text=True)
+    time.sleep(segundos)
+    processo.send_signal(signal.SIGKILL)
+    saida, _ = processo.communicate()
+    confirmados = [int(linha) for linha in saida.split() if linha.isdigit()]
+    if not confirmados:
+        raise SystemExit("❌ Erro: o filho não confirmou nenhum movimento")
+
+    # Queda no meio de uma escrita: meia linha no fim do último segmento
+    ultimo = sorted(n for n in os.listdir(pasta) if n.endswith(".diario"))[-1]
+    with open(os.path.join(pasta, ultimo), "ab") as arquivo:
+        arquivo.write(b"999999999\t0badc0de\t{\"material\":\"Cabo")
+
+    diario = Diario(pasta, "bench/0", tamanho_segmento=4096).abrir()
+    e = diario.estatisticas()
+    registros, _ = diario.ler(0, 10 ** 9)
+    seqs = [seq for seq, _ in registros]
+    faltando = set(confirmados) - set(seqs)
+    print(f"confirmados pelo filho: {len(confirmados)} (último {confirmados[-1]}), "
+          f"no diário: {len(seqs)}, segmentos: {e['segmentos']}, "
+          f"linhas descartadas na abertura: {e['descartadas_na_abertura']}")
+    ok = True
+    if faltando:
+        print(f"❌ {len(faltando)} seq confirmado(s) sumiram, ex.: {sorted(faltando)[:5]}")
+        ok = False
+    if seqs != list(range(1, len(seqs) + 1)):
+        print("❌ sequência do diário com buraco ou fora de ordem")
+        ok = False
+    if e['descartadas_na_abertura'] != 1:
+        print("❌ a linha cortada não foi descartada")
+        ok = False
+    novo = diario.registrar_movimento("Cabo XLR", "entrada", 1)
+    if novo != seqs[-1] + 1:
+        print(f"❌ seq depois da reabertura: {novo}, esperado {seqs[-1] + 1}")
+        ok = False
+
+    # Reprodução: o banco cai no meio de um lote e o lote inteiro volta
+    servico = ServicoMemoria(cair_em=novo // 2)
+    reprodutor = ReprodutorDiario(diario, servico, lote=100)
+    try:
+        reprodutor.reproduzir()
+        print("❌ a queda simulada não aconteceu")
+        ok = False
+    except ConnectionError:
+        pass
+    reprodutor.reproduzir()
+    if servico.aplicados != list(range(1, novo + 1)):
+        repetidos = len(servico.aplicados) - len(set(servico.aplicados))
+        print(f"❌ reprodução: {len(servico.aplicados)} aplicados, {repetidos} repetido(s), esperado {novo}")
+        ok = False
+    segmentos = diario.estatisticas()['segmentos']
+    diario.fechar()
+    print(f"reprodução: {len(servico.aplicados)} aplicados uma vez cada, segmentos restantes: {segmentos}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diário local: vazão com group commit e recuperação após queda")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--movimentos", type=int, default=2000, help="total por rodada")
+    parser.add_argument("--recuperacao", action="store_true")
+    parser.add_argument("--segundos", type=float, default=1.0, help="quanto o filho grava antes do kill")
+    parser.add_argument("--pasta", default=None, help="padrão: pasta temporária (use o disco de produção)")
+    parser.add_argument("--filho", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho:
+        filho(args.filho)
+        return
+
+    base = tempfile.mkdtemp(prefix="diario-", dir=args.pasta)
+    try:
+        if args.recuperacao:
+            if not recuperacao(os.path.join(base, "0"), args.segundos):
+                raise SystemExit(1)
+            print("✅ Nenhum movimento confirmado se perdeu e nenhum foi aplicado duas vezes.")
+            return
+        print(f"{args.movimentos} movimentos por rodada em {base}\n")
+        print(f"{'threads':>7} {'fsync':>6} {'mov/s':>10} {'fsyncs':>8} {'mov/fsync':>10}")
+        for fsync in (True, False):
+            for threads in args.threads:
+                tempo, e = vazao(os.path.join(base, "0"), threads, args.movimentos, fsync)
+                por_fsync = f"{e['registros'] / e['fsyncs']:10.1f}" if e['fsyncs'] else f"{'-':>10}"
+                print(f"{threads:7d} {'sim' if fsync else 'não':>6} {e['registros'] / tempo:10.0f} "
+                      f"{e['fsyncs']:8d} {por_fsync}")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Benchmark do motor de disponibilidade com milhares de eventos sobrepostos.
+#
+# Compara "quanto está reservado no pior dia de [inicio, fim]" pela árvore de
+# segmentos (servicos/disponibilidade.py) com a linha de varredura sobre as
+# reservas que cruzam o período (o que uma consulta SQL + Python faria a cada
+# pedido). Sem MySQL: as reservas são geradas em memória.
+#   python benchmarks/bench_disponibilidade.py --eventos 5000
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicos.disponibilidade import MotorDisponibilidade, pico_reservado, dia
+
+INICIO = date(2025, 1, 1)
+
+
+def gerar_reservas(eventos, materiais, por_evento, semente=7):
+    aleatorio = random.Random(semente)
+    linhas = []
+    for evento_id in range(1, eventos + 1):
+        inicio = INICIO + timedelta(days=aleatorio.randrange(365))
+        fim = inicio + timedelta(days=aleatorio.randrange(14))
+        for material in aleatorio.sample(range(materiais), por_evento):
+            linhas.append((len(linhas) + 1, evento_id, f"TRELIÇA {material}", "Q30",
+                           aleatorio.randint(1, 20), inicio, fim, "Confirmado"))
+    return linhas
+
+
+def medir(funcao, consultas):
+    tempos = []
+    for consulta in consultas:
+        inicio = time.perf_counter()
+        funcao(*consulta)
+        tempos.append((time.perf_counter() - inicio) * 1_000_000)
+    tempos.sort()
+    return statistics.median(tempos), tempos[int(len(tempos) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Disponibilidade: árvore de segmentos vs varredura")
+    parser.add_argument("--eventos", type=int, default=5000)
+    parser.add_argument("--materiais", type=int, default=50)
+    parser.add_argument("--por-evento", type=int, default=5)
+    parser.add_argument("--consultas", type=int, default=2000)
+    args = parser.parse_args()
+
+    linhas = gerar_reservas(args.eventos, args.materiais, args.por_evento)
+    motor = MotorDisponibilidade(carregar=lambda: linhas, ttl=float("inf"))
+    inicio = time.perf_counter()
+    motor.garantir_carregado()
+    print(f"{args.eventos} eventos, {len(linhas)} reservas, {args.materiais} materiais: "
+          f"motor carregado em {time.perf_counter() - inicio:.2f}s ({motor.estatisticas()['nos']} nós)")
+
+    # O que a varredura receberia do banco: reservas do material (índice por material)
+    por_material = {}
+    for _, _, material, _, quantidade, ini, fim, _ in linhas:
+        por_material.setdefault(material, []).append((dia(ini), dia(fim), quantidade))
+
+    aleatorio = random.Random(1)
+    consultas = []
+    for _ in range(args.consultas):
+        ini = INICIO + timedelta(days=aleatorio.randrange(365))
+        consultas.append((f"TRELIÇA {aleatorio.randrange(args.materiais)}", ini,
+                          ini + timedelta(days=aleatorio.randrange(30))))
+
+    def varredura(material, ini, fim):
+        ini, fim = dia(ini), dia(fim)
+        return pico_reservado([r for r in por_material[material] if r[0] <= fim and r[1] >= ini], ini, fim)
+
+    def arvore(material, ini, fim):
+        return motor.reservado(material, "Q30", ini, fim)
+
+    for consulta in consultas[:200]:
+        assert arvore(*consulta) == varredura(*consulta), consulta
+
+    print(f"{'método':<22} {'p50':>10} {'p99':>10}")
+    for nome, funcao in (("árvore de segmentos", arvore), ("linha de varredura", varredura)):
+        p50, p99 = medir(funcao, consultas)
+        print(f"{nome:<22} {p50:8.1f}µs {p99:8.1f}µs")
+
+    estoques = {(f"TRELIÇA {m}", "Q30"): 60 for m in range(args.materiais)}
+    inicio = time.perf_counter()
+    conflitos = motor.conflitos(estoques)
+    print(f"overbooking com estoque 60: {len(conflitos)} trechos em {(time.perf_counter() - inicio) * 1000:.0f}ms")
+
+    # Mover um evento de data: tira e põe as reservas dele
+    inicio = time.perf_counter()
+    for evento_id in range(1, 1001):
+        motor.atualizar_evento(evento_id, INICIO + timedelta(days=evento_id % 300),
+                               INICIO + timedelta(days=evento_id % 300 + 3), "Confirmado")
+    print(f"1000 eventos remarcados em {(time.perf_counter() - inicio) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# Subida a frio do app: cada medida é um processo Python novo que importa o
+# módulo e monta o app (o que cada worker do gunicorn faz depois do fork).
+# Mede o tempo de importação, a memória residente logo depois (ru_maxrss), o
+# número de módulos carregados, quais dependências pesadas vieram junto e a
+# primeira requisição a / (não toca no MySQL).
+#
+#   python benchmarks/bench_inicializacao.py
+#   python benchmarks/bench_inicializacao.py --alvo app:app --alvo api:app --repeticoes 20
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PASTA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PESADOS = ("pandas", "numpy", "tabulate", "openpyxl")
+
+MEDIDA = """
+import json, resource, sys, time
+inicio = time.perf_counter()
+if {modulo!r}:
+    from importlib import import_module
+    app = getattr(import_module({modulo!r}), {nome!r})
+importado = time.perf_counter()
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+primeira = None
+if {modulo!r}:
+    with app.test_client() as cliente:
+        cliente.get("/")
+    primeira = time.perf_counter() - importado
+print(json.dumps({{"importacao": importado - inicio, "rss_kb": rss, "modulos": len(sys.modules),
+                  "primeira": primeira, "pesados": [m for m in {pesados!r} if m in sys.modules]}}))
+"""
+
+
+def medir(alvo, repeticoes):
+    modulo, nome = alvo.split(":") if alvo else ("", "")
+    codigo = MEDIDA.format(modulo=modulo, nome=nome, pesados=PESADOS)
+    medidas = []
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, "-c", codigo], cwd=PASTA, capture_output=True, text=True,
+                               env={**os.environ, "VIVERE_DEBUG": "0"})
+        if saida.returncode != 0:
+            raise RuntimeError(f"{alvo}: {saida.stderr.strip().splitlines()[-1]}")
+        medidas.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    return medidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Subida a frio: importação, memória e primeira requisição")
+    parser.add_argument("--alvo", action="append", metavar="MODULO:APP", help="repetível; padrão: app:app")
+    parser.add_argument("--repeticoes", type=int, default=10)
+    args = parser.parse_args()
+
+    # O interpretador vazio é a base: o que passar dele é custo do app
+    base = medir("", args.repeticoes)
+    rss_base = statistics.median(m["rss_kb"] for m in base)
+    print(f"{args.repeticoes} processos por alvo; interpretador vazio: {rss_base / 1024:.1f} MB\n")
+    print(f"{'alvo':<10} {'import ms':>10} {'mediana':>9} {'1a req ms':>10} {'RSS MB':>8} {'+MB':>7} "
+          f"{'módulos':>8}  pesados")
+    for alvo in args.alvo or ["app:app"]:
+        medidas = medir(alvo, args.repeticoes)
+        tempos = [m["importacao"] * 1000 for m in medidas]
+        rss = statistics.median(m["rss_kb"] for m in medidas)
+        print(f"{alvo:<10} {min(tempos):10.1f} {statistics.median(tempos):9.1f} "
+              f"{statistics.median(m['primeira'] for m in medidas) * 1000:10.1f} {rss / 1024:8.1f} "
+              f"{(rss - rss_base) / 1024:7.1f} {medidas[0]['modulos']:8d}  {', '.join(medidas[0]['pesados']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
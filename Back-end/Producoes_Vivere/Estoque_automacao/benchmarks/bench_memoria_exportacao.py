@@ -0,0 +1,105 @@
+# Benchmark de memória da exportação de movimentos: caminho antigo
+# (fetchall + lista de dicts + json.dumps, como o jsonify faz) contra o streaming
+# (cursor sem buffer + fetchmany + gerador JSON/NDJSON).
+#
+# Usa um cursor sintético que gera as linhas sob demanda, para medir só o lado
+# Python sem depender do MySQL:
+#   python benchmarks/bench_memoria_exportacao.py --linhas 1000000
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicos import streaming
+from servicos.estoque import EstoqueService
+
+INICIO = datetime(2024, 1, 1)
+
+
+class CursorSintetico:
+    # Imita o mysql.connector: fetchall materializa tudo, fetchmany lê aos poucos
+    def __init__(self, total):
+        self.total = total
+        self.lidas = 0
+
+    def execute(self, sql, params=()):
+        self.lidas = 0
+
+    def _linha(self, i):
+        return (f"TRELIÇA {i % 500}CM", "saida" if i % 3 else "entrada", i % 50 + 1,
+                INICIO + timedelta(seconds=i))
+
+    def fetchmany(self, tamanho):
+        fim = min(self.lidas + tamanho, self.total)
+        rows = [self._linha(i) for i in range(self.lidas, fim)]
+        self.lidas = fim
+        return rows
+
+    def fetchall(self):
+        return self.fetchmany(self.total - self.lidas)
+
+    def close(self):
+        pass
+
+
+class ConexaoSintetica:
+    def __init__(self, total):
+        self.total = total
+
+    def cursor(self, **kwargs):
+        return CursorSintetico(self.total)
+
+    def close(self):
+        pass
+
+    def descartar(self):
+        pass
+
+
+class PoolSintetico:
+    def __init__(self, total):
+        self.total = total
+
+    def obter(self):
+        return ConexaoSintetica(self.total)
+
+
+def medir(nome, funcao):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    tamanho = funcao()
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{nome:<18} pico={pico / 1024 / 1024:9.1f} MiB  tempo={duracao:6.2f}s  bytes={tamanho}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória: exportação em lista vs streaming")
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    servico = EstoqueService(pool=PoolSintetico(args.linhas))
+
+    def antigo():
+        return len(json.dumps(servico.obter_movimentacoes()))
+
+    def streaming_json():
+        return sum(len(p) for p in streaming.gerar("json", servico.iterar_movimentacoes()))
+
+    def streaming_ndjson():
+        return sum(len(p) for p in streaming.gerar("ndjson", servico.iterar_movimentacoes()))
+
+    print(f"{args.linhas} movimentos sintéticos")
+    medir("lista + jsonify", antigo)
+    medir("streaming json", streaming_json)
+    medir("streaming ndjson", streaming_ndjson)
+
+
+if __name__ == "__main__":
+    main()
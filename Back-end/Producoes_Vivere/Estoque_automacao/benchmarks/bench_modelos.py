@@ -0,0 +1,104 @@
+# Histórico de movimentos em memória para relatórios: o Movimento antigo (com
+# __dict__ e datetime.now().strftime a cada instância, mesmo vindo do banco),
+# o Movimento com __slots__ e a ColecaoMovimentos em colunas NumPy
+# (modelos/movimento.py). Mede, sobre as mesmas tuplas que o cursor devolveria:
+# tempo para montar, memória a mais (tracemalloc, sem contar as tuplas) e o
+# tempo de um relatório típico (entradas e saídas por material).
+#
+#   python benchmarks/bench_modelos.py --movimentos 1000000 --materiais 3000
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modelos.movimento import Movimento, ColecaoMovimentos
+
+
+class MovimentoAntigo:
+    # Como era modelos/movimento.py antes das __slots__
+    def __init__(self, id_equipamento, tipo, quantidade):
+        self.id_equipamento = id_equipamento
+        self.tipo = tipo
+        self.quantidade = quantidade
+        self.horario = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def hidratar_antigo(rows):
+    movimentos = []
+    for r in rows:
+        m = MovimentoAntigo(r[1], r[2], r[3])
+        m.horario = r[4]
+        movimentos.append(m)
+    return movimentos
+
+
+def totais_objetos(movimentos):
+    totais = {}
+    for m in movimentos:
+        atual = totais.setdefault(m.id_equipamento, {"entrada": 0, "saida": 0})
+        atual[m.tipo] += m.quantidade
+    return totais
+
+
+def gerar(n, materiais):
+    # Cada linha com o próprio objeto str, como vem do cursor
+    aleatorio = random.Random(3)
+    inicio = datetime(2024, 1, 1)
+    return [(i, f"Material {aleatorio.randrange(materiais):05d}", "entrada" if aleatorio.random() < 0.5 else "saida",
+             aleatorio.randint(1, 50), inicio + timedelta(seconds=i * 37), None if i % 3 else 1 + i % 2)
+            for i in range(1, n + 1)]
+
+
+def medir(montar, rows):
+    gc.collect()
+    inicio = time.perf_counter()
+    modelo = montar(rows)
+    tempo = time.perf_counter() - inicio
+    del modelo
+    gc.collect()
+    tracemalloc.start()
+    modelo = montar(rows)
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return modelo, tempo, memoria
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Movimento antigo x __slots__ x colunas")
+    parser.add_argument("--movimentos", type=int, default=1_000_000)
+    parser.add_argument("--materiais", type=int, default=3000)
+    args = parser.parse_args()
+
+    rows = gerar(args.movimentos, args.materiais)
+    sql_movimentos = [r[1:5] for r in rows]  # formato do SQL_MOVIMENTOS
+    modos = [
+        ("antigo", lambda r: hidratar_antigo(r), rows, totais_objetos),
+        ("__slots__", Movimento.from_db_rows, sql_movimentos, totais_objetos),
+        ("colunar", ColecaoMovimentos.from_db_rows, rows, lambda c: c.totais_por_material()),
+    ]
+    print(f"{args.movimentos} movimentos, {args.materiais} materiais\n")
+    print(f"{'modelo':<10} {'montar s':>9} {'mov/s':>11} {'MB':>8} {'bytes/mov':>10} {'relatório ms':>13}")
+    referencia = None
+    for nome, montar, entrada, relatorio in modos:
+        modelo, tempo, memoria = medir(montar, entrada)
+        inicio = time.perf_counter()
+        totais = relatorio(modelo)
+        tempo_relatorio = time.perf_counter() - inicio
+        if referencia is None:
+            referencia = totais
+        elif totais != referencia:
+            raise SystemExit(f"❌ {nome}: totais diferentes do modelo antigo")
+        print(f"{nome:<10} {tempo:9.2f} {args.movimentos / tempo:11,.0f} {memoria / 2 ** 20:8.1f} "
+              f"{memoria / args.movimentos:10.1f} {tempo_relatorio * 1000:13.1f}")
+        del modelo
+        gc.collect()
+
+
+if __name__ == "__main__":
+    main()
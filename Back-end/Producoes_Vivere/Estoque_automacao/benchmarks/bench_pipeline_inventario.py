@@ -0,0 +1,75 @@
+# Benchmark do pipeline planilha -> banco numa planilha sintética (100k linhas por padrão).
+#
+# Compara o fluxo antigo (pandas.read_excel -> to_csv -> read_csv -> limpeza)
+# com o pipeline em fluxo (openpyxl read-only -> normalização -> lotes).
+# A carga no MySQL é igual nos dois (ImportadorInventario), então fica de fora.
+#
+#   python benchmarks/bench_pipeline_inventario.py --linhas 100000
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline_inventario import executar_pipeline
+from servicos.importacao import normalizar_dataframe, em_tuplas
+
+CATEGORIAS = ["Q15", "Q25", "Q30", "Q50", "TENDAS NOVAS", "GAURDA CORPO", "ALMOXARIFADO", "OUTROS"]
+
+
+def gerar_planilha(caminho, linhas):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Inventário")
+    ws.append(["categoria", "material", "quantidade", "observações"])
+    for i in range(linhas):
+        quantidade = i % 400 if i % 97 else "?"
+        ws.append([CATEGORIAS[i % len(CATEGORIAS)], f"  MATERIAL {i:06d} ", quantidade,
+                   None if i % 5 else "conferir"])
+    wb.save(caminho)
+
+
+def fluxo_antigo(xlsx, csv_tmp):
+    import pandas as pd
+
+    df = pd.read_excel(xlsx, usecols="A:D", names=["categoria", "material", "quantidade", "observacoes"])
+    df = df.dropna(subset=["material", "quantidade"])
+    df.to_csv(csv_tmp, index=False, encoding="utf-8")
+    df = normalizar_dataframe(pd.read_csv(csv_tmp, dtype=str, keep_default_na=False))
+    return len(em_tuplas(df))
+
+
+def medir(nome, funcao):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    linhas = funcao()
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{nome:<28} {duracao:7.2f}s  {linhas / duracao:9.0f} linhas/s  pico={pico / 1024 / 1024:7.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Planilha sintética: fluxo antigo vs pipeline em fluxo")
+    parser.add_argument("--linhas", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        xlsx = os.path.join(pasta, "sintetico.xlsx")
+        inicio = time.perf_counter()
+        gerar_planilha(xlsx, args.linhas)
+        print(f"planilha com {args.linhas} linhas gerada em {time.perf_counter() - inicio:.1f}s "
+              f"({os.path.getsize(xlsx) / 1024 / 1024:.1f} MiB)")
+
+        medir("pandas + CSV intermediário", lambda: fluxo_antigo(xlsx, os.path.join(pasta, "a.csv")))
+        medir("pipeline (sem CSV)", lambda: executar_pipeline(xlsx, carregar=False)["linhas"])
+        medir("pipeline (com CSV)", lambda: executar_pipeline(
+            xlsx, csv_saida=os.path.join(pasta, "b.csv"), carregar=False)["linhas"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# Salvar N equipamentos: o salvar_no_banco antigo (SELECT COUNT(*) + INSERT ou
+# UPDATE + commit por objeto), o atual (um upsert + commit por objeto) e a
+# UnidadeTrabalho (modelos/repositorio.py: executemany em lotes + um commit).
+# Também compara ler N equipamentos com buscar_por_id um a um e com
+# buscar_por_ids.
+#
+# O banco é uma tabela em memória atrás de uma conexão falsa que conta idas ao
+# servidor (execute, executemany e commit contam uma cada; o mysql.connector
+# junta o executemany de um INSERT num comando só) e espera --latencia ms em
+# cada uma, como numa rede local.
+#
+#   python benchmarks/bench_repositorio.py --equipamentos 10000 --latencia 0.3
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modelos.equipamentos import Equipamento, SQL_BUSCAR, SQL_BUSCAR_IDS, SQL_SALVAR, SQL_INSERIR
+from modelos.repositorio import UnidadeTrabalho
+
+
+def salvar_antigo(equipamento, conn):
+    # Como era Equipamento.salvar_no_banco
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM materiais WHERE id = %s", (equipamento.id,))
+    (count,) = cursor.fetchone()
+    if count == 0:
+        cursor.execute("INSERT INTO materiais (id, nome, quantidade, id_categoria, observacoes) "
+                       "VALUES (%s, %s, %s, %s, %s)", equipamento.linha())
+    else:
+        cursor.execute("UPDATE materiais SET nome=%s, quantidade=%s, id_categoria=%s, observacoes=%s WHERE id=%s",
+                       equipamento.linha()[1:] + (equipamento.id,))
+    conn.commit()
+    cursor.close()
+
+
+class ConexaoMemoria:
+    def __init__(self, latencia):
+        self.latencia = latencia / 1000
+        self.tabela = {}
+        self.idas = 0
+        self.proximo_id = 1
+
+    def _ida(self):
+        self.idas += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+
+    def cursor(self):
+        return CursorMemoria(self)
+
+    def commit(self):
+        self._ida()
+
+    def rollback(self):
+        self._ida()
+
+
+class CursorMemoria:
+    def __init__(self, conn):
+        self.conn = conn
+        self._linhas = []
+        self.lastrowid = self.rowcount = 0
+
+    def _aplicar(self, sql, params):
+        tabela = self.conn.tabela
+        if sql.startswith("SELECT COUNT(*)"):
+            self._linhas = [(int(params[0] in tabela),)]
+        elif sql == SQL_BUSCAR or sql.startswith(SQL_BUSCAR_IDS.split("{")[0]):
+            self._linhas = [(i,) + tabela[i] for i in params if i in tabela]
+        elif sql == SQL_INSERIR:
+            tabela[self.conn.proximo_id] = tuple(params)
+            self.conn.proximo_id += 1
+        elif sql == SQL_SALVAR or sql.startswith("INSERT INTO materiais"):
+            tabela[params[0]] = tuple(params[1:])
+            self.conn.proximo_id = max(self.conn.proximo_id, params[0] + 1)
+        elif sql.startswith("UPDATE materiais"):
+            tabela[params[-1]] = tuple(params[:-1])
+        else:
+            raise ValueError(f"SQL não esperado: {sql}")
+
+    def execute(self, sql, params=()):
+        self.conn._ida()
+        self._aplicar(re.sub(r"\s+", " ", sql).strip() if "\n" in sql else sql, params)
+
+    def executemany(self, sql, linhas):
+        self.conn._ida()
+        self.lastrowid = self.conn.proximo_id
+        for params in linhas:
+            self._aplicar(sql, params)
+        self.rowcount = len(linhas)
+
+    def fetchone(self):
+        return self._linhas[0] if self._linhas else None
+
+    def fetchall(self):
+        return self._linhas
+
+    def close(self):
+        pass
+
+
+def gerar(n):
+    return [Equipamento(i, f"Material {i:05d}", i % 500, 1 + i % 40, None) for i in range(1, n + 1)]
+
+
+def medir(conn, funcao):
+    conn.idas = 0
+    inicio = time.perf_counter()
+    funcao()
+    return time.perf_counter() - inicio, conn.idas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="salvar_no_banco x UnidadeTrabalho")
+    parser.add_argument("--equipamentos", type=int, default=10000)
+    parser.add_argument("--latencia", type=float, default=0.3, help="ms por ida ao servidor")
+    args = parser.parse_args()
+
+    esperado = {e.id: e.linha()[1:] for e in gerar(args.equipamentos)}
+    print(f"{args.equipamentos} equipamentos, {args.latencia} ms por ida ao servidor\n")
+    print(f"{'modo':<28} {'idas':>8} {'s':>8}")
+
+    def linha(nome, tempo, idas):
+        print(f"{nome:<28} {idas:8d} {tempo:8.2f}")
+
+    def com_unidade(conn, equipamentos):
+        uow = UnidadeTrabalho(conn)
+        for e in equipamentos:
+            uow.adicionar(e)
+        return uow.salvar
+
+    for nome, preparar in (
+        ("salvar_no_banco antigo", lambda conn, eqs: lambda: [salvar_antigo(e, conn) for e in eqs]),
+        ("salvar_no_banco (upsert)", lambda conn, eqs: lambda: [e.salvar_no_banco(conn) for e in eqs]),
+        ("UnidadeTrabalho.salvar", com_unidade),
+    ):
+        conn = ConexaoMemoria(args.latencia)
+        tempo, idas = medir(conn, preparar(conn, gerar(args.equipamentos)))
+        if conn.tabela != esperado:
+            raise SystemExit(f"❌ Erro: {nome} gravou uma tabela diferente")
+        linha(nome, tempo, idas)
+
+    ids = list(esperado)
+    conn = ConexaoMemoria(args.latencia)
+    conn.tabela = dict(esperado)
+    tempo, idas = medir(conn, lambda: [Equipamento.buscar_por_id(conn, i) for i in ids])
+    linha("buscar_por_id um a um", tempo, idas)
+    uow = UnidadeTrabalho(conn)
+    tempo, idas = medir(conn, lambda: uow.buscar_por_ids(ids))
+    linha("buscar_por_ids", tempo, idas)
+
+    # Só o que mudou volta ao banco
+    for i in ids[::10]:
+        uow.buscar_por_id(i).adicionar_quantidade(1)
+        esperado[i] = (esperado[i][0], esperado[i][1] + 1) + esperado[i][2:]
+    tempo, idas = medir(conn, uow.salvar)
+    if conn.tabela != esperado:
+        raise SystemExit("❌ Erro: alterações não gravadas")
+    linha(f"salvar {len(ids[::10])} alterados", tempo, idas)
+
+
+if __name__ == "__main__":
+    main()
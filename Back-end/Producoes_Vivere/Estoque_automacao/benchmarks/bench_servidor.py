@@ -0,0 +1,98 @@
+# Benchmark do servidor: app.run (servidor de desenvolvimento do Flask) contra
+# servir.py (gunicorn pre-fork). Sobe cada um, mede o tempo até a primeira
+# resposta e a vazão com N clientes em keep-alive (bench_carga_api.py).
+#
+# A rota padrão (/) não toca no MySQL: mede só o servidor. Com --rota
+# /api/inventario mede o caminho completo (precisa do MySQL no ar).
+#   python benchmarks/bench_servidor.py --clientes 200 --duracao 20
+#   python benchmarks/bench_servidor.py --rota /api/inventario --workers 4
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+PASTA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PASTA)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_carga_api import medir
+
+
+def esperar_resposta(porta, rota, limite=60.0):
+    # Tempo até o primeiro 200 na rota (importação do app + bind + workers prontos)
+    inicio = time.perf_counter()
+    pedido = f"GET {rota} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n".encode()
+    while time.perf_counter() - inicio < limite:
+        try:
+            with socket.create_connection(("127.0.0.1", porta), timeout=1) as s:
+                s.sendall(pedido)
+                if s.recv(64).split(b" ")[1] == b"200":
+                    return time.perf_counter() - inicio
+        except (OSError, IndexError):
+            pass
+        time.sleep(0.02)
+    raise RuntimeError(f"servidor não respondeu em {limite:.0f}s")
+
+
+def subir(comando, porta, rota):
+    processo = subprocess.Popen(comando, cwd=PASTA, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                env={**os.environ, "VIVERE_DEBUG": "0"})
+    try:
+        return processo, esperar_resposta(porta, rota)
+    except Exception:
+        processo.kill()
+        raise
+
+
+def derrubar(processo):
+    # SIGTERM: o gunicorn espera as requisições em andamento e encerra os workers
+    processo.send_signal(signal.SIGTERM)
+    try:
+        processo.wait(timeout=40)
+    except subprocess.TimeoutExpired:
+        processo.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="app.run x servir.py: subida e vazão")
+    parser.add_argument("--rota", default="/")
+    parser.add_argument("--clientes", type=int, default=200)
+    parser.add_argument("--duracao", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, help="padrão: o de servir.py")
+    parser.add_argument("--porta", type=int, default=5050)
+    parser.add_argument("--subidas", type=int, default=3, help="repetições da medida de subida")
+    args = parser.parse_args()
+
+    servir = [sys.executable, "servir.py", "--porta", str(args.porta)]
+    if args.workers:
+        servir += ["--workers", str(args.workers)]
+    candidatos = {
+        # app.run com a porta trocada, como o app.py faz no __main__ (threaded, uma thread por conexão)
+        "app.run": [sys.executable, "-c",
+                    f"from app import app; app.run(host='127.0.0.1', port={args.porta}, debug=False)"],
+        "servir.py": servir,
+    }
+
+    print(f"rota {args.rota}, {args.clientes} clientes, {args.duracao:.0f}s\n")
+    print(f"{'servidor':<11} {'subida s':>9} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'erros':>7}")
+    for nome, comando in candidatos.items():
+        subidas = []
+        for _ in range(args.subidas):
+            processo, tempo = subir(comando, args.porta, args.rota)
+            subidas.append(tempo)
+            derrubar(processo)
+        processo, _ = subir(comando, args.porta, args.rota)
+        try:
+            r = asyncio.run(medir(f"http://127.0.0.1:{args.porta}", args.clientes, args.duracao, 2.0,
+                                  leituras=[(1.0, "GET", args.rota)]))
+        finally:
+            derrubar(processo)
+        print(f"{nome:<11} {min(subidas):9.2f} {r['req_s']:9.0f} {r['p50']:9.1f} {r['p99']:9.1f} {r['erros']:7d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# Bytes que um tablet baixa para ficar em dia: carga completa (/api/inventario,
+# /api/movimentos, /api/alocacoes) contra o /api/sync depois de um dia de
+# trabalho. Dados sintéticos em memória; o feed é montado pelo mesmo
+# ler_mudancas do servidor (servicos/mudancas.py), sobre um cursor falso.
+#
+#   python benchmarks/bench_sync.py --materiais 3000 --movimentos 200000 --alteracoes 400
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicos.mudancas import Mudancas, ler_mudancas
+
+
+class CursorMemoria:
+    # Responde às consultas do ler_mudancas a partir de dicts
+    def __init__(self, dados, feed, versao):
+        self.dados, self.feed, self.versao = dados, feed, versao
+        self._linhas, self.description = [], []
+
+    def execute(self, sql, params=()):
+        if sql.startswith("SELECT versao, minimo"):
+            colunas, linhas = ("versao", "minimo"), [(self.versao, 0)]
+        elif "FROM mudancas" in sql:
+            desde, limite = params
+            colunas = ("tabela", "chave", "operacao", "versao")
+            linhas = [m for m in self.feed if m[3] > desde][:limite]
+        else:
+            tabela = next(t for t in ("inventario", "movimentos", "alocacoes") if f"FROM {t}" in sql)
+            colunas = list(self.dados[tabela][0].keys())
+            chaves = set(params)
+            campo = "material" if tabela == "inventario" else "id"
+            linhas = [tuple(r.values()) for r in self.dados[tabela] if str(r[campo]) in chaves]
+        self.description = [(c,) for c in colunas]
+        self._linhas = linhas
+
+    def fetchone(self):
+        return self._linhas[0] if self._linhas else None
+
+    def fetchall(self):
+        return self._linhas
+
+
+def formatar(horario):
+    return horario.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def gerar(materiais, movimentos, alocacoes):
+    aleatorio = random.Random(7)
+    inicio = datetime(2026, 1, 1)
+    inventario = [{"id": i, "material": f"Material {i:05d}", "categoria": f"Categoria {i % 40}",
+                   "quantidade": aleatorio.randint(0, 500)} for i in range(1, materiais + 1)]
+    historico = [{"id": i, "material": f"Material {aleatorio.randint(1, materiais):05d}",
+                  "tipo": aleatorio.choice(("entrada", "saida")), "quantidade": aleatorio.randint(1, 20),
+                  "horario": inicio + timedelta(minutes=i), "deposito": None}
+                 for i in range(1, movimentos + 1)]
+    alocadas = [{"id": i, "material": f"Material {aleatorio.randint(1, materiais):05d}",
+                 "deposito": f"Depósito {i % 3 + 1}", "quantidade": aleatorio.randint(1, 50),
+                 "data_alocacao": "Thu, 01 Jan 2026 00:00:00 GMT", "observacao": "(70%)"}
+                for i in range(1, alocacoes + 1)]
+    return {"inventario": inventario, "movimentos": historico, "alocacoes": alocadas}
+
+
+def um_dia(dados, alteracoes, materiais):
+    # `alteracoes` movimentos novos, cada um mexendo num material, mais algumas alocações
+    aleatorio = random.Random(11)
+    feed, versao = [], 0
+    for _ in range(alteracoes):
+        material = f"Material {aleatorio.randint(1, materiais):05d}"
+        novo = dict(dados["movimentos"][-1], id=len(dados["movimentos"]) + 1, material=material)
+        dados["movimentos"].append(novo)
+        mudancas = Mudancas()
+        mudancas.atualizar("inventario", material)
+        mudancas.inserir("movimentos", novo["id"])
+        if aleatorio.random() < 0.1:
+            alocacao = dict(dados["alocacoes"][-1], id=len(dados["alocacoes"]) + 1, material=material)
+            dados["alocacoes"].append(alocacao)
+            mudancas.inserir("alocacoes", alocacao["id"])
+        for (tabela, chave), operacao in mudancas.chaves.items():
+            versao += 1
+            # Uma linha por chave (a chave primária de mudancas compacta)
+            feed = [m for m in feed if (m[0], m[1]) != (tabela, chave)] + [(tabela, chave, operacao, versao)]
+    return feed, versao
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga completa x /api/sync")
+    parser.add_argument("--materiais", type=int, default=3000)
+    parser.add_argument("--movimentos", type=int, default=200000)
+    parser.add_argument("--alocacoes", type=int, default=20000)
+    parser.add_argument("--alteracoes", type=int, default=400, help="movimentos desde a última sincronização")
+    args = parser.parse_args()
+
+    dados = gerar(args.materiais, args.movimentos, args.alocacoes)
+    feed, versao = um_dia(dados, args.alteracoes, args.materiais)
+
+    inicio = time.perf_counter()
+    completo = sum(len(json.dumps(dados[t], ensure_ascii=False, default=formatar).encode()) for t in dados)
+    tempo_completo = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    cursor = CursorMemoria(dados, feed, versao)
+    delta, desde, paginas = 0, 0, 0
+    while True:
+        pagina = ler_mudancas(cursor, desde)
+        delta += len(json.dumps(pagina, ensure_ascii=False).encode())
+        paginas += 1
+        desde = pagina["versao"]
+        if not pagina["mais"]:
+            break
+    tempo_delta = time.perf_counter() - inicio
+
+    print(f"{args.materiais} materiais, {args.movimentos} movimentos, {args.alocacoes} alocações; "
+          f"{args.alteracoes} movimentos desde a última sincronização ({len(feed)} chaves no feed)\n")
+    print(f"{'modo':<16} {'KB':>10} {'montagem ms':>12}")
+    print(f"{'carga completa':<16} {completo / 1024:10.1f} {tempo_completo * 1000:12.1f}")
+    print(f"{'/api/sync':<16} {delta / 1024:10.1f} {tempo_delta * 1000:12.1f}   ({paginas} página(s))")
+    print(f"\n{completo / delta:.0f}x menos bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import argparse
+
+from servicos.conexao import obter_pool
+from servicos.mudancas import compactar, RETER_DIAS
+
+# Mantém o feed do /api/sync (tabela mudancas, V010) limitado: apaga as
+# versões mais velhas que --dias (e além das --manter mais recentes) e sobe o
+# mínimo; tablets parados há mais tempo que isso recebem 410 e refazem a carga
+# completa. Agendar no cron, por exemplo uma vez por dia.
+#
+# Uso:
+#   python compactar_mudancas.py                -> VIVERE_SYNC_RETER_DIAS (30) dias
+#   python compactar_mudancas.py --dias 7 --manter 200000
+
+
+def executar(dias, manter=None):
+    with obter_pool().conexao() as conn:
+        resultado = compactar(conn, dias, manter)
+    print(f"✅ {resultado['apagadas']} mudança(s) apagada(s); feed cobre as versões "
+          f"{resultado['minimo']} a {resultado['versao']}.")
+    return resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compacta o feed de mudanças do /api/sync")
+    parser.add_argument("--dias", type=int, default=RETER_DIAS, help="mantém as mudanças dos últimos N dias")
+    parser.add_argument("--manter", type=int, default=None, help="no máximo N mudanças (as mais recentes)")
+    args = parser.parse_args()
+    try:
+        executar(args.dias, args.manter)
+    except Exception as e:
+        print(f"❌ Erro: {e}")
+        raise SystemExit(1)
@@ -0,0 +1,37 @@
+-- V001: índices secundários para as consultas quentes do app.py e do EstoqueService
+--
+-- O mesmo nome de material aparece em mais de uma categoria na planilha
+-- (CUBO em Q15/Q25/Q30/Q50, TENDA 4X4 nas tendas novas e antigas...), então a
+-- chave única é (material, categoria). Como material vem primeiro, ela também
+-- atende os filtros só por material.
+--
+-- A planilha e o inventario_vivere.csv trazem linhas repetidas idênticas
+-- (GAURDA CORPO FERRO/ALUMINIO 1M/2M), e o importador antigo gravava cada uma.
+-- As cópias exatas (mesmo material, categoria, quantidade e observações) são
+-- apagadas antes da chave, ficando a de menor id. Repetidas com quantidade ou
+-- observação diferentes não têm como ser resolvidas aqui: o migrar.py confere
+-- antes de aplicar e para, listando as linhas.
+
+DELETE copia FROM inventario copia
+JOIN inventario original
+  ON original.material = copia.material
+ AND original.categoria <=> copia.categoria
+ AND original.quantidade <=> copia.quantidade
+ AND original.observacoes <=> copia.observacoes
+ AND original.id < copia.id;
+
+-- registrar_movimento, buscar_equipamento, remover_equipamento (WHERE material = %s)
+ALTER TABLE inventario ADD UNIQUE KEY uk_inventario_material (material, categoria);
+
+-- listar_por_categoria / obter_materiais_por_categoria (WHERE categoria = %s AND quantidade > 0)
+-- e listar_categorias (SELECT DISTINCT categoria) via leitura só do índice
+ALTER TABLE inventario ADD KEY idx_inventario_categoria_quantidade (categoria, quantidade);
+
+-- /api/alocacoes/deposito/<id> (WHERE deposito = %s ORDER BY data_alocacao DESC)
+ALTER TABLE alocacoes ADD KEY idx_alocacoes_deposito_data (deposito, data_alocacao);
+
+-- /api/alocacoes (ORDER BY data_alocacao DESC)
+ALTER TABLE alocacoes ADD KEY idx_alocacoes_data (data_alocacao);
+
+-- /api/logs (ORDER BY data_hora DESC)
+ALTER TABLE logs ADD KEY idx_logs_data_hora (data_hora);
@@ -0,0 +1,3 @@
+-- V002: paginação por cursor e filtro de período em /api/movimentos
+-- (ORDER BY horario DESC, id_movimento DESC; o id já vem junto no índice secundário)
+ALTER TABLE movimentos ADD KEY idx_movimentos_horario (horario);
@@ -0,0 +1,9 @@
+-- V003: limite mínimo de estoque por material e/ou categoria (alertas de estoque baixo)
+-- material = '' vale para a categoria inteira; categoria = '' vale para o material em qualquer categoria.
+-- Sem linha aplicável, vale o padrão VIVERE_LIMITE_PADRAO (10, o "quantidade < 10" das consultas manuais).
+CREATE TABLE IF NOT EXISTS limites_estoque (
+    categoria VARCHAR(100) NOT NULL DEFAULT '',
+    material VARCHAR(255) NOT NULL DEFAULT '',
+    minimo INT NOT NULL,
+    PRIMARY KEY (categoria, material)
+);
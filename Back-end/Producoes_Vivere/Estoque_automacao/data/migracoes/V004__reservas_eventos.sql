@@ -0,0 +1,14 @@
+-- V004: reservas de material por evento (disponibilidade por período)
+-- O período vem de eventos.data_inicio/data_fim; um material aparece uma vez por evento.
+CREATE TABLE IF NOT EXISTS reservas_eventos (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    evento_id INT NOT NULL,
+    material VARCHAR(255) NOT NULL,
+    categoria VARCHAR(100) NOT NULL DEFAULT '',
+    quantidade INT NOT NULL,
+    UNIQUE KEY uk_reservas_evento_material (evento_id, material, categoria),
+    KEY idx_reservas_material (material, categoria),
+    CONSTRAINT fk_reservas_evento FOREIGN KEY (evento_id) REFERENCES eventos (id) ON DELETE CASCADE
+);
+
+ALTER TABLE eventos ADD KEY idx_eventos_periodo (data_inicio, data_fim);
@@ -0,0 +1,17 @@
+-- V005: parâmetros de divisão das alocações entre depósitos (servicos/alocacao.py)
+--   peso          política "pesos" (proporcional)
+--   capacidade    política "capacidade" e limite da "distancia" (NULL = sem limite)
+--   distancia_km  política "distancia" (o mais perto enche primeiro)
+--   ativo         depósito fora da divisão sem apagar o histórico
+ALTER TABLE depositos
+    ADD COLUMN peso DECIMAL(10, 4) NOT NULL DEFAULT 1,
+    ADD COLUMN capacidade INT NULL,
+    ADD COLUMN distancia_km DECIMAL(10, 2) NULL,
+    ADD COLUMN ativo TINYINT(1) NOT NULL DEFAULT 1;
+
+-- Mantém a divisão que era fixa no código: 70% Maricá Centro (1), 30% Itaipuaçu (2)
+UPDATE depositos SET peso = 0.7 WHERE id = 1;
+UPDATE depositos SET peso = 0.3 WHERE id = 2;
+
+-- Ocupação por depósito e saldo de um material por depósito (SUM ... GROUP BY)
+ALTER TABLE alocacoes ADD KEY idx_alocacoes_material_deposito (material, deposito);
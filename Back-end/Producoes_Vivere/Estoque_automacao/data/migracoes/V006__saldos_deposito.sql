@@ -0,0 +1,35 @@
+-- V006: saldo por (material, depósito) mantido na mesma transação das escritas
+-- (servicos/saldos.py), transferências entre depósitos e depósito opcional nos movimentos.
+--
+-- saldos_deposito é derivada: alocações + transferências recebidas - enviadas
+-- + entradas - saídas com depósito. reconciliar_saldos.py refaz a tabela a partir
+-- desse histórico e aponta divergências.
+CREATE TABLE IF NOT EXISTS saldos_deposito (
+    deposito INT NOT NULL,
+    material VARCHAR(255) NOT NULL,
+    quantidade INT NOT NULL DEFAULT 0,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (deposito, material),
+    KEY idx_saldos_material (material)
+);
+
+CREATE TABLE IF NOT EXISTS transferencias (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    material VARCHAR(255) NOT NULL,
+    origem INT NOT NULL,
+    destino INT NOT NULL,
+    quantidade INT NOT NULL,
+    horario DATETIME NOT NULL,
+    observacao TEXT,
+    KEY idx_transferencias_horario (horario),
+    KEY idx_transferencias_material (material)
+);
+
+-- NULL: movimento só do inventário geral, sem mexer no saldo de nenhum depósito
+ALTER TABLE movimentos ADD COLUMN deposito INT NULL;
+
+-- Saldo inicial: tudo o que já foi alocado (alocacoes.deposito guarda o id como texto)
+INSERT INTO saldos_deposito (deposito, material, quantidade)
+SELECT CAST(deposito AS UNSIGNED), material, SUM(quantidade)
+FROM alocacoes
+GROUP BY CAST(deposito AS UNSIGNED), material;
@@ -0,0 +1,39 @@
+-- V007: agregados mantidos pelas escritas (servicos/resumo.py) para o /api/resumo
+-- e os totais do painel, no lugar de SUM/COUNT sobre inventario e movimentos.
+--
+-- Cada escrita soma o seu delta nestas tabelas na mesma transação, por último,
+-- antes do commit. reconstruir_resumo.py refaz tudo a partir das tabelas base.
+CREATE TABLE IF NOT EXISTS resumo_categorias (
+    categoria VARCHAR(100) NOT NULL PRIMARY KEY,
+    materiais INT NOT NULL DEFAULT 0,
+    quantidade BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS resumo_movimentos_dia (
+    dia DATE NOT NULL,
+    tipo ENUM('entrada', 'saida') NOT NULL,
+    movimentos INT NOT NULL DEFAULT 0,
+    quantidade BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dia, tipo)
+);
+
+-- estoque (soma das quantidades), materiais (linhas do inventário), movimentos
+CREATE TABLE IF NOT EXISTS resumo_totais (
+    chave VARCHAR(40) NOT NULL PRIMARY KEY,
+    valor BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO resumo_categorias (categoria, materiais, quantidade)
+SELECT COALESCE(categoria, ''), COUNT(*), COALESCE(SUM(quantidade), 0)
+FROM inventario
+GROUP BY COALESCE(categoria, '');
+
+INSERT INTO resumo_movimentos_dia (dia, tipo, movimentos, quantidade)
+SELECT DATE(horario), tipo, COUNT(*), SUM(quantidade)
+FROM movimentos
+GROUP BY DATE(horario), tipo;
+
+INSERT INTO resumo_totais (chave, valor)
+SELECT 'estoque', COALESCE(SUM(quantidade), 0) FROM inventario
+UNION ALL SELECT 'materiais', COUNT(*) FROM inventario
+UNION ALL SELECT 'movimentos', COUNT(*) FROM movimentos;
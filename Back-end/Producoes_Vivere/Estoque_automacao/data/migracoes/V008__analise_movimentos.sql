@@ -0,0 +1,31 @@
+-- V008: rollups de movimentos por material/categoria/tipo, por hora e por dia,
+-- para o /api/analytics/movimentos (servicos/analise.py). Preenchidos pelas
+-- escritas junto com o resumo (V007); o histórico anterior entra com
+-- backfill_analise.py.
+--
+-- A chave primária começa pelo material (filtro mais comum: consumo de um
+-- material ao longo do tempo); (categoria, período) e (período) atendem os
+-- filtros por categoria e a visão geral.
+CREATE TABLE IF NOT EXISTS movimentos_hora (
+    material VARCHAR(255) NOT NULL,
+    categoria VARCHAR(100) NOT NULL DEFAULT '',
+    tipo ENUM('entrada', 'saida') NOT NULL,
+    hora DATETIME NOT NULL,
+    movimentos INT NOT NULL DEFAULT 0,
+    quantidade BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (material, categoria, tipo, hora),
+    KEY idx_movimentos_hora_categoria (categoria, hora),
+    KEY idx_movimentos_hora_hora (hora)
+);
+
+CREATE TABLE IF NOT EXISTS movimentos_dia_material (
+    material VARCHAR(255) NOT NULL,
+    categoria VARCHAR(100) NOT NULL DEFAULT '',
+    tipo ENUM('entrada', 'saida') NOT NULL,
+    dia DATE NOT NULL,
+    movimentos INT NOT NULL DEFAULT 0,
+    quantidade BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (material, categoria, tipo, dia),
+    KEY idx_movimentos_dia_categoria (categoria, dia),
+    KEY idx_movimentos_dia_dia (dia)
+);
@@ -0,0 +1,8 @@
+-- V009: último seq aplicado de cada diário local de movimentos (servicos/diario.py).
+-- Atualizado na mesma transação que aplica o lote: o reprodutor pula o que
+-- já está aqui e cada linha do diário entra no inventário exatamente uma vez.
+CREATE TABLE IF NOT EXISTS diario_aplicado (
+    diario VARCHAR(255) NOT NULL PRIMARY KEY,
+    ultimo_seq BIGINT NOT NULL,
+    atualizado_em DATETIME NOT NULL
+);
@@ -0,0 +1,25 @@
+-- V010: feed de mudanças do /api/sync (servicos/mudancas.py).
+--
+-- mudancas: uma linha por chave alterada (inventario por material,
+-- movimentos e alocacoes por id) com a última operação e a versão em que ela
+-- aconteceu. O índice único em versao atende o "versao > desde".
+-- mudancas_versao: contador único, reservado por cada escrita logo antes do
+-- commit; minimo é a menor versão que o feed ainda cobre (compactar_mudancas.py).
+CREATE TABLE IF NOT EXISTS mudancas (
+    tabela VARCHAR(40) NOT NULL,
+    chave VARCHAR(255) NOT NULL,
+    operacao ENUM('insert', 'update', 'delete') NOT NULL,
+    versao BIGINT NOT NULL,
+    criado_em DATETIME NOT NULL,
+    PRIMARY KEY (tabela, chave),
+    UNIQUE KEY idx_mudancas_versao (versao),
+    KEY idx_mudancas_criado_em (criado_em)
+);
+
+CREATE TABLE IF NOT EXISTS mudancas_versao (
+    id TINYINT NOT NULL PRIMARY KEY,
+    versao BIGINT NOT NULL DEFAULT 0,
+    minimo BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT IGNORE INTO mudancas_versao (id, versao, minimo) VALUES (1, 0, 0);
@@ -0,0 +1,4 @@
+-- V011: paginação por cursor em /api/estoque (ORDER BY categoria, id; o id já
+-- vem junto no índice secundário). O (categoria, quantidade) da V001 não serve:
+-- a quantidade fica entre a categoria e o id e a ordenação viraria filesort.
+ALTER TABLE inventario ADD KEY idx_inventario_categoria (categoria);
@@ -1,47 +1,41 @@
+import argparse
+
 import pandas as pd
-import mysql.connector
-
-config = {
-    'host': '127.0.0.1',
-    'user': 'root',
-    'password': 'Art_@2002',
-    'database': 'vivere_estoque',
-    'raise_on_warnings': True
-}
-
-try:
-    conn = mysql.connector.connect(**config)
-    cursor = conn.cursor()
-
-    # Limpa dados antigos da tabela inventario
-    cursor.execute("DELETE FROM inventario")
-    conn.commit()
-
-    # Lê o CSV completo com categoria, material, quantidade e observações
-    df = pd.read_csv('inventario_vivere.csv')
-
-    for idx, row in df.iterrows():
-        categoria = str(row['categoria']).strip()
-        material = str(row['material']).strip()
-        try:
-            quantidade = int(row['quantidade'])
-        except:
-            quantidade = 0
-        observacoes = str(row.get('observacoes', '')).strip()  # pega a coluna observacoes, se existir
-
-        cursor.execute("""
-            INSERT INTO inventario (categoria, material, quantidade, observacoes)
-            VALUES (%s, %s, %s, %s)
-        """, (categoria, material, quantidade, observacoes))
-
-    conn.commit()
-    print("✅ Inventário atualizado com dados do CSV (incluindo observações)!")
-
-except Exception as e:
-    print(f"❌ Erro: {e}")
-
-finally:
-    if 'cursor' in locals():
-        cursor.close()
-    if 'conn' in locals() and conn.is_connected():
-        conn.close()
+
+from servicos.importacao import MODOS, TAMANHO_LOTE, normalizar_dataframe, em_tuplas, importar_linhas
+
+# Importa o inventario_vivere.csv para a tabela inventario.
+#
+#   python importar_csv_mysql.py                       -> substitui o inventário (troca atômica)
+#   python importar_csv_mysql.py --modo mesclar        -> upsert por material, sem apagar nada
+#   python importar_csv_mysql.py --sem-load-data       -> força executemany em lotes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa o CSV de inventário para o MySQL")
+    parser.add_argument("arquivo", nargs="?", default="inventario_vivere.csv")
+    parser.add_argument("--modo", choices=MODOS, default="substituir")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE, help="linhas por executemany")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--load-data", dest="load_data", action="store_true", default=None,
+                       help="exige LOAD DATA LOCAL INFILE")
+    grupo.add_argument("--sem-load-data", dest="load_data", action="store_false")
+    args = parser.parse_args()
+
+    try:
+        # Lê o CSV completo com categoria, material, quantidade e observações
+        df = normalizar_dataframe(pd.read_csv(args.arquivo, dtype=str, keep_default_na=False))
+        linhas = em_tuplas(df)
+        relatorio = importar_linhas([linhas], modo=args.modo, tamanho_lote=args.lote,
+                                    usar_load_data=args.load_data)
+        print(f"✅ Inventário atualizado com dados do CSV ({relatorio['modo']}): "
+              f"{relatorio['linhas']} linhas em {relatorio['segundos']}s "
+              f"({relatorio['linhas_por_segundo']} linhas/s, "
+              f"{'LOAD DATA' if relatorio['load_data'] else 'executemany'})")
+    except Exception as e:
+        print(f"❌ Erro: {e}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
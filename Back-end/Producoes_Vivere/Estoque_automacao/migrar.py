@@ -0,0 +1,123 @@
+import argparse
+import os
+import re
+
+from servicos.conexao import obter_pool
+
+# Migrações versionadas do banco vivere_estoque.
+# Cada arquivo data/migracoes/V<numero>__<descricao>.sql é aplicado uma única vez,
+# em ordem, e registrado na tabela schema_migracoes.
+#
+# Uso:
+#   python migrar.py            -> aplica as pendentes
+#   python migrar.py --status   -> só lista aplicadas/pendentes
+
+PASTA_MIGRACOES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "migracoes")
+PADRAO_ARQUIVO = re.compile(r"^V(\d+)__(.+)\.sql$")
+
+
+def listar_migracoes():
+    migracoes = []
+    for nome in os.listdir(PASTA_MIGRACOES):
+        m = PADRAO_ARQUIVO.match(nome)
+        if m:
+            migracoes.append((int(m.group(1)), nome))
+    return sorted(migracoes)
+
+
+def separar_instrucoes(sql):
+    # Remove comentários de linha e separa por ';' no fim da linha
+    linhas = [l for l in sql.splitlines() if not l.strip().startswith("--")]
+    instrucoes = re.split(r";\s*(?:\n|$)", "\n".join(linhas))
+    return [i.strip() for i in instrucoes if i.strip()]
+
+
+# Duplicadas que o DELETE do V001 não resolve (mesmo material e categoria, mas
+# quantidade ou observações diferentes): a chave única falharia
+SQL_DUPLICADOS_INVENTARIO = """
+    SELECT material, categoria, GROUP_CONCAT(id ORDER BY id), GROUP_CONCAT(quantidade ORDER BY id)
+    FROM inventario
+    WHERE categoria IS NOT NULL
+    GROUP BY material, categoria
+    HAVING COUNT(DISTINCT quantidade, COALESCE(observacoes, '')) > 1
+"""
+
+
+class MigracaoRecusadaError(Exception):
+    pass
+
+
+def verificar_duplicados_inventario(cursor):
+    cursor.execute(SQL_DUPLICADOS_INVENTARIO)
+    rows = cursor.fetchall()
+    if rows:
+        linhas = "\n".join(f"  {material} / {categoria}: ids {ids}, quantidades {quantidades}"
+                           for material, categoria, ids, quantidades in rows)
+        raise MigracaoRecusadaError(
+            "inventario tem material repetido na mesma categoria com quantidades ou observações diferentes; "
+            "apague ou some as linhas abaixo e rode de novo:\n" + linhas
+        )
+
+
+# Conferências feitas antes de aplicar uma versão (sem alterar nada)
+VERIFICACOES = {1: verificar_duplicados_inventario}
+
+
+def garantir_tabela_controle(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migracoes (
+            versao INT PRIMARY KEY,
+            arquivo VARCHAR(255) NOT NULL,
+            aplicada_em DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def versoes_aplicadas(cursor):
+    cursor.execute("SELECT versao FROM schema_migracoes")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def migrar(somente_status=False):
+    with obter_pool().conexao() as conn:
+        cursor = conn.cursor()
+        try:
+            garantir_tabela_controle(cursor)
+            aplicadas = versoes_aplicadas(cursor)
+
+            for versao, arquivo in listar_migracoes():
+                if versao in aplicadas:
+                    print(f"✔ V{versao:03d} {arquivo}")
+                    continue
+                if somente_status:
+                    print(f"… V{versao:03d} {arquivo} (pendente)")
+                    continue
+
+                if versao in VERIFICACOES:
+                    VERIFICACOES[versao](cursor)
+                with open(os.path.join(PASTA_MIGRACOES, arquivo), encoding="utf-8") as f:
+                    instrucoes = separar_instrucoes(f.read())
+
+                # DDL no MySQL faz commit implícito; se uma instrução falhar a
+                # versão não é registrada e a migração para ali.
+                for instrucao in instrucoes:
+                    cursor.execute(instrucao)
+                cursor.execute(
+                    "INSERT INTO schema_migracoes (versao, arquivo) VALUES (%s, %s)",
+                    (versao, arquivo)
+                )
+                conn.commit()
+                print(f"✅ V{versao:03d} {arquivo} aplicada ({len(instrucoes)} instruções)")
+        finally:
+            cursor.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aplica as migrações do banco vivere_estoque")
+    parser.add_argument("--status", action="store_true", help="apenas lista as migrações")
+    args = parser.parse_args()
+    try:
+        migrar(somente_status=args.status)
+    except Exception as e:
+        print(f"❌ Erro: {e}")
+        raise SystemExit(1)
@@ -1,6 +1,20 @@
 import mysql.connector
 
+SQL_BUSCAR = "SELECT id, nome, quantidade, id_categoria, observacoes FROM materiais WHERE id = %s"
+SQL_BUSCAR_IDS = "SELECT id, nome, quantidade, id_categoria, observacoes FROM materiais WHERE id IN ({})"
+# Um comando só, com ou sem a linha no banco (antes: SELECT COUNT(*) + INSERT/UPDATE)
+SQL_SALVAR = (
+    "INSERT INTO materiais (id, nome, quantidade, id_categoria, observacoes) VALUES (%s, %s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE nome = VALUES(nome), quantidade = VALUES(quantidade), "
+    "id_categoria = VALUES(id_categoria), observacoes = VALUES(observacoes)"
+)
+# Novos sem id: INSERT simples, ids consecutivos do AUTO_INCREMENT
+SQL_INSERIR = "INSERT INTO materiais (nome, quantidade, id_categoria, observacoes) VALUES (%s, %s, %s, %s)"
+
 class Equipamento:
+    # __slots__: sem __dict__ por instância (inventário inteiro em memória)
+    __slots__ = ("id", "nome", "quantidade", "id_categoria", "observacoes")
+
     def __init__(self, id, nome, quantidade, id_categoria=None, observacoes=None):
         self.id = id
         self.nome = nome
@@ -48,11 +62,18 @@ class Equipamento:
             observacoes=row[4]
         )
 
+    @staticmethod
+    def from_db_rows(rows):
+        return [Equipamento(r[0], r[1], r[2], r[3], r[4]) for r in rows]
+
+    def linha(self):
+        # Parâmetros do SQL_SALVAR
+        return (self.id, self.nome, self.quantidade, self.id_categoria, self.observacoes)
+
     @staticmethod
     def buscar_por_id(conn, id_equipamento):
         cursor = conn.cursor()
-        query = "SELECT id, nome, quantidade, id_categoria, observacoes FROM materiais WHERE id = %s"
-        cursor.execute(query, (id_equipamento,))
+        cursor.execute(SQL_BUSCAR, (id_equipamento,))
         row = cursor.fetchone()
         cursor.close()
         if row:
@@ -61,21 +82,8 @@ class Equipamento:
             raise ValueError("Equipamento não encontrado no banco.")
 
     def salvar_no_banco(self, conn):
+        # Para muitos equipamentos, use modelos.repositorio.UnidadeTrabalho (um lote e um commit)
         cursor = conn.cursor()
-        # Verifica se equipamento já existe
-        cursor.execute("SELECT COUNT(*) FROM materiais WHERE id = %s", (self.id,))
-        (count,) = cursor.fetchone()
-        if count == 0:
-            # Inserir novo equipamento
-            cursor.execute("""
-                INSERT INTO materiais (id, nome, quantidade, id_categoria, observacoes)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (self.id, self.nome, self.quantidade, self.id_categoria, self.observacoes))
-        else:
-            # Atualizar equipamento existente
-            cursor.execute("""
-                UPDATE materiais SET nome=%s, quantidade=%s, id_categoria=%s, observacoes=%s
-                WHERE id=%s
-            """, (self.nome, self.quantidade, self.id_categoria, self.observacoes, self.id))
+        cursor.execute(SQL_SALVAR, self.linha())
         conn.commit()
         cursor.close()
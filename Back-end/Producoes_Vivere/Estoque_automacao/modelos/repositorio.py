@@ -0,0 +1,149 @@
+from modelos.equipamentos import Equipamento, SQL_BUSCAR_IDS, SQL_SALVAR, SQL_INSERIR
+from servicos.movimentacao import validar_movimento, inserir_movimentos, agora
+from servicos.mudancas import Mudancas, ids_inseridos
+from servicos.escritas import notificar_escrita
+from servicos import resumo
+from servicos.analise import SQL_CATEGORIAS_DOS_MATERIAIS, mapear_categorias
+
+# Unidade de trabalho sobre os modelos: em vez de salvar_no_banco objeto a
+# objeto (cada um com seu commit), junta tudo e grava numa transação só.
+#
+#   uow = UnidadeTrabalho(conn)
+#   equipamentos = uow.buscar_por_ids([1, 2, 3])     # um SELECT ... IN por lote
+#   equipamentos[1].adicionar_quantidade(5)          # só os alterados vão para o banco
+#   uow.adicionar(Equipamento(None, "Cubo Q30", 12))  # novo: id vem do AUTO_INCREMENT
+#   uow.adicionar_movimento(Movimento("Cubo Q30", "entrada", 12))
+#   uow.salvar()                                      # executemany + um commit
+#
+# Mapa de identidade: o mesmo id devolve sempre o mesmo objeto, e uma segunda
+# busca não vai ao banco. As alterações são detectadas comparando com o que
+# foi lido (ou gravado por último), então não é preciso marcar nada.
+#
+# Movimentos entram só no histórico, como Movimento.salvar_no_banco: o saldo do
+# inventário continua sendo com EstoqueService.registrar_movimento(s_lote). Nos
+# rollups de análise a categoria sai como no backfill: a do inventário quando o
+# nome está em uma só, '' nos outros casos.
+
+TAMANHO_LOTE = 1000  # ids por SELECT ... IN e linhas por INSERT
+
+
+def _estado(equipamento):
+    return (equipamento.nome, equipamento.quantidade, equipamento.id_categoria, equipamento.observacoes)
+
+
+def _lotes(linhas, tamanho):
+    for i in range(0, len(linhas), tamanho):
+        yield linhas[i:i + tamanho]
+
+
+class UnidadeTrabalho:
+    def __init__(self, conn, tamanho_lote=TAMANHO_LOTE):
+        self.conn = conn
+        self.tamanho_lote = tamanho_lote
+        self._mapa = {}        # id -> Equipamento
+        self._originais = {}   # id -> estado lido/gravado (ausente: ainda não está no banco)
+        self._sem_id = []      # novos sem id
+        self._movimentos = []
+
+    def buscar_por_id(self, id_equipamento):
+        encontrados = self.buscar_por_ids([id_equipamento])
+        if id_equipamento not in encontrados:
+            raise ValueError("Equipamento não encontrado no banco.")
+        return encontrados[id_equipamento]
+
+    def buscar_por_ids(self, ids):
+        # {id: Equipamento}; ids que não existem ficam de fora
+        ids = list(dict.fromkeys(ids))
+        faltando = [i for i in ids if i not in self._mapa]
+        if faltando:
+            cursor = self.conn.cursor()
+            try:
+                for lote in _lotes(faltando, self.tamanho_lote):
+                    cursor.execute(SQL_BUSCAR_IDS.format(", ".join(["%s"] * len(lote))), lote)
+                    for equipamento in Equipamento.from_db_rows(cursor.fetchall()):
+                        # A leitura não pode sobrescrever um objeto já mapeado (pode ter alterações)
+                        if equipamento.id not in self._mapa:
+                            self._mapa[equipamento.id] = equipamento
+                            self._originais[equipamento.id] = _estado(equipamento)
+            finally:
+                cursor.close()
+        return {i: self._mapa[i] for i in ids if i in self._mapa}
+
+    def adicionar(self, equipamento):
+        # Equipamento criado fora da unidade: sempre gravado no próximo salvar()
+        if equipamento.id is None:
+            if not any(e is equipamento for e in self._sem_id):
+                self._sem_id.append(equipamento)
+            return equipamento
+        atual = self._mapa.get(equipamento.id)
+        if atual is not None and atual is not equipamento:
+            raise ValueError(f"Já existe outro objeto para o equipamento {equipamento.id} nesta unidade.")
+        self._mapa[equipamento.id] = equipamento
+        return equipamento
+
+    def adicionar_movimento(self, movimento):
+        validar_movimento(movimento.tipo, movimento.quantidade)
+        self._movimentos.append(movimento)
+        return movimento
+
+    def _sujos(self):
+        return [e for i, e in self._mapa.items() if _estado(e) != self._originais.get(i)]
+
+    def alterados(self):
+        # O que o próximo salvar() vai gravar
+        return self._sujos() + self._sem_id
+
+    def _categorias_analise(self, cursor, materiais):
+        linhas = []
+        for lote in _lotes(sorted(materiais), self.tamanho_lote):
+            cursor.execute(SQL_CATEGORIAS_DOS_MATERIAIS.format(", ".join(["%s"] * len(lote))), lote)
+            linhas.extend(cursor.fetchall())
+        return mapear_categorias(linhas)
+
+    def salvar(self):
+        # Tudo numa transação: um INSERT ... ON DUPLICATE KEY UPDATE por lote
+        # de equipamentos alterados e um INSERT por lote de movimentos
+        alterados = self._sujos()
+        novos = list(self._sem_id)
+        movimentos = [(m.id_equipamento, m.tipo, int(m.quantidade), m.horario or agora(), None)
+                      for m in self._movimentos]
+        if not (alterados or novos or movimentos):
+            return {"equipamentos": 0, "movimentos": 0}
+
+        cursor = self.conn.cursor()
+        try:
+            for lote in _lotes(alterados, self.tamanho_lote):
+                cursor.executemany(SQL_SALVAR, [e.linha() for e in lote])
+            ids_novos = []
+            for lote in _lotes(novos, self.tamanho_lote):
+                cursor.executemany(SQL_INSERIR, [e.linha()[1:] for e in lote])
+                ids_novos.extend(ids_inseridos(cursor))
+            if movimentos:
+                deltas = resumo.DeltasResumo()
+                mudancas = Mudancas()
+                for lote in _lotes(movimentos, self.tamanho_lote):
+                    mudancas.inserir("movimentos", *inserir_movimentos(cursor, lote))
+                categorias = self._categorias_analise(cursor, {m[0] for m in movimentos})
+                for material, tipo, quantidade, horario, _ in movimentos:
+                    # Sem categorias: o movimento não altera o saldo do inventário
+                    deltas.movimento(horario, tipo, quantidade, [])
+                    deltas.analise(material, tipo, quantidade, horario, [categorias.get(material, "")])
+                deltas.gravar(cursor)
+                mudancas.gravar(cursor)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        for equipamento, id_novo in zip(novos, ids_novos):
+            equipamento.id = id_novo
+            self._mapa[id_novo] = equipamento
+        for equipamento in alterados + novos:
+            self._originais[equipamento.id] = _estado(equipamento)
+        self._sem_id = []
+        self._movimentos = []
+        if movimentos:
+            notificar_escrita("movimentos")
+        return {"equipamentos": len(alterados) + len(novos), "movimentos": len(movimentos)}
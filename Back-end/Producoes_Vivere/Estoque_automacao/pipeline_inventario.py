@@ -0,0 +1,101 @@
+import argparse
+import csv
+import os
+
+from servicos.importacao import MODOS, TAMANHO_LOTE, COLUNAS, normalizar_linha
+
+# Planilha -> banco numa passada só: lê o estoque_completo_vivere.xlsx em modo
+# read-only do openpyxl (linha a linha, sem carregar a planilha inteira),
+# normaliza e carrega o MySQL em lotes. O CSV intermediário virou opcional.
+#
+#   python pipeline_inventario.py                              -> planilha -> MySQL
+#   python pipeline_inventario.py --csv inventario_vivere.csv  -> também grava o CSV
+#   python pipeline_inventario.py --sem-banco --csv saida.csv  -> só converte (antigo inventario.py)
+
+ARQUIVO_EXCEL = "estoque_completo_vivere.xlsx"
+
+
+def ler_planilha(caminho, tamanho_lote=TAMANHO_LOTE, aba=None):
+    # Gera lotes de tuplas (categoria, material, quantidade, observacoes) das colunas A:D
+    from openpyxl import load_workbook
+
+    wb = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        ws = wb[aba] if aba else wb.active
+        lote = []
+        # min_row=2: a primeira linha é o cabeçalho
+        for row in ws.iter_rows(min_row=2, max_col=4, values_only=True):
+            linha = normalizar_linha(*(tuple(row) + (None,) * (4 - len(row))))
+            if linha is None:
+                continue
+            lote.append(linha)
+            if len(lote) >= tamanho_lote:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
+    finally:
+        wb.close()
+
+
+def gravando_csv(lotes, caminho):
+    # Repassa os lotes adiante e grava cada um no CSV pelo caminho
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(COLUNAS)
+        for lote in lotes:
+            escritor.writerows(lote)
+            yield lote
+
+
+def executar_pipeline(arquivo=ARQUIVO_EXCEL, csv_saida=None, carregar=True, modo="substituir",
+                      tamanho_lote=TAMANHO_LOTE, usar_load_data=None, aba=None):
+    lotes = ler_planilha(arquivo, tamanho_lote, aba)
+    if csv_saida:
+        lotes = gravando_csv(lotes, csv_saida)
+
+    if carregar:
+        from servicos.importacao import importar_linhas
+        return importar_linhas(lotes, modo=modo, tamanho_lote=tamanho_lote, usar_load_data=usar_load_data)
+
+    total = 0
+    for lote in lotes:
+        total += len(lote)
+    return {"linhas": total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Planilha de estoque -> MySQL em uma passada")
+    parser.add_argument("arquivo", nargs="?", default=ARQUIVO_EXCEL)
+    parser.add_argument("--aba", help="nome da aba (padrão: a ativa)")
+    parser.add_argument("--csv", dest="csv_saida", help="também grava o CSV normalizado neste caminho")
+    parser.add_argument("--sem-banco", action="store_true", help="não carrega o MySQL")
+    parser.add_argument("--modo", choices=MODOS, default="substituir")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE)
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--load-data", dest="load_data", action="store_true", default=None)
+    grupo.add_argument("--sem-load-data", dest="load_data", action="store_false")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.arquivo):
+        print(f"❌ Arquivo {args.arquivo} não encontrado na pasta atual!")
+        raise SystemExit(1)
+
+    try:
+        relatorio = executar_pipeline(args.arquivo, args.csv_saida, not args.sem_banco, args.modo,
+                                      args.lote, args.load_data, args.aba)
+    except Exception as e:
+        print(f"❌ Erro: {e}")
+        raise SystemExit(1)
+
+    if args.csv_saida:
+        print(f"✅ Arquivo {args.csv_saida} criado.")
+    if args.sem_banco:
+        print(f"✅ {relatorio['linhas']} linhas normalizadas.")
+    else:
+        print(f"✅ Inventário carregado ({relatorio['modo']}): {relatorio['linhas']} linhas em "
+              f"{relatorio['segundos']}s ({relatorio['linhas_por_segundo']} linhas/s)")
+
+
+if __name__ == "__main__":
+    main()
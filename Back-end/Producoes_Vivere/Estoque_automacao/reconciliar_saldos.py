@@ -0,0 +1,51 @@
+import argparse
+
+from tabulate import tabulate
+
+from servicos.conexao import obter_pool
+from servicos.saldos import reconciliar
+
+# Confere saldos_deposito contra o histórico (alocações, transferências e
+# movimentos com depósito) e, com --corrigir, regrava os saldos divergentes.
+#
+# Uso:
+#   python reconciliar_saldos.py              -> só relata (sai com 1 se houver divergência)
+#   python reconciliar_saldos.py --corrigir   -> relata e corrige numa transação
+
+
+def executar(corrigir=False):
+    with obter_pool().conexao() as conn:
+        cursor = conn.cursor()
+        try:
+            divergencias = reconciliar(cursor, corrigir=corrigir)
+            if corrigir:
+                conn.commit()
+            else:
+                conn.rollback()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    if not divergencias:
+        print("✅ Saldos por depósito batem com o histórico.")
+        return divergencias
+    print(tabulate(
+        [[d["deposito"], d["material"], d["registrado"], d["esperado"], d["diferenca"]] for d in divergencias],
+        headers=["Depósito", "Material", "Registrado", "Esperado", "Diferença"], tablefmt="github",
+    ))
+    print(f"\n{len(divergencias)} saldo(s) {'corrigido(s)' if corrigir else 'divergente(s)'}.")
+    return divergencias
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcilia saldos_deposito com o histórico")
+    parser.add_argument("--corrigir", action="store_true", help="regrava os saldos divergentes")
+    args = parser.parse_args()
+    try:
+        divergencias = executar(corrigir=args.corrigir)
+    except Exception as e:
+        print(f"❌ Erro: {e}")
+        raise SystemExit(1)
+    raise SystemExit(1 if divergencias and not args.corrigir else 0)
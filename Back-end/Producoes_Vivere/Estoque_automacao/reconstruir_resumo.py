@@ -0,0 +1,54 @@
+import argparse
+
+from tabulate import tabulate
+
+from servicos.conexao import obter_pool
+from servicos.resumo import reconstruir, verificar
+
+# Refaz as tabelas de resumo (V007) a partir de inventario e movimentos, para
+# corrigir desvios (escrita feita por fora do EstoqueService/app.py, restauração
+# de backup...). Os rollups de análise (V008) são refeitos pelo
+# backfill_analise.py --hoje.
+#
+# Uso:
+#   python reconstruir_resumo.py              -> mostra as divergências e reconstrói
+#   python reconstruir_resumo.py --verificar  -> só mostra (sai com 1 se houver divergência)
+
+
+def executar(somente_verificar=False):
+    with obter_pool().conexao() as conn:
+        cursor = conn.cursor()
+        try:
+            divergencias = verificar(cursor)
+            if somente_verificar:
+                conn.rollback()
+            else:
+                reconstruir(cursor)
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    if divergencias:
+        print(tabulate(
+            [[d["tabela"], d["chave"], d["gravado"], d["esperado"]] for d in divergencias],
+            headers=["Tabela", "Chave", "Gravado", "Esperado"], tablefmt="github",
+        ))
+        print(f"\n{len(divergencias)} divergência(s){'' if somente_verificar else ' corrigida(s)'}.")
+    else:
+        print("✅ Resumo bate com inventario e movimentos.")
+    return divergencias
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstrói as tabelas de resumo do estoque")
+    parser.add_argument("--verificar", action="store_true", help="só compara, sem regravar")
+    args = parser.parse_args()
+    try:
+        divergencias = executar(somente_verificar=args.verificar)
+    except Exception as e:
+        print(f"❌ Erro: {e}")
+        raise SystemExit(1)
+    raise SystemExit(1 if divergencias and args.verificar else 0)
@@ -0,0 +1,54 @@
+import argparse
+import os
+
+from servicos.diario import DIARIO_CONFIG, Diario, ReprodutorDiario, SlotOcupadoError, nome_slot
+
+# Aplica no banco o que sobrou nos diários locais de movimentos (VIVERE_DIARIO=1)
+# sem processo dono: worker que saiu e não voltou, servidor desligado com o
+# MySQL fora do ar. Slots travados por um processo vivo são pulados (o
+# reprodutor dele já cuida). Seguro de rodar a qualquer hora: o seq aplicado
+# fica no banco (diario_aplicado) e nada é aplicado duas vezes.
+#
+# O seq aplicado de cada slot fica sob "<nome>/<slot>" (VIVERE_DIARIO_NOME).
+# Pasta que sobrou de um deploy antigo (a antiga data/diario dentro do código):
+# esvazie com outro --nome, para não misturar com os slots da pasta atual; a
+# marca gravada pelo caminho da pasta é aproveitada na primeira rodada.
+#
+# Uso:
+#   python reproduzir_diario.py                       -> pasta de VIVERE_DIARIO_PASTA
+#   python reproduzir_diario.py --pasta /var/lib/vivere/diario
+#   python reproduzir_diario.py --pasta <código antigo>/data/diario --nome antigo
+
+
+def executar(pasta, nome, lote):
+    slots = sorted(n for n in os.listdir(pasta) if os.path.isdir(os.path.join(pasta, n))) if os.path.isdir(pasta) else []
+    if not slots:
+        print(f"✅ Nenhum diário em {pasta}.")
+        return
+    for slot in slots:
+        try:
+            diario = Diario(os.path.join(pasta, slot), nome_slot(nome, slot), fsync=DIARIO_CONFIG['fsync']).abrir()
+        except SlotOcupadoError:
+            print(f"- slot {slot}: em uso por outro processo")
+            continue
+        try:
+            reprodutor = ReprodutorDiario(diario, lote=lote)
+            aplicado = reprodutor.reproduzir()
+            e = reprodutor.estatisticas()
+            print(f"✅ slot {slot}: aplicado até o seq {aplicado} "
+                  f"({e['aplicados']} movimento(s), {e['recusados']} recusado(s), {e['lotes']} lote(s))")
+        finally:
+            diario.fechar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aplica os diários locais de movimentos sem dono")
+    parser.add_argument("--pasta", default=DIARIO_CONFIG['pasta'], required=not DIARIO_CONFIG['pasta'])
+    parser.add_argument("--nome", default=DIARIO_CONFIG['nome'], help="prefixo do seq aplicado no banco")
+    parser.add_argument("--lote", type=int, default=DIARIO_CONFIG['lote'])
+    args = parser.parse_args()
+    try:
+        executar(args.pasta, args.nome, args.lote)
+    except Exception as e:
+        print(f"❌ Erro: {e}")
+        raise SystemExit(1)
@@ -0,0 +1,95 @@
+import os
+import queue
+import time
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from servicos.conexao import get_db_connection
+from servicos.alertas import (monitor_estoque, formatar_sse, LimiteAssinantesError,
+                              SQL_SALVAR_LIMITE, SQL_REMOVER_LIMITE)
+from rotas.comum import consultar_todos, auditar
+
+alertas_bp = Blueprint('alertas', __name__)
+
+# Segundos de cada conexão SSE; ao fim o EventSource reconecta sozinho (retry)
+DURACAO_SSE = float(os.environ.get('VIVERE_SSE_DURACAO', 300))
+
+# --------------------- ALERTAS DE ESTOQUE BAIXO ---------------------
+
+# Materiais abaixo do mínimo, da menor folga (quantidade - mínimo) para a maior.
+# ?margem=5 inclui também quem está a menos de 5 unidades do limite.
+@alertas_bp.route('/api/alertas/estoque-baixo', methods=['GET'])
+def estoque_baixo():
+    try:
+        margem = int(request.args.get('margem', 0))
+    except ValueError:
+        return jsonify({'error': 'margem deve ser um número inteiro.'}), 400
+    try:
+        return jsonify(monitor_estoque.abaixo_do_limite(margem, request.args.get('categoria')))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Server-Sent Events: "abaixo_do_limite" quando uma saída cruza o mínimo e
+# "reposto" quando o saldo volta; comentário a cada 15s mantém a conexão viva.
+# Cada conexão ocupa uma thread do worker: no máximo VIVERE_SSE_MAX por processo
+# (503 para as demais) e cada uma fecha depois de VIVERE_SSE_DURACAO segundos,
+# para a vaga circular entre os painéis.
+@alertas_bp.route('/api/alertas/estoque-baixo/stream', methods=['GET'])
+def estoque_baixo_stream():
+    try:
+        fila = monitor_estoque.assinar()
+    except LimiteAssinantesError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '30'}
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    def gerar():
+        fim = time.monotonic() + DURACAO_SSE
+        try:
+            yield "retry: 5000\n\n"
+            while time.monotonic() < fim:
+                try:
+                    yield formatar_sse(fila.get(timeout=max(0.1, min(15, fim - time.monotonic()))))
+                except queue.Empty:
+                    yield ": ping\n\n"
+        finally:
+            monitor_estoque.cancelar(fila)
+
+    return Response(stream_with_context(gerar()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@alertas_bp.route('/api/alertas/limites', methods=['GET', 'PUT'])
+def limites_estoque():
+    if request.method == 'GET':
+        try:
+            return jsonify(consultar_todos("SELECT categoria, material, minimo FROM limites_estoque "
+                                           "ORDER BY categoria, material"))
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    # PUT {"material": "...", "categoria": "...", "minimo": 5}; minimo null remove o limite
+    dados = request.get_json() or {}
+    material = (dados.get('material') or '').strip()
+    categoria = (dados.get('categoria') or '').strip()
+    minimo = dados.get('minimo')
+    if not (material or categoria):
+        return jsonify({'error': 'Informe material e/ou categoria.'}), 400
+    if minimo is not None and not (isinstance(minimo, int) and minimo >= 0):
+        return jsonify({'error': 'minimo deve ser um inteiro >= 0 (ou null para remover).'}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if minimo is None:
+            cursor.execute(SQL_REMOVER_LIMITE, (categoria, material))
+        else:
+            cursor.execute(SQL_SALVAR_LIMITE, (categoria, material, minimo))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return jsonify({'error': str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+    monitor_estoque.definir_limite(minimo, material, categoria)
+    auditar("limite", f"Mínimo de {material or '*'} ({categoria or '*'}): {minimo}")
+    return jsonify({'material': material, 'categoria': categoria, 'minimo': minimo}), 200
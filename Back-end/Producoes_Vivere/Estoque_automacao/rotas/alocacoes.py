@@ -0,0 +1,199 @@
+from flask import Blueprint, jsonify, request
+from servicos.conexao import get_db_connection
+from servicos.paginacao import pedido_paginado
+from servicos.escritas import notificar_escrita
+from servicos.alocacao import alocar, AlocacaoInvalidaError, CapacidadeInsuficienteError, POLITICA_PADRAO
+from servicos.saldos import aplicar_deltas, SaldoDepositoInsuficienteError
+from servicos.mudancas import Mudancas
+from rotas.comum import responder_paginado, auditar
+
+alocacoes_bp = Blueprint('alocacoes', __name__)
+
+# --------------------- NOVA ROTA: ALOCAÇÕES POR DEPÓSITO ---------------------
+
+COLUNAS_ALOCACOES_DEPOSITO = {
+    'material': 'material', 'quantidade': 'quantidade',
+    'data_alocacao': 'data_alocacao', 'observacao': 'observacao',
+}
+
+@alocacoes_bp.route('/api/alocacoes/deposito/<int:deposito_id>', methods=['GET'])
+def alocacoes_por_deposito(deposito_id):
+    if pedido_paginado(request.args):
+        return responder_paginado("alocacoes", COLUNAS_ALOCACOES_DEPOSITO, ["data_alocacao", "id"],
+                                  ordem="DESC", filtros=["deposito = %s"], parametros=[deposito_id],
+                                  coluna_tempo="data_alocacao")
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("""
+            SELECT material, quantidade, data_alocacao, observacao
+            FROM alocacoes
+            WHERE deposito = %s
+            ORDER BY data_alocacao DESC
+        """, (deposito_id,))
+        alocacoes = cursor.fetchall()
+        cursor.close()
+        conn.close()
+        return jsonify(alocacoes)
+    except Exception as e:
+        cursor.close()
+        conn.close()
+        return jsonify({'error': str(e)}), 500
+
+# --------------------- ALOCAÇÕES ---------------------
+
+MAX_ITENS_ALOCACAO = 500
+
+COLUNAS_ALOCACOES = {
+    'id': 'a.id', 'material': 'a.material', 'deposito': 'd.nome', 'quantidade': 'a.quantidade',
+    'data_alocacao': 'a.data_alocacao', 'observacao': 'a.observacao',
+}
+
+@alocacoes_bp.route('/api/alocacoes', methods=['GET', 'POST'])
+def alocacoes():
+    if request.method == 'GET' and pedido_paginado(request.args):
+        return responder_paginado("alocacoes a JOIN depositos d ON a.deposito = d.id", COLUNAS_ALOCACOES,
+                                  ["a.data_alocacao", "a.id"], ordem="DESC", coluna_tempo="a.data_alocacao")
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    if request.method == 'GET':
+        cursor.execute("""
+            SELECT a.id, a.material, d.nome AS deposito, a.quantidade, a.data_alocacao, a.observacao
+            FROM alocacoes a
+            JOIN depositos d ON a.deposito = d.id
+            ORDER BY a.data_alocacao DESC
+        """)
+        alocacoes = cursor.fetchall()
+        cursor.close()
+        conn.close()
+        return jsonify(alocacoes)
+
+    elif request.method == 'POST':
+        # Um material ({material, quantidade, observacao}) ou lote ({itens: [...]}),
+        # com politica (pesos|estoque|capacidade|distancia), depositos ([ids]) e pesos ({id: peso}) opcionais
+        dados = request.get_json() or {}
+        lote = 'itens' in dados
+        itens = dados.get('itens') if lote else [dados]
+        depositos_escolhidos = dados.get('depositos')
+        if depositos_escolhidos is None and dados.get('depositoId'):
+            depositos_escolhidos = [dados.get('depositoId')]
+        pesos = dados.get('pesos')
+
+        if not (isinstance(itens, list) and itens and len(itens) <= MAX_ITENS_ALOCACAO
+                and all(isinstance(i, dict) and i.get('material') and isinstance(i.get('quantidade'), int)
+                        and i['quantidade'] > 0 for i in itens)):
+            cursor.close()
+            conn.close()
+            return jsonify({'error': 'Dados inválidos'}), 400
+        if pesos is not None:
+            try:
+                pesos = {int(k): v for k, v in pesos.items()}
+            except (AttributeError, TypeError, ValueError):
+                cursor.close()
+                conn.close()
+                return jsonify({'error': 'pesos deve ser um objeto {id_deposito: peso}'}), 400
+
+        try:
+            mudancas = Mudancas()
+            resumo = alocar(cursor, itens, dados.get('politica'), depositos_escolhidos, pesos, mudancas)
+            mudancas.gravar(cursor)
+            conn.commit()
+        except CapacidadeInsuficienteError as e:
+            conn.rollback()
+            return jsonify({'error': str(e)}), 409
+        except AlocacaoInvalidaError as e:
+            conn.rollback()
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            conn.rollback()
+            return jsonify({'error': str(e)}), 500
+        finally:
+            cursor.close()
+            conn.close()
+
+        notificar_escrita(("alocacoes", "saldos_deposito"))
+        politica = dados.get('politica') or POLITICA_PADRAO
+        auditar("alocar", "; ".join(f"{r['quantidade_total']} x {r['material']}" for r in resumo)
+                + f" (política {politica})")
+        if lote:
+            return jsonify({"message": "Alocações divididas entre os depósitos com sucesso.",
+                            "politica": politica, "itens": resumo}), 201
+        return jsonify({
+            "message": "Alocação dividida entre os depósitos com sucesso.",
+            "material": resumo[0]["material"],
+            "quantidade_total": resumo[0]["quantidade_total"],
+            "politica": politica,
+            "divisao": {d["deposito"]: d["quantidade"] for d in resumo[0]["divisao"]},
+        }), 201
+
+
+@alocacoes_bp.route('/api/alocacoes/<int:alocacao_id>', methods=['PUT'])
+def atualizar_alocacao(alocacao_id):
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    dados = request.get_json()
+
+    novo_deposito = dados.get('deposito')
+    nova_quantidade = dados.get('quantidade')
+    nova_obs = dados.get('observacao', '')
+
+    try:
+        novo_deposito = int(novo_deposito)
+    except (TypeError, ValueError):
+        novo_deposito = None
+    if not (novo_deposito and isinstance(nova_quantidade, int) and nova_quantidade > 0):
+        cursor.close()
+        conn.close()
+        return jsonify({'error': 'Dados inválidos'}), 400
+
+    try:
+        cursor.execute("SELECT * FROM alocacoes WHERE id = %s FOR UPDATE", (alocacao_id,))
+        existente = cursor.fetchone()
+
+        if not existente:
+            cursor.close()
+            conn.close()
+            return jsonify({'error': 'Alocação não encontrada'}), 404
+
+        cursor.execute("""
+            UPDATE alocacoes SET deposito=%s, quantidade=%s, observacao=%s
+            WHERE id=%s
+        """, (novo_deposito, nova_quantidade, nova_obs, alocacao_id))
+
+        # O saldo acompanha: sai do depósito antigo o que foi alocado, entra o novo valor
+        material = existente["material"]
+        deltas = {(int(existente["deposito"]), material): -existente["quantidade"]}
+        deltas[(novo_deposito, material)] = deltas.get((novo_deposito, material), 0) + nova_quantidade
+        aplicar_deltas(cursor, deltas)
+        mudancas = Mudancas()
+        mudancas.atualizar("alocacoes", alocacao_id)
+        mudancas.gravar(cursor)
+
+        conn.commit()
+        cursor.close()
+        conn.close()
+        notificar_escrita(("alocacoes", "saldos_deposito"))
+        auditar("atualizar", f"Alocação {alocacao_id}: {nova_quantidade} x {material} no depósito {novo_deposito}")
+
+        return jsonify({
+            "message": "Alocação atualizada com sucesso",
+            "id": alocacao_id,
+            "material": existente["material"],
+            "novo_deposito": novo_deposito,
+            "quantidade": nova_quantidade,
+            "observacao": nova_obs
+        }), 200
+
+    except SaldoDepositoInsuficienteError as e:
+        conn.rollback()
+        cursor.close()
+        conn.close()
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        conn.rollback()
+        cursor.close()
+        conn.close()
+        return jsonify({'error': str(e)}), 500
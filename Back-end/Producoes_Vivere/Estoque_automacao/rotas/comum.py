@@ -0,0 +1,41 @@
+from flask import jsonify, request
+from servicos.conexao import get_db_connection
+from servicos.paginacao import ler_paginacao, paginar, ParametrosInvalidosError
+from servicos.auditoria import auditoria
+
+# Ajudantes compartilhados pelos blueprints de rotas/
+
+# Listas paginadas: com ?limit=, ?after=, ?desde=, ?ate= ou ?campos= a rota
+# devolve {"itens", "proximo_cursor", "limite"}; sem eles mantém a lista completa.
+def responder_paginado(origem, colunas, chave, ordem="ASC", filtros=None, parametros=None, coluna_tempo=None):
+    try:
+        pagina = ler_paginacao(request.args, colunas)
+    except ParametrosInvalidosError as e:
+        return jsonify({'error': str(e)}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        return jsonify(paginar(cursor, origem, colunas, chave, pagina, ordem=ordem, filtros=filtros,
+                               parametros=parametros, coluna_tempo=coluna_tempo))
+    except ParametrosInvalidosError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+def consultar_todos(sql, params=()):
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+def auditar(acao, descricao):
+    # Depois do commit: só enfileira a entrada da tabela logs (servicos/auditoria.py)
+    auditoria.registrar(acao, descricao, rota=f"{request.method} {request.path}")
@@ -0,0 +1,192 @@
+from flask import Blueprint, jsonify, request
+from servicos.conexao import get_db_connection
+from servicos.paginacao import pedido_paginado
+from servicos.escritas import notificar_escrita
+from servicos.condicional import resposta_condicional
+from servicos.mudancas import Mudancas
+from servicos.saldos import (transferir, saldos_do_deposito, total_do_deposito, totais,
+                             TransferenciaInvalidaError, SaldoDepositoInsuficienteError)
+from rotas.comum import responder_paginado, consultar_todos, auditar
+
+depositos_bp = Blueprint('depositos', __name__)
+
+# --------------------- DEPÓSITOS ---------------------
+
+@depositos_bp.route('/api/depositos', methods=['GET', 'POST'])
+def depositos():
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    if request.method == 'GET':
+        cursor.execute("SELECT COUNT(*) AS total FROM depositos")
+        total = cursor.fetchone()['total']
+        if total == 0:
+            exemplos = [
+                ("Depósito Maricá Centro", "Rua Projetada, Centro - Maricá"),
+                ("Depósito Maricá Itaipuaçu", "Av. Um, Itaipuaçu - Maricá")
+            ]
+            for nome, endereco in exemplos:
+                cursor.execute("INSERT INTO depositos (nome, endereco) VALUES (%s, %s)", (nome, endereco))
+            conn.commit()
+        cursor.execute("SELECT id, nome AS nome_deposito, endereco, peso, capacidade, distancia_km, ativo FROM depositos")
+        dados = cursor.fetchall()
+        cursor.close()
+        conn.close()
+        return jsonify(dados)
+
+    elif request.method == 'POST':
+        dados = request.get_json()
+        nome = dados.get('nome_deposito')
+        endereco = dados.get('endereco')
+
+        if not (nome and endereco):
+            cursor.close()
+            conn.close()
+            return jsonify({'error': 'Campos obrigatórios faltando'}), 400
+
+        try:
+            cursor.execute("INSERT INTO depositos (nome, endereco) VALUES (%s, %s)", (nome, endereco))
+            conn.commit()
+            novo_id = cursor.lastrowid
+            cursor.close()
+            conn.close()
+            auditar("criar", f"Depósito {novo_id} ({nome}) criado")
+            return jsonify({'id': novo_id, 'nome_deposito': nome, 'endereco': endereco}), 201
+        except Exception as e:
+            cursor.close()
+            conn.close()
+            return jsonify({'error': str(e)}), 500
+
+CAMPOS_DIVISAO_DEPOSITO = ('peso', 'capacidade', 'distancia_km', 'ativo')
+
+@depositos_bp.route('/api/depositos/<int:deposito_id>', methods=['PUT'])
+def atualizar_deposito(deposito_id):
+    dados = request.get_json()
+    nome = dados.get('nome_deposito')
+    endereco = dados.get('endereco')
+
+    if not (nome and endereco):
+        return jsonify({'error': 'Campos obrigatórios faltando'}), 400
+
+    # Parâmetros da divisão das alocações (opcionais): peso, capacidade, distancia_km, ativo
+    extras = {campo: dados[campo] for campo in CAMPOS_DIVISAO_DEPOSITO if campo in dados}
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT nome FROM depositos WHERE id = %s FOR UPDATE", (deposito_id,))
+        atual = cursor.fetchone()
+        cursor.execute(
+            "UPDATE depositos SET nome=%s, endereco=%s"
+            + "".join(f", {campo}=%s" for campo in extras)
+            + " WHERE id=%s",
+            (nome, endereco, *extras.values(), deposito_id)
+        )
+        if atual and atual[0] != nome:
+            # O /api/sync devolve as alocações com o nome do depósito: as dele
+            # entram no feed para os tablets trocarem o nome sem carga completa
+            cursor.execute("SELECT id FROM alocacoes WHERE deposito = %s", (deposito_id,))
+            mudancas = Mudancas()
+            mudancas.atualizar("alocacoes", *(row[0] for row in cursor.fetchall()))
+            mudancas.gravar(cursor)
+        conn.commit()
+        cursor.close()
+        conn.close()
+        auditar("atualizar", f"Depósito {deposito_id} ({nome}) atualizado")
+        return jsonify({'id': deposito_id, 'nome_deposito': nome, 'endereco': endereco, **extras})
+    except Exception as e:
+        conn.rollback()
+        cursor.close()
+        conn.close()
+        return jsonify({'error': str(e)}), 500
+
+# Conteúdo atual de cada depósito, lido de saldos_deposito (sem somar o histórico de alocações)
+COLUNAS_SALDOS_DEPOSITO = {
+    'material': 'material', 'quantidade': 'quantidade', 'atualizado_em': 'atualizado_em',
+}
+
+def consultar_saldos(consulta, *args):
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        return consulta(cursor, *args)
+    finally:
+        cursor.close()
+        conn.close()
+
+@depositos_bp.route('/api/depositos/saldos', methods=['GET'])
+def totais_depositos():
+    # [{deposito, nome_deposito, materiais, quantidade}] de todos os depósitos
+    def gerar():
+        try:
+            return jsonify(consultar_saldos(totais))
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    return resposta_condicional(("depositos", "saldos_deposito"), gerar)
+
+@depositos_bp.route('/api/depositos/<int:deposito_id>/saldos', methods=['GET'])
+def saldos_deposito(deposito_id):
+    if pedido_paginado(request.args):
+        return responder_paginado("saldos_deposito", COLUNAS_SALDOS_DEPOSITO, ["material"],
+                                  filtros=["deposito = %s", "quantidade > 0"], parametros=[deposito_id],
+                                  coluna_tempo="atualizado_em")
+
+    def gerar():
+        try:
+            if request.args.get('total'):
+                return jsonify({'deposito': deposito_id, **consultar_saldos(total_do_deposito, deposito_id)})
+            return jsonify(consultar_saldos(saldos_do_deposito, deposito_id))
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    return resposta_condicional("saldos_deposito", gerar)
+
+# --------------------- TRANSFERÊNCIAS ---------------------
+
+COLUNAS_TRANSFERENCIAS = {
+    'id': 'id', 'material': 'material', 'origem': 'origem', 'destino': 'destino',
+    'quantidade': 'quantidade', 'horario': 'horario', 'observacao': 'observacao',
+}
+
+@depositos_bp.route('/api/transferencias', methods=['GET', 'POST'])
+def transferencias():
+    if request.method == 'GET':
+        if pedido_paginado(request.args):
+            return responder_paginado("transferencias", COLUNAS_TRANSFERENCIAS, ["horario", "id"],
+                                      ordem="DESC", coluna_tempo="horario")
+        return jsonify(consultar_todos(
+            "SELECT id, material, origem, destino, quantidade, horario, observacao "
+            "FROM transferencias ORDER BY horario DESC, id DESC"
+        ))
+
+    # {material, origem, destino, quantidade, observacao}: debita a origem e credita o destino
+    dados = request.get_json() or {}
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        transferencia_id = transferir(cursor, dados.get('material'), dados.get('origem'), dados.get('destino'),
+                                      dados.get('quantidade'), dados.get('observacao'))
+        conn.commit()
+    except TransferenciaInvalidaError as e:
+        conn.rollback()
+        return jsonify({'error': str(e)}), 400
+    except SaldoDepositoInsuficienteError as e:
+        conn.rollback()
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        conn.rollback()
+        return jsonify({'error': str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+    notificar_escrita(("transferencias", "saldos_deposito"))
+    auditar("transferir", f"Transferência {transferencia_id}: {dados['quantidade']} x {dados['material']} "
+                          f"do depósito {dados['origem']} para o {dados['destino']}")
+    return jsonify({
+        "message": "Transferência registrada com sucesso.",
+        "id": transferencia_id,
+        "material": dados['material'],
+        "origem": int(dados['origem']),
+        "destino": int(dados['destino']),
+        "quantidade": int(dados['quantidade']),
+    }), 201
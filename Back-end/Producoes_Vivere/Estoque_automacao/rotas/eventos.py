@@ -0,0 +1,256 @@
+from flask import Blueprint, jsonify, request
+from servicos.conexao import get_db_connection
+from servicos.escritas import notificar_escrita
+from servicos.disponibilidade import (motor_disponibilidade, reservar, conferir_evento, dia, ler_data,
+                                     SemDisponibilidadeError)
+from rotas.comum import consultar_todos, auditar
+
+eventos_bp = Blueprint('eventos', __name__)
+
+# --------------------- EVENTOS ---------------------
+
+@eventos_bp.route('/api/eventos', methods=['GET', 'POST'])
+def eventos():
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    if request.method == 'GET':
+        cursor.execute("SELECT COUNT(*) AS total FROM eventos")
+        total = cursor.fetchone()['total']
+        if total == 0:
+            cursor.execute("SELECT material FROM inventario LIMIT 3")
+            materiais = [row['material'] for row in cursor.fetchall()]
+            exemplos = [
+                ("Montagem Palco", "Cliente A", "Confirmado", "2025-08-01", "2025-08-05"),
+                ("Feira Exposição", "Cliente B", "Pendente", "2025-09-10", "2025-09-12"),
+                ("Show Maricá", "Cliente C", "Concluído", "2025-07-15", "2025-07-16")
+            ]
+            for i, (nome, cliente, status, inicio, fim) in enumerate(exemplos):
+                material = materiais[i % len(materiais)] if materiais else "Treliça Q30"
+                cursor.execute("""
+                    INSERT INTO eventos (nome_evento, cliente, status, data_inicio, data_fim)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, (f"{nome} com {material}", cliente, status, inicio, fim))
+            conn.commit()
+        cursor.execute("SELECT id, nome_evento, cliente, status, data_inicio, data_fim FROM eventos")
+        eventos = cursor.fetchall()
+        cursor.close()
+        conn.close()
+        return jsonify(eventos)
+
+    elif request.method == 'POST':
+        dados = request.get_json()
+        nome_evento = dados.get('nome_evento')
+        cliente = dados.get('cliente')
+        status = dados.get('status', 'Confirmado')
+        data_inicio = dados.get('data_inicio')
+        data_fim = dados.get('data_fim')
+
+        if not (nome_evento and cliente and data_inicio and data_fim):
+            cursor.close()
+            conn.close()
+            return jsonify({'error': 'Campos obrigatórios faltando'}), 400
+
+        try:
+            cursor.execute("""
+                INSERT INTO eventos (nome_evento, cliente, status, data_inicio, data_fim)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (nome_evento, cliente, status, data_inicio, data_fim))
+            conn.commit()
+            novo_id = cursor.lastrowid
+            cursor.close()
+            conn.close()
+            auditar("criar", f"Evento {novo_id} ({nome_evento}) criado")
+            return jsonify({
+                'id': novo_id,
+                'nome_evento': nome_evento,
+                'cliente': cliente,
+                'status': status,
+                'data_inicio': data_inicio,
+                'data_fim': data_fim
+            }), 201
+        except Exception as e:
+            cursor.close()
+            conn.close()
+            return jsonify({'error': str(e)}), 500
+
+@eventos_bp.route('/api/eventos/<int:evento_id>', methods=['PUT'])
+def atualizar_evento(evento_id):
+    dados = request.get_json()
+    nome_evento = dados.get('nome_evento')
+    cliente = dados.get('cliente')
+    status = dados.get('status')
+    data_inicio = dados.get('data_inicio')
+    data_fim = dados.get('data_fim')
+
+    if not (nome_evento and cliente and status and data_inicio and data_fim):
+        return jsonify({'error': 'Campos obrigatórios faltando'}), 400
+
+    try:
+        if dia(data_fim) < dia(data_inicio):
+            raise ValueError('data_fim deve ser igual ou posterior a data_inicio.')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        # Datas ou status novos podem estourar o estoque das reservas do evento:
+        # confere todas com as travas de reservar() antes de gravar
+        conferir_evento(cursor, {'id': evento_id, 'data_inicio': data_inicio,
+                                 'data_fim': data_fim, 'status': status})
+        cursor.execute("""
+            UPDATE eventos SET nome_evento=%s, cliente=%s, status=%s, data_inicio=%s, data_fim=%s
+            WHERE id=%s
+        """, (nome_evento, cliente, status, data_inicio, data_fim, evento_id))
+        conn.commit()
+    except SemDisponibilidadeError as e:
+        conn.rollback()
+        return jsonify({'error': str(e), 'disponivel': e.livre}), 409
+    except Exception as e:
+        conn.rollback()
+        return jsonify({'error': str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+    motor_disponibilidade.atualizar_evento(evento_id, data_inicio, data_fim, status)
+    auditar("atualizar", f"Evento {evento_id} ({nome_evento}) atualizado: {status}")
+    return jsonify({
+        'id': evento_id,
+        'nome_evento': nome_evento,
+        'cliente': cliente,
+        'status': status,
+        'data_inicio': data_inicio,
+        'data_fim': data_fim
+    })
+
+# --------------------- RESERVAS E DISPONIBILIDADE ---------------------
+
+@eventos_bp.route('/api/eventos/<int:evento_id>/reservas', methods=['GET', 'POST'])
+def reservas_evento(evento_id):
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT id, data_inicio, data_fim, status FROM eventos WHERE id = %s", (evento_id,))
+        evento = cursor.fetchone()
+        if not evento:
+            return jsonify({'error': 'Evento não encontrado'}), 404
+
+        if request.method == 'GET':
+            cursor.execute("""
+                SELECT id, material, categoria, quantidade FROM reservas_eventos
+                WHERE evento_id = %s ORDER BY material, categoria
+            """, (evento_id,))
+            return jsonify(cursor.fetchall())
+
+        # POST {"material", "categoria", "quantidade"}: reserva ou troca a quantidade já reservada
+        dados = request.get_json() or {}
+        material = (dados.get('material') or '').strip()
+        categoria = (dados.get('categoria') or '').strip()
+        quantidade = dados.get('quantidade')
+        if not (material and isinstance(quantidade, int) and quantidade > 0):
+            return jsonify({'error': 'Informe material e quantidade (> 0).'}), 400
+
+        try:
+            reserva_id = reservar(cursor, evento, material, categoria, quantidade)
+            conn.commit()
+        except SemDisponibilidadeError as e:
+            conn.rollback()
+            return jsonify({'error': str(e), 'disponivel': e.livre}), 409
+        except LookupError as e:
+            conn.rollback()
+            return jsonify({'error': str(e)}), 404
+        except Exception as e:
+            conn.rollback()
+            return jsonify({'error': str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+    notificar_escrita("reservas_eventos")
+    motor_disponibilidade.salvar_reserva(reserva_id, evento_id, material, categoria, quantidade,
+                                         evento['data_inicio'], evento['data_fim'], evento['status'])
+    auditar("reservar", f"Evento {evento_id}: reserva {reserva_id} de {quantidade} x {material}")
+    return jsonify({'id': reserva_id, 'evento_id': evento_id, 'material': material,
+                    'categoria': categoria, 'quantidade': quantidade}), 201
+
+@eventos_bp.route('/api/eventos/<int:evento_id>/reservas/<int:reserva_id>', methods=['DELETE'])
+def remover_reserva(evento_id, reserva_id):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM reservas_eventos WHERE id = %s AND evento_id = %s", (reserva_id, evento_id))
+        removidas = cursor.rowcount
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return jsonify({'error': str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+    if not removidas:
+        return jsonify({'error': 'Reserva não encontrada'}), 404
+    notificar_escrita("reservas_eventos")
+    motor_disponibilidade.remover_reserva(reserva_id)
+    auditar("remover", f"Evento {evento_id}: reserva {reserva_id} removida")
+    return jsonify({'message': 'Reserva removida com sucesso'}), 200
+
+def ler_periodo_reserva():
+    inicio = ler_data(request.args.get('inicio'), 'inicio')
+    fim = ler_data(request.args.get('fim') or request.args.get('inicio'), 'fim')
+    if fim < inicio:
+        raise ValueError('fim deve ser igual ou posterior a inicio.')
+    return inicio, fim
+
+SQL_ESTOQUES = "SELECT material, COALESCE(categoria, '') AS categoria, quantidade FROM inventario"
+
+def consultar_estoques(material=None, categoria=None):
+    # Filtros no WHERE: com ?material= a consulta usa o índice (material, categoria)
+    filtros, params = [], []
+    if material is not None:
+        filtros.append("material = %s")
+        params.append(material)
+    if categoria is not None:
+        filtros.append("COALESCE(categoria, '') = %s")
+        params.append(categoria)
+    sql = SQL_ESTOQUES + (" WHERE " + " AND ".join(filtros) if filtros else "")
+    linhas = consultar_todos(sql, params)
+    return {(l['material'], l['categoria']): l['quantidade'] or 0 for l in linhas}
+
+# ?inicio=2025-09-10&fim=2025-09-12[&material=...&categoria=...]: livre = estoque - maior reserva num dia do período
+@eventos_bp.route('/api/disponibilidade', methods=['GET'])
+def disponibilidade():
+    try:
+        inicio, fim = ler_periodo_reserva()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    material = request.args.get('material')
+    categoria = request.args.get('categoria')
+
+    try:
+        estoques = consultar_estoques(material, categoria)
+        itens = []
+        for (mat, cat), estoque in estoques.items():
+            reservado = motor_disponibilidade.reservado(mat, cat, inicio, fim)
+            itens.append({'material': mat, 'categoria': cat, 'estoque': estoque,
+                          'reservado': reservado, 'livre': estoque - reservado})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    if material is not None and not itens:
+        return jsonify({'error': 'Material não encontrado'}), 404
+    return jsonify(itens)
+
+# Overbooking: trechos em que eventos sobrepostos reservam mais do que há em estoque
+@eventos_bp.route('/api/disponibilidade/conflitos', methods=['GET'])
+def conflitos_disponibilidade():
+    try:
+        inicio = ler_data(request.args['inicio'], 'inicio') if request.args.get('inicio') else None
+        fim = ler_data(request.args['fim'], 'fim') if request.args.get('fim') else None
+        return jsonify(motor_disponibilidade.conflitos(consultar_estoques(), inicio, fim))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
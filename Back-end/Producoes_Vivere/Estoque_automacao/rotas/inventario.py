@@ -0,0 +1,125 @@
+from flask import Blueprint, jsonify, request
+from servicos.paginacao import pedido_paginado
+from servicos.condicional import resposta_condicional
+from servicos.busca import indice_materiais, LIMITE_PADRAO as LIMITE_BUSCA, LIMITE_MAXIMO as LIMITE_BUSCA_MAXIMO
+from servicos.estoque import obter_estoque
+from servicos.movimentacao import MaterialNaoEncontradoError
+from servicos.diario import obter_diario
+from rotas.comum import responder_paginado, auditar
+
+inventario_bp = Blueprint('inventario', __name__)
+
+# --------------------- INVENTÁRIO ---------------------
+
+def listar_inventario():
+    estoque = obter_estoque()
+    if pedido_paginado(request.args):
+        return responder_paginado("inventario", estoque.COLUNAS_INVENTARIO, estoque.CHAVE_INVENTARIO)
+    # Mesma leitura (e mesma entrada de cache) do api_async.py
+    return jsonify(estoque.obter_inventario())
+
+@inventario_bp.route('/api/inventario', methods=['GET', 'POST'])
+def inventario():
+    if request.method == 'GET':
+        return resposta_condicional("inventario", listar_inventario)
+
+    dados = request.get_json()
+    categoria = dados.get('categoria')
+    material = dados.get('material')
+    quantidade = dados.get('quantidade')
+
+    if not (categoria and material and isinstance(quantidade, int)):
+        return jsonify({"error": "Dados inválidos"}), 400
+
+    try:
+        novo_id = obter_estoque().cadastrar_material(categoria, material, quantidade)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    auditar("cadastro", f"Material {material} ({categoria}) cadastrado com {quantidade}")
+    return jsonify({
+        "id": novo_id,
+        "categoria": categoria,
+        "material": material,
+        "quantidade": quantidade
+    }), 201
+
+@inventario_bp.route('/api/categorias', methods=['GET'])
+def listar_categorias():
+    return resposta_condicional("inventario", lambda: jsonify(obter_estoque().listar_categorias()))
+
+# --------------------- MATERIAIS ---------------------
+
+@inventario_bp.route('/api/materiais', methods=['GET'])
+def listar_materiais():
+    try:
+        materiais = obter_estoque().listar_materiais()
+    except Exception as e:
+        materiais = [{"id": 0, "nome_item": "Erro ao buscar", "categoria": str(e)}]
+    return jsonify(materiais)
+
+# Busca sem acento/maiúscula: ?q=treli -> TRELIÇA..., ordenado por relevância
+@inventario_bp.route('/api/materiais/busca', methods=['GET'])
+def buscar_materiais():
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'Informe o parâmetro q.'}), 400
+    try:
+        limite = int(request.args.get('limite', LIMITE_BUSCA))
+    except ValueError:
+        return jsonify({'error': 'limite deve ser um número inteiro.'}), 400
+    if not 1 <= limite <= LIMITE_BUSCA_MAXIMO:
+        return jsonify({'error': f'limite deve estar entre 1 e {LIMITE_BUSCA_MAXIMO}.'}), 400
+
+    try:
+        return jsonify(indice_materiais.buscar(q, limite, request.args.get('categoria')))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# /api/materiais/busca tem precedência sobre esta rota (regra sem variável)
+@inventario_bp.route('/api/materiais/<categoria>', methods=['GET'])
+def listar_por_categoria(categoria):
+    return resposta_condicional("inventario",
+                                lambda: jsonify(obter_estoque().obter_materiais_por_categoria(categoria)))
+
+# --------------------- ESTOQUE ---------------------
+
+def listar_estoque():
+    estoque = obter_estoque()
+    if pedido_paginado(request.args):
+        return responder_paginado("inventario", estoque.COLUNAS_ESTOQUE, estoque.CHAVE_ESTOQUE)
+    return jsonify(estoque.obter_estoque_completo())
+
+@inventario_bp.route('/api/estoque', methods=['GET', 'POST'])
+def gerenciar_estoque():
+    if request.method == 'GET':
+        return resposta_condicional("inventario", listar_estoque)
+
+    if request.method == 'POST':
+        dados = request.get_json()
+        material_id = dados.get('material_id')
+        quantidade = dados.get('quantidade')
+        observacao = dados.get('observacao', '')
+
+        if not (material_id and isinstance(quantidade, int) and quantidade > 0):
+            return jsonify({'error': 'Dados inválidos. Informe material_id (str) e quantidade (> 0).'}), 400
+
+        try:
+            diario = obter_diario()
+            if diario is not None:
+                # Confirmado no diário local; o reprodutor aplica no banco (servicos/diario.py)
+                seq = diario.registrar_entrada(material_id, quantidade, observacao)
+                return jsonify({'message': 'Entrada registrada no diário', 'seq': seq,
+                                'material_id': material_id, 'quantidade_adicionada': quantidade}), 202
+
+            material = obter_estoque().registrar_entrada(material_id, quantidade, observacao)
+            return jsonify({
+                'message': 'Estoque atualizado com sucesso',
+                'material_id': material_id,
+                'material': material,
+                'quantidade_adicionada': quantidade
+            }), 200
+
+        except MaterialNaoEncontradoError as e:
+            return jsonify({'error': str(e)}), 404
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
@@ -0,0 +1,52 @@
+from flask import Blueprint, jsonify, request
+from servicos.conexao import get_db_connection, obter_pool
+from servicos.paginacao import pedido_paginado
+from servicos.cache import cache_leitura
+from servicos.alertas import monitor_estoque
+from servicos.disponibilidade import motor_disponibilidade
+from servicos.busca import indice_materiais
+from servicos.auditoria import auditoria
+from servicos.diario import estatisticas_diario
+from rotas.comum import responder_paginado
+
+logs_bp = Blueprint('logs', __name__)
+
+@logs_bp.route('/')
+def home():
+    return "Servidor Flask rodando! Acesse /api/logs para ver os logs."
+
+# --------------------- MÉTRICAS ---------------------
+
+@logs_bp.route('/api/metricas', methods=['GET'])
+def metricas():
+    return jsonify({"pool": obter_pool().estatisticas(), "cache": cache_leitura.estatisticas(),
+                    "busca": indice_materiais.estatisticas(), "alertas": monitor_estoque.estatisticas(),
+                    "disponibilidade": motor_disponibilidade.estatisticas(),
+                    "auditoria": auditoria.estatisticas(), "diario": estatisticas_diario()})
+
+# --------------------- LOGS ---------------------
+
+# LEFT JOIN: entradas da auditoria sem usuário (servicos/auditoria.py) vêm com usuario null
+COLUNAS_LOGS = {
+    'id': 'l.id', 'acao': 'l.acao', 'descricao': 'l.descricao',
+    'rota_afetada': 'l.rota_afetada', 'data_hora': 'l.data_hora', 'usuario': 'u.nome',
+}
+
+@logs_bp.route('/api/logs', methods=['GET'])
+def listar_logs():
+    if pedido_paginado(request.args):
+        return responder_paginado("logs l LEFT JOIN usuarios u ON u.id = l.usuario_id", COLUNAS_LOGS,
+                                  ["l.data_hora", "l.id"], ordem="DESC", coluna_tempo="l.data_hora")
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT l.id, l.acao, l.descricao, l.rota_afetada, l.data_hora, u.nome AS usuario
+        FROM logs l
+        LEFT JOIN usuarios u ON u.id = l.usuario_id
+        ORDER BY l.data_hora DESC
+    """)
+    logs = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return jsonify(logs)
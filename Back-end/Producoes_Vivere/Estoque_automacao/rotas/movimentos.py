@@ -0,0 +1,160 @@
+from flask import Blueprint, Response, jsonify, request
+from servicos.conexao import get_db_connection
+from servicos.movimentacao import MaterialNaoEncontradoError, EstoqueInsuficienteError
+from servicos.paginacao import pedido_paginado, ler_paginacao, ler_periodo, ParametrosInvalidosError
+from servicos import streaming
+from servicos.condicional import resposta_condicional
+from servicos.resumo import ler_resumo, DIAS_PADRAO as DIAS_RESUMO, DIAS_MAXIMO as DIAS_RESUMO_MAXIMO
+from servicos.analise import consultar as consultar_analise, ConsultaInvalidaError
+from servicos.estoque import obter_estoque
+from servicos.diario import obter_diario
+
+movimentos_bp = Blueprint('movimentos', __name__)
+
+MAX_ITENS_LOTE = 500
+
+# --------------------- MOVIMENTOS ---------------------
+
+@movimentos_bp.route("/api/movimentos", methods=["GET"])
+def listar_movimentos():
+    # ?limit=&after=&desde=&ate=&campos= -> página com proximo_cursor
+    estoque = obter_estoque()
+    if pedido_paginado(request.args):
+        try:
+            pagina = ler_paginacao(request.args, estoque.COLUNAS_MOVIMENTOS)
+            return jsonify(estoque.obter_movimentacoes_paginadas(pagina))
+        except ParametrosInvalidosError as e:
+            return jsonify({"erro": str(e)}), 400
+
+    movimentos = estoque.obter_movimentacoes()
+    return jsonify(movimentos)
+
+@movimentos_bp.route("/api/movimentos/exportar", methods=["GET"])
+def exportar_movimentos():
+    # Histórico completo em streaming: ?formato=json (array) ou ndjson (uma linha por movimento)
+    formato = request.args.get("formato", "json")
+    if formato not in streaming.FORMATOS:
+        return jsonify({"erro": "Formato deve ser json ou ndjson"}), 400
+    try:
+        desde, ate = ler_periodo(request.args)
+    except ParametrosInvalidosError as e:
+        return jsonify({"erro": str(e)}), 400
+
+    lotes = obter_estoque().iterar_movimentacoes(desde=desde, ate=ate)
+    return Response(
+        streaming.gerar(formato, lotes),
+        mimetype=streaming.MIMETYPES[formato],
+        headers={"X-Accel-Buffering": "no"},
+    )
+
+@movimentos_bp.route("/api/movimentos", methods=["POST"])
+def registrar_movimento():
+    data = request.json
+    nome = data.get("nome")
+    tipo = data.get("tipo")
+    quantidade = data.get("quantidade")
+    # Nome repetido em mais de uma categoria: informe "categoria" ou "material_id" (id da linha do inventário)
+    categoria = data.get("categoria")
+    material_id = data.get("material_id")
+
+    if not all([nome or material_id, tipo, quantidade]):
+        return jsonify({"erro": "Dados incompletos"}), 400
+
+    try:
+        diario = obter_diario()
+        if diario is not None:
+            # Confirmado no diário local; o reprodutor aplica no banco (servicos/diario.py)
+            seq = diario.registrar_movimento(nome, tipo, int(quantidade), data.get("deposito"),
+                                             categoria, material_id)
+            return jsonify({"mensagem": "Movimento registrado no diário", "seq": seq}), 202
+        obter_estoque().registrar_movimento(nome, tipo, int(quantidade), data.get("deposito"),
+                                            categoria, material_id)
+        return jsonify({"mensagem": "Movimento registrado com sucesso!"})
+    except MaterialNaoEncontradoError as e:
+        return jsonify({"erro": str(e)}), 404
+    except EstoqueInsuficienteError as e:
+        return jsonify({"erro": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@movimentos_bp.route("/api/movimentos/lote", methods=["POST"])
+def registrar_movimentos_lote():
+    data = request.json or {}
+    itens = data.get("itens")
+    modo = data.get("modo", "tudo_ou_nada")
+
+    if not isinstance(itens, list) or not itens:
+        return jsonify({"erro": "Informe a lista de itens do lote"}), 400
+    if len(itens) > MAX_ITENS_LOTE:
+        return jsonify({"erro": f"Lote limitado a {MAX_ITENS_LOTE} itens"}), 400
+    if not all(isinstance(item, dict) for item in itens):
+        return jsonify({"erro": "Itens do lote devem ser objetos"}), 400
+
+    try:
+        resultado = obter_estoque().registrar_movimentos_lote(itens, modo)
+    except ValueError as e:
+        return jsonify({"erro": str(e)}), 400
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+    status = 409 if modo == "tudo_ou_nada" and not resultado["aplicado"] else 200
+    return jsonify(resultado), status
+
+# --------------------- RESUMO ---------------------
+
+# KPIs do painel lidos das tabelas de resumo (V007): total em estoque, materiais,
+# movimentos, totais por categoria e entradas/saídas dos últimos ?dias= dias.
+@movimentos_bp.route('/api/resumo', methods=['GET'])
+def resumo_estoque():
+    try:
+        dias = int(request.args.get('dias', DIAS_RESUMO))
+    except ValueError:
+        return jsonify({'error': 'dias deve ser um número inteiro.'}), 400
+    if not 1 <= dias <= DIAS_RESUMO_MAXIMO:
+        return jsonify({'error': f'dias deve estar entre 1 e {DIAS_RESUMO_MAXIMO}.'}), 400
+
+    def gerar():
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            return jsonify(ler_resumo(cursor, dias))
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        finally:
+            cursor.close()
+            conn.close()
+    return resposta_condicional(("inventario", "movimentos"), gerar)
+
+# Séries por período dos rollups de movimentos (V008):
+# ?granularidade=hora|dia|semana|mes&material=&categoria=&tipo=&desde=&ate=
+# ?agrupar=material|categoria separa a série por essa coluna; ?top=N fica com os N maiores de cada período
+@movimentos_bp.route('/api/analytics/movimentos', methods=['GET'])
+def analise_movimentos():
+    args = request.args
+    try:
+        desde, ate = ler_periodo(args)
+        top = int(args['top']) if args.get('top') else None
+    except ParametrosInvalidosError as e:
+        return jsonify({'error': str(e)}), 400
+    except ValueError:
+        return jsonify({'error': 'top deve ser um número inteiro.'}), 400
+    granularidade = args.get('granularidade', 'dia')
+
+    def gerar():
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            serie = consultar_analise(cursor, granularidade, args.get('material') or None,
+                                      args.get('categoria'), args.get('tipo') or None, desde, ate,
+                                      args.get('agrupar') or None, top)
+            return jsonify({'granularidade': granularidade, 'serie': serie})
+        except ConsultaInvalidaError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        finally:
+            cursor.close()
+            conn.close()
+    return resposta_condicional("movimentos", gerar)
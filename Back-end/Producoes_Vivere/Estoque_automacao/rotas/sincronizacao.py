@@ -0,0 +1,39 @@
+from flask import Blueprint, jsonify, request
+from servicos.conexao import get_db_connection
+from servicos.mudancas import ler_mudancas, estado, FeedCompactadoError, LIMITE_PADRAO, LIMITE_MAXIMO
+
+sincronizacao_bp = Blueprint('sincronizacao', __name__)
+
+# --------------------- SINCRONIZAÇÃO (tablets dos depósitos) ---------------------
+
+# GET /api/sync            -> {"versao", "minimo"}: pegue a versão ANTES da carga
+#                             completa (/api/inventario, /api/movimentos, /api/alocacoes)
+# GET /api/sync?desde=<v>  -> {"versao", "minimo", "mais", "mudancas": [...]}; com
+#                             "mais" true, chame de novo com desde=versao. 410: refazer a carga.
+@sincronizacao_bp.route('/api/sync', methods=['GET'])
+def sincronizar():
+    try:
+        desde = request.args.get('desde')
+        desde = int(desde) if desde is not None else None
+        limite = int(request.args.get('limit', LIMITE_PADRAO))
+    except ValueError:
+        return jsonify({'error': 'desde e limit devem ser inteiros.'}), 400
+    if (desde is not None and desde < 0) or not 0 < limite <= LIMITE_MAXIMO:
+        return jsonify({'error': f'desde deve ser >= 0 e limit entre 1 e {LIMITE_MAXIMO}.'}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        # Versões e linhas lidas do mesmo snapshot
+        cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+        if desde is None:
+            versao, minimo = estado(cursor)
+            return jsonify({'versao': versao, 'minimo': minimo})
+        return jsonify(ler_mudancas(cursor, desde, limite))
+    except FeedCompactadoError as e:
+        return jsonify({'error': str(e), 'versao': e.versao, 'minimo': e.minimo}), 410
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
@@ -1,6 +1,6 @@
-# app_usuarios.py
 from flask import Blueprint, jsonify, request
-from .database import get_db_connection  # ou ajuste o import conforme o local da função
+from servicos.conexao import get_db_connection
+from rotas.comum import auditar
 
 usuarios_bp = Blueprint('usuarios', __name__)
 
@@ -36,6 +36,7 @@ def usuarios():
             conn.commit()
             cursor.close()
             conn.close()
+            auditar("criar", f"Usuário {email} ({perfil}) cadastrado")
             return jsonify({'message': 'Usuário cadastrado com sucesso!'}), 201
         except Exception as e:
             conn.rollback()
@@ -46,12 +47,15 @@ def usuarios():
     elif request.method == 'DELETE':
         user_id = request.args.get('id')
         if not user_id:
+            cursor.close()
+            conn.close()
             return jsonify({'error': 'ID não fornecido'}), 400
         try:
             cursor.execute("DELETE FROM usuarios WHERE id = %s", (user_id,))
             conn.commit()
             cursor.close()
             conn.close()
+            auditar("remover", f"Usuário {user_id} removido")
             return jsonify({'message': 'Usuário removido com sucesso'}), 200
         except Exception as e:
             conn.rollback()
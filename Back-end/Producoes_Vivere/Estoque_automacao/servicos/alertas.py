@@ -0,0 +1,292 @@
+import heapq
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+# Monitor de estoque baixo: substitui o "SELECT * FROM inventario WHERE
+# quantidade < 10 ORDER BY quantidade" rodado à mão antes de cada evento.
+#
+# Cada material (material, categoria) tem uma folga = quantidade - mínimo; um
+# heap ordenado pela folga dá os que estão abaixo do limite sem varrer nada.
+# As escritas (movimentos, entradas pelo /api/estoque) aplicam o delta depois
+# do commit e, quando a folga cruza o zero, o evento vai para quem assina o SSE.
+#
+# O mínimo vem da tabela limites_estoque (migração V003), do mais específico
+# para o mais geral: (categoria, material) > ('', material) > (categoria, '') >
+# VIVERE_LIMITE_PADRAO. Os eventos são do processo: escritas de outro worker ou
+# do importador só aparecem na ressincronização (TTL), que também gera eventos.
+
+ABAIXO = "abaixo_do_limite"
+REPOSTO = "reposto"
+
+SQL_SALDOS = "SELECT material, COALESCE(categoria, ''), quantidade FROM inventario"
+SQL_LIMITES = "SELECT categoria, material, minimo FROM limites_estoque"
+SQL_SALVAR_LIMITE = (
+    "INSERT INTO limites_estoque (categoria, material, minimo) VALUES (%s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE minimo = VALUES(minimo)"
+)
+SQL_REMOVER_LIMITE = "DELETE FROM limites_estoque WHERE categoria = %s AND material = %s"
+
+
+class LimiteAssinantesError(Exception):
+    pass
+
+
+def carregar_estado():
+    from servicos.conexao import get_db_connection
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_SALDOS)
+        saldos = cursor.fetchall()
+        cursor.execute(SQL_LIMITES)
+        limites = cursor.fetchall()
+        return saldos, limites
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def formatar_sse(evento):
+    return f"event: {evento['tipo']}\ndata: {json.dumps(evento, ensure_ascii=False)}\n\n"
+
+
+class MonitorEstoqueBaixo:
+    def __init__(self, carregar=carregar_estado, minimo_padrao=10, ttl=300.0, tamanho_fila=100,
+                 max_assinantes=2):
+        self.carregar = carregar
+        self.minimo_padrao = minimo_padrao
+        self.ttl = ttl
+        self.tamanho_fila = tamanho_fila
+        # Cada assinante do SSE prende uma thread do worker enquanto estiver conectado
+        self.max_assinantes = max_assinantes
+        self._saldos = {}        # (material, categoria) -> quantidade
+        self._por_material = {}  # material -> {categoria, ...}
+        self._limites = {}       # (categoria, material) -> minimo
+        self._folgas = {}        # (material, categoria) -> (folga, seq)
+        self._heap = []          # (folga, seq, (material, categoria)); entradas velhas são puladas
+        self._seq = 0
+        self._carregado_em = None
+        self._assinantes = set()
+        self._lock = threading.Lock()
+
+        self._eventos = 0
+        self._descartados = 0
+
+    # ---------- estado ----------
+
+    def minimo(self, material, categoria):
+        for chave in ((categoria, material), ("", material), (categoria, "")):
+            if chave in self._limites:
+                return self._limites[chave]
+        return self.minimo_padrao
+
+    def _reavaliar(self, chave, eventos):
+        # Recalcula a folga de um material e registra o evento se ela cruzou o zero
+        quantidade = self._saldos.get(chave)
+        anterior = self._folgas.get(chave)
+        if quantidade is None:
+            self._folgas.pop(chave, None)
+            return
+        minimo = self.minimo(*chave)
+        folga = quantidade - minimo
+        if anterior is not None and anterior[0] == folga:
+            return
+        self._seq += 1
+        self._folgas[chave] = (folga, self._seq)
+        heapq.heappush(self._heap, (folga, self._seq, chave))
+        if anterior is not None and (anterior[0] < 0) != (folga < 0):
+            eventos.append({
+                "tipo": ABAIXO if folga < 0 else REPOSTO,
+                "material": chave[0], "categoria": chave[1],
+                "quantidade": quantidade, "minimo": minimo, "folga": folga,
+                "horario": datetime.now().isoformat(timespec="seconds"),
+            })
+        # Heap com muita entrada velha: refaz só com as atuais
+        if len(self._heap) > 2 * len(self._folgas) + 64:
+            self._heap = [(f, s, c) for c, (f, s) in self._folgas.items()]
+            heapq.heapify(self._heap)
+
+    def _definir_saldo(self, material, categoria, quantidade, eventos):
+        chave = (material, categoria or "")
+        if quantidade is None:
+            self._saldos.pop(chave, None)
+            categorias = self._por_material.get(material)
+            if categorias is not None:
+                categorias.discard(chave[1])
+                if not categorias:
+                    del self._por_material[material]
+        else:
+            self._saldos[chave] = quantidade
+            self._por_material.setdefault(material, set()).add(chave[1])
+        self._reavaliar(chave, eventos)
+
+    def _sincronizar(self):
+        # Carga inicial e ressincronização pelo TTL: aplica a diferença contra o
+        # banco como se fossem escritas (cruzamentos externos também viram evento)
+        saldos, limites = self.carregar()
+        eventos = []
+        with self._lock:
+            self._limites = {(c or "", m or ""): minimo for c, m, minimo in limites}
+            novos = {(m, c or ""): q for m, c, q in saldos}
+            for chave in [c for c in self._saldos if c not in novos]:
+                self._definir_saldo(chave[0], chave[1], None, eventos)
+            for (material, categoria), quantidade in novos.items():
+                self._definir_saldo(material, categoria, quantidade, eventos)
+            # Limites podem ter mudado sem o saldo mudar
+            for chave in self._saldos:
+                self._reavaliar(chave, eventos)
+            self._carregado_em = time.monotonic()
+        self._publicar(eventos)
+
+    def garantir_carregado(self):
+        if self._carregado_em is None or time.monotonic() - self._carregado_em >= self.ttl:
+            self._sincronizar()
+
+    def recarregar(self):
+        self._sincronizar()
+
+    def descartar(self):
+        # Depois de um DELETE em massa: a próxima leitura carrega de novo
+        with self._lock:
+            self._saldos.clear()
+            self._por_material.clear()
+            self._folgas.clear()
+            self._heap = []
+            self._carregado_em = None
+
+    # ---------- escritas (chamadas depois do commit) ----------
+
+    def aplicar_movimento(self, material, delta, categoria=None):
+        # categoria: a linha que o motor alterou (servicos/movimentacao.py). Sem
+        # ela o delta vale para todas as categorias com esse nome que o comportem.
+        # Antes da primeira carga não há o que atualizar: ela já lerá o valor novo.
+        eventos = []
+        with self._lock:
+            if self._carregado_em is None:
+                return
+            categorias = self._por_material.get(material, ())
+            if categoria is not None:
+                categorias = [categoria or ""] if (categoria or "") in categorias else []
+            for cat in list(categorias):
+                chave = (material, cat)
+                if self._saldos[chave] + delta < 0:
+                    continue
+                self._saldos[chave] += delta
+                self._reavaliar(chave, eventos)
+        self._publicar(eventos)
+
+    def definir_saldo(self, material, categoria, quantidade):
+        # Material novo (quantidade) ou removido (None)
+        eventos = []
+        with self._lock:
+            if self._carregado_em is None:
+                return
+            if quantidade is None and categoria is None:
+                for cat in list(self._por_material.get(material, ())):
+                    self._definir_saldo(material, cat, None, eventos)
+            else:
+                self._definir_saldo(material, categoria, quantidade, eventos)
+        self._publicar(eventos)
+
+    def definir_limite(self, minimo, material="", categoria=""):
+        # minimo None remove o limite; só os materiais afetados são reavaliados
+        eventos = []
+        with self._lock:
+            if minimo is None:
+                self._limites.pop((categoria, material), None)
+            else:
+                self._limites[(categoria, material)] = minimo
+            if material:
+                chaves = [(material, c) for c in self._por_material.get(material, ())
+                          if not categoria or c == categoria]
+            elif categoria:
+                chaves = [c for c in self._saldos if c[1] == categoria]
+            else:
+                chaves = []
+            for chave in chaves:
+                self._reavaliar(chave, eventos)
+        self._publicar(eventos)
+
+    # ---------- leitura ----------
+
+    def abaixo_do_limite(self, margem=0, categoria=None):
+        # Materiais com folga < margem, da menor folga para a maior. Percorre o
+        # heap em ordem com um heap auxiliar de índices, sem desmontá-lo:
+        # custo proporcional ao que é devolvido, não ao inventário.
+        self.garantir_carregado()
+        itens = []
+        with self._lock:
+            heap = self._heap
+            fronteira = [(heap[0], 0)] if heap else []
+            while fronteira:
+                (folga, seq, chave), i = heapq.heappop(fronteira)
+                if folga >= margem:
+                    break
+                for filho in (2 * i + 1, 2 * i + 2):
+                    if filho < len(heap):
+                        heapq.heappush(fronteira, (heap[filho], filho))
+                atual = self._folgas.get(chave)
+                if atual is None or atual[1] != seq:
+                    continue
+                if categoria is not None and chave[1] != categoria:
+                    continue
+                itens.append({
+                    "material": chave[0], "categoria": chave[1],
+                    "quantidade": self._saldos[chave], "minimo": self.minimo(*chave), "folga": folga,
+                })
+        return itens
+
+    # ---------- SSE ----------
+
+    def assinar(self):
+        self.garantir_carregado()
+        fila = queue.Queue(maxsize=self.tamanho_fila)
+        with self._lock:
+            if len(self._assinantes) >= self.max_assinantes:
+                raise LimiteAssinantesError(
+                    f"Limite de {self.max_assinantes} conexões de alerta atingido; tente mais tarde.")
+            self._assinantes.add(fila)
+        return fila
+
+    def cancelar(self, fila):
+        with self._lock:
+            self._assinantes.discard(fila)
+
+    def _publicar(self, eventos):
+        if not eventos:
+            return
+        with self._lock:
+            assinantes = list(self._assinantes)
+            self._eventos += len(eventos)
+        for fila in assinantes:
+            for evento in eventos:
+                try:
+                    fila.put_nowait(evento)
+                except queue.Full:
+                    # Cliente parado não segura as escritas
+                    with self._lock:
+                        self._descartados += 1
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "materiais": len(self._saldos),
+                "abaixo": sum(1 for folga, _ in self._folgas.values() if folga < 0),
+                "limites": len(self._limites),
+                "heap": len(self._heap),
+                "assinantes": len(self._assinantes),
+                "eventos": self._eventos,
+                "descartados": self._descartados,
+            }
+
+
+monitor_estoque = MonitorEstoqueBaixo(
+    minimo_padrao=int(os.environ.get('VIVERE_LIMITE_PADRAO', 10)),
+    ttl=float(os.environ.get('VIVERE_ALERTAS_TTL', 300)),
+    max_assinantes=int(os.environ.get('VIVERE_SSE_MAX', 2)),
+)
@@ -0,0 +1,208 @@
+import os
+from decimal import Decimal
+from fractions import Fraction
+
+from servicos.saldos import aplicar_deltas, somar_deltas
+from servicos.mudancas import ids_inseridos
+
+# Divisão de alocações entre os depósitos (substitui o 70/30 fixo entre os
+# depósitos 1 e 2 do POST /api/alocacoes).
+#
+# Políticas:
+#   pesos       proporcional a depositos.peso (ou aos pesos enviados no pedido)
+#   estoque     nivela o saldo do material entre os depósitos: quem tem menos recebe mais
+#   capacidade  proporcional ao espaço livre (capacidade - ocupação atual)
+#   distancia   o depósito mais perto enche primeiro, até a capacidade
+#
+# As frações viram inteiros pelo método do maior resto: a soma das partes é
+# sempre a quantidade pedida, nenhuma unidade se perde no arredondamento.
+# Um lote de materiais é planejado em sequência (o espaço usado por um item
+# conta para o próximo) e gravado com um executemany numa transação só, junto
+# com o crédito em saldos_deposito (servicos/saldos.py), de onde também saem a
+# ocupação e o saldo de cada material por depósito.
+
+POLITICAS = ("pesos", "estoque", "capacidade", "distancia")
+POLITICA_PADRAO = os.environ.get('VIVERE_POLITICA_ALOCACAO', 'pesos')
+
+SQL_DEPOSITOS = (
+    "SELECT id, nome, peso, capacidade, distancia_km FROM depositos WHERE ativo = 1 ORDER BY id FOR UPDATE"
+)
+SQL_OCUPACAO = "SELECT deposito, COALESCE(SUM(quantidade), 0) FROM saldos_deposito GROUP BY deposito"
+SQL_SALDO_MATERIAIS = (
+    "SELECT material, deposito, quantidade FROM saldos_deposito WHERE material IN ({})"
+)
+SQL_INSERIR_ALOCACAO = (
+    "INSERT INTO alocacoes (material, deposito, quantidade, observacao) VALUES (%s, %s, %s, %s)"
+)
+
+
+class AlocacaoInvalidaError(ValueError):
+    pass
+
+
+class CapacidadeInsuficienteError(ValueError):
+    pass
+
+
+def _fracao(valor):
+    # Fraction aceita int, Decimal (colunas DECIMAL) e float sem erro de arredondamento.
+    # Peso inválido vindo do pedido ("abc", "1/0", NaN) é erro do cliente, não 500.
+    try:
+        return Fraction(valor) if isinstance(valor, (int, Decimal, Fraction)) else Fraction(str(valor))
+    except (ValueError, ZeroDivisionError, OverflowError):
+        raise AlocacaoInvalidaError(f"Peso inválido: {valor!r}.")
+
+
+def dividir_maior_resto(total, pesos):
+    # Divide total (inteiro) proporcionalmente aos pesos; soma sempre == total.
+    # Empate no resto: maior peso primeiro, depois a ordem recebida.
+    pesos = [_fracao(p) for p in pesos]
+    soma = sum(pesos)
+    if soma <= 0 or any(p < 0 for p in pesos):
+        raise AlocacaoInvalidaError("Pesos devem ser positivos.")
+    cotas = [total * p / soma for p in pesos]
+    partes = [int(c) for c in cotas]
+    sobra = total - sum(partes)
+    ordem = sorted(range(len(pesos)), key=lambda i: (-(cotas[i] - partes[i]), -pesos[i], i))
+    for i in ordem[:sobra]:
+        partes[i] += 1
+    return partes
+
+
+def nivelar(total, saldos):
+    # Enche os depósitos de menor saldo até o mesmo nível (water-filling) e
+    # arredonda pelo maior resto. Retorna quanto vai para cada um.
+    ordem = sorted(range(len(saldos)), key=lambda i: saldos[i])
+    restante = Fraction(total)
+    nivel = Fraction(saldos[ordem[0]])
+    for k in range(len(ordem)):
+        proximo = saldos[ordem[k + 1]] if k + 1 < len(ordem) else None
+        # k + 1 depósitos no nível atual; subir até o próximo custa (proximo - nivel) * (k + 1)
+        if proximo is None or (proximo - nivel) * (k + 1) >= restante:
+            nivel += restante / (k + 1)
+            break
+        restante -= (proximo - nivel) * (k + 1)
+        nivel = Fraction(proximo)
+    cotas = [max(nivel - s, 0) for s in saldos]
+    if not any(cotas):
+        return [0] * len(saldos)
+    return dividir_maior_resto(total, cotas)
+
+
+def _livre(deposito, ocupacao):
+    if deposito["capacidade"] is None:
+        return None
+    return max(int(deposito["capacidade"]) - ocupacao.get(deposito["id"], 0), 0)
+
+
+def dividir(quantidade, depositos, politica, ocupacao=None, saldos=None, pesos=None):
+    # depositos: [{"id", "nome", "peso", "capacidade", "distancia_km"}]
+    # ocupacao: {deposito_id: total alocado}; saldos: {deposito_id: saldo do material}
+    # Retorna [quantidade por depósito], na ordem de depositos.
+    if not depositos:
+        raise AlocacaoInvalidaError("Nenhum depósito ativo para alocar.")
+    ocupacao = ocupacao or {}
+
+    if politica == "pesos":
+        pesos = pesos or {}
+        return dividir_maior_resto(quantidade, [pesos.get(d["id"], d["peso"]) for d in depositos])
+
+    if politica == "estoque":
+        saldos = saldos or {}
+        return nivelar(quantidade, [saldos.get(d["id"], 0) for d in depositos])
+
+    if politica == "capacidade":
+        livres = [_livre(d, ocupacao) for d in depositos]
+        if any(l is None for l in livres):
+            raise AlocacaoInvalidaError("Política capacidade exige capacidade em todos os depósitos.")
+        if sum(livres) < quantidade:
+            raise CapacidadeInsuficienteError(f"Espaço livre ({sum(livres)}) menor que a quantidade ({quantidade}).")
+        # Proporcional ao livre: o maior resto nunca passa do livre de ninguém
+        return dividir_maior_resto(quantidade, livres)
+
+    if politica == "distancia":
+        partes = [0] * len(depositos)
+        restante = quantidade
+        ordem = sorted(range(len(depositos)), key=lambda i: (
+            depositos[i]["distancia_km"] is None, depositos[i]["distancia_km"] or 0, depositos[i]["id"]))
+        for i in ordem:
+            livre = _livre(depositos[i], ocupacao)
+            partes[i] = restante if livre is None else min(restante, livre)
+            restante -= partes[i]
+            if not restante:
+                break
+        if restante:
+            raise CapacidadeInsuficienteError(f"Faltou espaço para {restante} unidade(s).")
+        return partes
+
+    raise AlocacaoInvalidaError(f"Política deve ser uma de: {', '.join(POLITICAS)}.")
+
+
+def planejar(itens, depositos, politica, ocupacao=None, saldos=None, pesos=None):
+    # itens: [{"material", "quantidade", "observacao"}]
+    # saldos: {(material, deposito_id): saldo}. Atualiza ocupacao/saldos a cada item.
+    # Retorna (linhas para o INSERT, resumo por item).
+    ocupacao = dict(ocupacao or {})
+    saldos = dict(saldos or {})
+    linhas = []
+    resumo = []
+    for item in itens:
+        material, quantidade = item["material"], item["quantidade"]
+        partes = dividir(quantidade, depositos, politica, ocupacao,
+                         {d["id"]: saldos.get((material, d["id"]), 0) for d in depositos}, pesos)
+        divisao = []
+        for deposito, parte in zip(depositos, partes):
+            if not parte:
+                continue
+            percentual = round(100 * parte / quantidade)
+            observacao = f"{item.get('observacao') or ''} ({percentual}%)".strip()
+            linhas.append((material, deposito["id"], parte, observacao))
+            divisao.append({"deposito_id": deposito["id"], "deposito": deposito["nome"], "quantidade": parte})
+            ocupacao[deposito["id"]] = ocupacao.get(deposito["id"], 0) + parte
+            saldos[(material, deposito["id"])] = saldos.get((material, deposito["id"]), 0) + parte
+        resumo.append({"material": material, "quantidade_total": quantidade, "divisao": divisao})
+    return linhas, resumo
+
+
+def _linhas(cursor):
+    return [tuple(r.values()) if isinstance(r, dict) else r for r in cursor.fetchall()]
+
+
+def alocar(cursor, itens, politica=None, depositos=None, pesos=None, mudancas=None):
+    # Planeja e grava um lote dentro da transação do chamador (que faz o commit).
+    # depositos: ids para restringir a divisão; pesos: {id: peso} para a política pesos.
+    # mudancas: Mudancas (servicos/mudancas.py) que recebe os ids das alocações gravadas.
+    politica = politica or POLITICA_PADRAO
+    if politica not in POLITICAS:
+        raise AlocacaoInvalidaError(f"Política deve ser uma de: {', '.join(POLITICAS)}.")
+
+    # FOR UPDATE nos depósitos: alocações concorrentes leem a ocupação uma de cada vez
+    cursor.execute(SQL_DEPOSITOS)
+    ativos = [dict(zip(("id", "nome", "peso", "capacidade", "distancia_km"), r)) for r in _linhas(cursor)]
+    if depositos:
+        try:
+            escolhidos = {int(d) for d in depositos}
+        except (TypeError, ValueError):
+            raise AlocacaoInvalidaError("depositos deve ser uma lista de ids.")
+        ativos = [d for d in ativos if d["id"] in escolhidos]
+        if len(ativos) != len(escolhidos):
+            raise AlocacaoInvalidaError("Depósito inexistente ou inativo na lista.")
+
+    ocupacao = {}
+    if politica in ("capacidade", "distancia"):
+        cursor.execute(SQL_OCUPACAO)
+        ocupacao = {deposito: int(total) for deposito, total in _linhas(cursor)}
+
+    saldos = {}
+    if politica == "estoque":
+        materiais = sorted({item["material"] for item in itens})
+        cursor.execute(SQL_SALDO_MATERIAIS.format(", ".join(["%s"] * len(materiais))), materiais)
+        saldos = {(material, deposito): int(total) for material, deposito, total in _linhas(cursor)}
+
+    linhas, resumo = planejar(itens, ativos, politica, ocupacao, saldos, pesos)
+    if linhas:
+        cursor.executemany(SQL_INSERIR_ALOCACAO, linhas)
+        if mudancas is not None:
+            mudancas.inserir("alocacoes", *ids_inseridos(cursor))
+        aplicar_deltas(cursor, somar_deltas((deposito, material, parte) for material, deposito, parte, _ in linhas))
+    return resumo
@@ -0,0 +1,285 @@
+from datetime import datetime, time, timedelta
+
+from servicos.streaming import iterar_lotes
+
+# Análise de movimentos por período (GET /api/analytics/movimentos) sobre os
+# rollups da migração V008, em vez de puxar /api/movimentos inteiro e somar
+# no cliente.
+#
+# movimentos_hora e movimentos_dia_material recebem os deltas de cada movimento
+# na mesma transação (DeltasResumo em servicos/resumo.py). Semana e mês saem do
+# rollup diário agrupado no SQL. O histórico anterior à migração é agregado de
+# uma vez, em lotes vetorizados com numpy (backfill_analise.py).
+#
+# Um movimento conta uma vez para cada linha do inventário que alterou: o mesmo
+# nome em duas categorias gera uma linha de rollup em cada uma. No backfill a
+# categoria vem do inventário atual; material em mais de uma categoria fica com
+# categoria '' (não dá para saber qual linha cada movimento antigo alterou).
+
+GRANULARIDADES = ("hora", "dia", "semana", "mes")
+AGRUPAMENTOS = ("material", "categoria")
+TIPOS = ("entrada", "saida")
+
+# Período padrão (sem ?desde=) e máximo por granularidade, em dias
+JANELA_PADRAO = {"hora": 2, "dia": 90, "semana": 182, "mes": 365}
+JANELA_MAXIMA = {"hora": 31, "dia": 3660, "semana": 3660, "mes": 3660}
+
+# tabela, coluna do período, expressão do balde
+_BALDES = {
+    "hora": ("movimentos_hora", "hora", "hora"),
+    "dia": ("movimentos_dia_material", "dia", "dia"),
+    # segunda-feira da semana e primeiro dia do mês (sem DATE_FORMAT: o % brigaria com os parâmetros)
+    "semana": ("movimentos_dia_material", "dia", "DATE_SUB(dia, INTERVAL WEEKDAY(dia) DAY)"),
+    "mes": ("movimentos_dia_material", "dia", "DATE_SUB(dia, INTERVAL DAYOFMONTH(dia) - 1 DAY)"),
+}
+
+SQL_SOMAR_HORA = (
+    "INSERT INTO movimentos_hora (material, categoria, tipo, hora, movimentos, quantidade) "
+    "VALUES (%s, %s, %s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE movimentos = movimentos + VALUES(movimentos), quantidade = quantidade + VALUES(quantidade)"
+)
+SQL_SOMAR_DIA = (
+    "INSERT INTO movimentos_dia_material (material, categoria, tipo, dia, movimentos, quantidade) "
+    "VALUES (%s, %s, %s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE movimentos = movimentos + VALUES(movimentos), quantidade = quantidade + VALUES(quantidade)"
+)
+SQL_LIMPAR_HORAS = "DELETE FROM movimentos_hora WHERE hora < %s"
+SQL_LIMPAR_DIAS = "DELETE FROM movimentos_dia_material WHERE dia < %s"
+SQL_HISTORICO = "SELECT material, tipo, quantidade, horario FROM movimentos WHERE horario < %s"
+SQL_CATEGORIAS_MATERIAIS = "SELECT material, COALESCE(categoria, '') FROM inventario"
+SQL_CATEGORIAS_DOS_MATERIAIS = SQL_CATEGORIAS_MATERIAIS + " WHERE material IN ({})"
+# backfill(hoje=True): trava os rollups na mesma ordem do DeltasResumo.gravar
+SQL_TRAVAR_ROLLUPS = (
+    "SELECT COUNT(*) FROM movimentos_hora FOR UPDATE",
+    "SELECT COUNT(*) FROM movimentos_dia_material FOR UPDATE",
+)
+
+
+class ConsultaInvalidaError(ValueError):
+    pass
+
+
+def hora_de(horario):
+    # "AAAA-MM-DD HH:MM:SS" ou datetime -> "AAAA-MM-DD HH:00:00"
+    return str(horario)[:13] + ":00:00"
+
+
+def linhas_movimento(material, tipo, quantidade, horario, categorias):
+    # Linhas de rollup de um movimento: (material, categoria, tipo, balde, movimentos, quantidade)
+    hora = hora_de(horario)
+    horas = [(material, categoria, tipo, hora, 1, quantidade) for categoria in categorias]
+    dias = [(material, categoria, tipo, hora[:10], 1, quantidade) for categoria in categorias]
+    return horas, dias
+
+
+# ---------- consulta ----------
+
+def montar_consulta(granularidade="dia", material=None, categoria=None, tipo=None,
+                    desde=None, ate=None, agrupar=None, agora=None):
+    if granularidade not in GRANULARIDADES:
+        raise ConsultaInvalidaError(f"granularidade deve ser uma de: {', '.join(GRANULARIDADES)}.")
+    if agrupar is not None and agrupar not in AGRUPAMENTOS:
+        raise ConsultaInvalidaError(f"agrupar deve ser um de: {', '.join(AGRUPAMENTOS)}.")
+    if tipo is not None and tipo not in TIPOS:
+        raise ConsultaInvalidaError("tipo deve ser entrada ou saida.")
+
+    agora = agora or datetime.now()
+    ate = ate or agora
+    desde = desde or datetime.combine((ate - timedelta(days=JANELA_PADRAO[granularidade] - 1)).date(), time())
+    if desde > ate:
+        raise ConsultaInvalidaError("desde deve ser anterior a ate.")
+    if (ate - desde).days > JANELA_MAXIMA[granularidade]:
+        raise ConsultaInvalidaError(
+            f"Período máximo para {granularidade}: {JANELA_MAXIMA[granularidade]} dias.")
+
+    tabela, coluna, balde = _BALDES[granularidade]
+    if coluna == "dia":
+        desde, ate = desde.date(), ate.date()
+    filtros = [f"{coluna} >= %s", f"{coluna} <= %s"]
+    params = [desde, ate]
+    for nome, valor in (("material", material), ("categoria", categoria), ("tipo", tipo)):
+        if valor is not None:
+            filtros.append(f"{nome} = %s")
+            params.append(valor)
+
+    grupos = ["periodo", "tipo"] + ([agrupar] if agrupar else [])
+    sql = (
+        f"SELECT {balde} AS periodo, tipo{', ' + agrupar if agrupar else ''}, "
+        f"SUM(movimentos) AS movimentos, SUM(quantidade) AS quantidade "
+        f"FROM {tabela} WHERE {' AND '.join(filtros)} "
+        f"GROUP BY {', '.join(grupos)} ORDER BY {', '.join(grupos)}"
+    )
+    return sql, params
+
+
+def consultar(cursor, granularidade="dia", material=None, categoria=None, tipo=None,
+              desde=None, ate=None, agrupar=None, top=None):
+    # top: com agrupar, mantém só os N de maior quantidade em cada período/tipo
+    sql, params = montar_consulta(granularidade, material, categoria, tipo, desde, ate, agrupar)
+    cursor.execute(sql, params)
+    colunas = ["periodo", "tipo"] + ([agrupar] if agrupar else []) + ["movimentos", "quantidade"]
+    serie = []
+    for row in cursor.fetchall():
+        item = dict(zip(colunas, row.values() if isinstance(row, dict) else row))
+        item["periodo"] = str(item["periodo"])
+        item["movimentos"] = int(item["movimentos"])
+        item["quantidade"] = int(item["quantidade"])
+        serie.append(item)
+
+    if agrupar and top:
+        por_grupo = {}
+        for item in serie:
+            por_grupo.setdefault((item["periodo"], item["tipo"]), []).append(item)
+        serie = []
+        for chave in sorted(por_grupo):
+            serie.extend(sorted(por_grupo[chave], key=lambda i: -i["quantidade"])[:top])
+    return serie
+
+
+# ---------- backfill vetorizado ----------
+#
+# Cada movimento vira uma chave int64: código do material, tipo (1 bit) e hora
+# desde 1970 (32 bits). Somar é ordenar as chaves e reduzir os trechos iguais,
+# sem objetos Python por linha; nomes só voltam no resultado final.
+
+_BITS_PERIODO = 32
+
+
+def _somar(chaves, movimentos, quantidades):
+    import numpy as np
+
+    if not len(chaves):
+        return chaves, movimentos, quantidades
+    ordem = np.argsort(chaves, kind="stable")
+    chaves = chaves[ordem]
+    inicios = np.flatnonzero(np.r_[True, chaves[1:] != chaves[:-1]])
+    return (chaves[inicios], np.add.reduceat(movimentos[ordem], inicios),
+            np.add.reduceat(quantidades[ordem], inicios))
+
+
+def agregar_lote(linhas, codigos):
+    # linhas: [(material, tipo, quantidade, horario)]; codigos: {material: código},
+    # compartilhado entre os lotes -> (chaves, movimentos, quantidades) somados
+    import numpy as np
+    import pandas as pd
+
+    # Colunas direto das tuplas: mais barato que DataFrame.from_records ou zip(*linhas)
+    material, tipo, quantidade, horario = ([linha[i] for linha in linhas] for i in range(4))
+    inverso, nomes = pd.factorize(np.array(material, dtype=object))
+    material = np.array([codigos.setdefault(n, len(codigos)) for n in nomes], dtype=np.int64)[inverso]
+    saida = (np.array(tipo, dtype=object) == "saida").astype(np.int64)
+    hora = pd.to_datetime(horario).to_numpy().astype("datetime64[h]").astype(np.int64)
+    chaves = ((material << 1 | saida) << _BITS_PERIODO) | hora
+    return _somar(chaves, np.ones(len(linhas), dtype=np.int64), np.array(quantidade, dtype=np.int64))
+
+
+def consolidar(parciais):
+    import numpy as np
+
+    if len(parciais) == 1:
+        return parciais[0]
+    return _somar(*(np.concatenate(coluna) for coluna in zip(*parciais)))
+
+
+def _decodificar(codigos, chaves, movimentos, quantidades, coluna, unidade):
+    import numpy as np
+    import pandas as pd
+
+    nomes = np.array(list(codigos), dtype=object)  # dict preserva a ordem dos códigos
+    return pd.DataFrame({
+        "material": nomes[chaves >> (_BITS_PERIODO + 1)],
+        "tipo": np.where((chaves >> _BITS_PERIODO) & 1, "saida", "entrada"),
+        coluna: (chaves & (2 ** _BITS_PERIODO - 1)).astype(f"datetime64[{unidade}]").astype("datetime64[s]"),
+        "movimentos": movimentos,
+        "quantidade": quantidades,
+    })
+
+
+def agregar_historico(lotes, consolidar_a_cada=20):
+    # Agrega lote a lote e consolida os parciais de tempos em tempos: a memória
+    # fica no tamanho do resultado (material x tipo x hora), não do histórico.
+    # -> (horas, dias): DataFrames material, tipo, hora|dia, movimentos, quantidade
+    codigos, parciais = {}, []
+    for linhas in lotes:
+        if linhas:
+            parciais.append(agregar_lote(linhas, codigos))
+        if len(parciais) >= consolidar_a_cada:
+            parciais = [consolidar(parciais)]
+    if not parciais:
+        return None, None
+    chaves, movimentos, quantidades = consolidar(parciais)
+    horas = _decodificar(codigos, chaves, movimentos, quantidades, "hora", "h")
+    base = chaves >> _BITS_PERIODO << _BITS_PERIODO
+    dias = _somar(base | (chaves - base) // 24, movimentos, quantidades)
+    return horas, _decodificar(codigos, *dias, "dia", "D")
+
+
+def com_categorias(df, categorias_por_material):
+    # categorias_por_material: {material: categoria}; ausente -> ''
+    df.insert(1, "categoria", df["material"].map(categorias_por_material).fillna(""))
+    return df
+
+
+def _tuplas(df, coluna, formato):
+    datas = df[coluna].dt.strftime(formato)
+    return list(zip(df["material"], df["categoria"], df["tipo"], datas,
+                    df["movimentos"].tolist(), df["quantidade"].tolist()))
+
+
+def mapear_categorias(linhas):
+    # [(material, categoria)] do inventário -> {material: categoria} só para nomes em uma categoria
+    vistas = {}
+    for material, categoria in linhas:
+        vistas.setdefault(material, set()).add(categoria or "")
+    return {m: next(iter(c)) for m, c in vistas.items() if len(c) == 1}
+
+
+def backfill(conn, ate=None, tamanho_lote=100_000, tamanho_insert=5000, hoje=False):
+    # Refaz os rollups de tudo antes do dia `ate` (padrão: hoje), sempre à
+    # meia-noite: o dia de corte e os seguintes ficam só com o que as escritas
+    # somaram, então nada é apagado nem contado duas vezes. Rodado no dia do
+    # deploy, deixa de fora as horas do próprio dia anteriores ao deploy;
+    # rodar de novo no dia seguinte completa.
+    # hoje=True refaz também o dia de hoje (corte na meia-noite de amanhã). Para
+    # isso trava os rollups antes de ler o histórico: quem grava um movimento
+    # espera no DeltasResumo.gravar até o commit, e o snapshot da leitura (aberto
+    # depois das travas) já tem tudo o que foi confirmado antes.
+    if hoje:
+        ate = datetime.now().date() + timedelta(days=1)
+    ate = datetime.combine(ate or datetime.now().date(), time())
+    cursor = conn.cursor()
+    try:
+        if hoje:
+            for sql in SQL_TRAVAR_ROLLUPS:
+                cursor.execute(sql)
+                cursor.fetchall()
+        cursor.execute(SQL_CATEGORIAS_MATERIAIS)
+        categorias = mapear_categorias(cursor.fetchall())
+    finally:
+        cursor.close()
+
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(SQL_HISTORICO, (ate,))
+        horas, dias = agregar_historico(iterar_lotes(cursor, tamanho_lote))
+    finally:
+        cursor.close()
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_LIMPAR_HORAS, (ate,))
+        cursor.execute(SQL_LIMPAR_DIAS, (ate.date(),))
+        linhas_hora = linhas_dia = []
+        if horas is not None:
+            linhas_hora = _tuplas(com_categorias(horas, categorias), "hora", "%Y-%m-%d %H:%M:%S")
+            linhas_dia = _tuplas(com_categorias(dias, categorias), "dia", "%Y-%m-%d")
+        for sql, linhas in ((SQL_SOMAR_HORA, linhas_hora), (SQL_SOMAR_DIA, linhas_dia)):
+            for i in range(0, len(linhas), tamanho_insert):
+                cursor.executemany(sql, linhas[i:i + tamanho_insert])
+        conn.commit()
+        return {"ate": str(ate), "horas": len(linhas_hora), "dias": len(linhas_dia)}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
@@ -0,0 +1,204 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+# Trilha de auditoria (tabelas logs e logs_estoque) gravada fora da transação
+# de negócio. As rotas e o EstoqueService chamam registrar() /
+# registrar_estoque() depois do commit: a entrada só entra numa fila em
+# memória (microssegundos) e uma thread de fundo a esvazia em lotes, com um
+# executemany por tabela e um commit por lote.
+#
+# A fila é limitada (VIVERE_AUDITORIA_FILA). Com ela cheia (banco lento ou
+# fora do ar), VIVERE_AUDITORIA_POLITICA decide:
+#   descartar -> a entrada é contada em "descartadas" e a requisição segue (padrão)
+#   esperar   -> espera até VIVERE_AUDITORIA_ESPERA segundos por espaço, depois descarta
+#   sincrono  -> grava a entrada na hora, na thread da requisição (nada se perde)
+#
+# O horário é o do registro, não o da gravação. A thread nasce na primeira
+# entrada e encerrar() (atexit e worker_exit do servir.py) grava o que ficou
+# na fila antes de o processo sair; um kill -9 perde o que estava na fila.
+
+POLITICAS = ("descartar", "esperar", "sincrono")
+
+SQL_LOG = ("INSERT INTO logs (usuario_id, acao, descricao, rota_afetada, data_hora) "
+           "VALUES (%s, %s, %s, %s, %s)")
+SQL_LOG_ESTOQUE = ("INSERT INTO logs_estoque (acao, material, quantidade, observacao, data) "
+                   "VALUES (%s, %s, %s, %s, %s)")
+
+
+def gravar_lote(entradas):
+    from servicos.conexao import obter_pool
+
+    por_tabela = {}
+    for sql, valores in entradas:
+        por_tabela.setdefault(sql, []).append(valores)
+    with obter_pool().conexao() as conn:
+        cursor = conn.cursor()
+        try:
+            for sql, linhas in por_tabela.items():
+                cursor.executemany(sql, linhas)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+
+class Auditoria:
+    def __init__(self, gravar=gravar_lote, tamanho_fila=10000, tamanho_lote=500, politica="descartar",
+                 espera=0.05, tentativas=3, intervalo=0.5):
+        if politica not in POLITICAS:
+            raise ValueError(f"Política de auditoria inválida: {politica}")
+        self.gravar = gravar
+        self.tamanho_fila = tamanho_fila
+        self.tamanho_lote = tamanho_lote
+        self.politica = politica
+        self.espera = espera
+        self.tentativas = tentativas
+        self.intervalo = intervalo
+        self._iniciar_estado()
+
+    def _iniciar_estado(self):
+        self._fila = queue.Queue(maxsize=self.tamanho_fila)
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+        self._enfileiradas = 0
+        self._gravadas = 0
+        self._lotes = 0
+        self._maior_lote = 0
+        self._pico_fila = 0
+        self._descartadas = 0
+        self._sincronas = 0
+        self._falhas = 0
+        self._perdidas = 0
+        self._ultimo_erro = None
+
+    # ---------- registro (thread da requisição) ----------
+
+    def registrar(self, acao, descricao, rota=None, usuario_id=None):
+        self._enfileirar((SQL_LOG, (usuario_id, acao, descricao, rota, datetime.now())))
+
+    def registrar_estoque(self, acao, material, quantidade, observacao=""):
+        self._enfileirar((SQL_LOG_ESTOQUE, (acao, material, quantidade, observacao, datetime.now())))
+
+    def _enfileirar(self, entrada):
+        self._garantir_thread()
+        try:
+            if self.politica == "esperar":
+                self._fila.put(entrada, timeout=self.espera)
+            else:
+                self._fila.put_nowait(entrada)
+        except queue.Full:
+            if self.politica == "sincrono":
+                self._gravar([entrada])
+                with self._lock:
+                    self._sincronas += 1
+            else:
+                with self._lock:
+                    self._descartadas += 1
+            return
+        profundidade = self._fila.qsize()
+        with self._lock:
+            self._enfileiradas += 1
+            if profundidade > self._pico_fila:
+                self._pico_fila = profundidade
+
+    def _garantir_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None and not self._parar.is_set():
+                self._thread = threading.Thread(target=self._executar, name="auditoria", daemon=True)
+                self._thread.start()
+                atexit.register(self.encerrar)
+
+    # ---------- gravação (thread de fundo) ----------
+
+    def _executar(self):
+        # Lotes se formam sozinhos: o que chega enquanto um lote grava vai no próximo
+        while True:
+            try:
+                lote = [self._fila.get(timeout=self.intervalo)]
+            except queue.Empty:
+                lote = []
+            while lote and len(lote) < self.tamanho_lote:
+                try:
+                    lote.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+            # None só acorda a thread no encerrar()
+            lote = [entrada for entrada in lote if entrada is not None]
+            if lote:
+                self._gravar(lote)
+            if self._parar.is_set() and self._fila.empty():
+                return
+
+    def _gravar(self, lote):
+        for tentativa in range(1, self.tentativas + 1):
+            try:
+                self.gravar(lote)
+                break
+            except Exception as e:
+                with self._lock:
+                    self._falhas += 1
+                    self._ultimo_erro = str(e)
+                if tentativa < self.tentativas and not self._parar.is_set():
+                    time.sleep(0.5 * tentativa)
+        else:
+            with self._lock:
+                self._perdidas += len(lote)
+            return
+        with self._lock:
+            self._gravadas += len(lote)
+            self._lotes += 1
+            if len(lote) > self._maior_lote:
+                self._maior_lote = len(lote)
+
+    def encerrar(self, timeout=10.0):
+        # Grava o que está na fila e para a thread (chamada no fim do processo)
+        self._parar.set()
+        try:
+            self._fila.put_nowait(None)
+        except queue.Full:
+            pass
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def reiniciar(self):
+        # Processo filho logo após o fork (servir.py): a thread do master não
+        # veio junto; fila e contadores começam vazios e a thread nasce na
+        # primeira entrada do worker
+        self._iniciar_estado()
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "fila": self._fila.qsize(),
+                "capacidade": self.tamanho_fila,
+                "pico_fila": self._pico_fila,
+                "politica": self.politica,
+                "enfileiradas": self._enfileiradas,
+                "gravadas": self._gravadas,
+                "lotes": self._lotes,
+                "maior_lote": self._maior_lote,
+                "descartadas": self._descartadas,
+                "sincronas": self._sincronas,
+                "falhas": self._falhas,
+                "perdidas": self._perdidas,
+                "ultimo_erro": self._ultimo_erro,
+            }
+
+
+auditoria = Auditoria(
+    tamanho_fila=int(os.environ.get('VIVERE_AUDITORIA_FILA', 10000)),
+    tamanho_lote=int(os.environ.get('VIVERE_AUDITORIA_LOTE', 500)),
+    politica=os.environ.get('VIVERE_AUDITORIA_POLITICA', 'descartar'),
+    espera=float(os.environ.get('VIVERE_AUDITORIA_ESPERA', 0.05)),
+)
@@ -0,0 +1,306 @@
+import heapq
+import os
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from servicos.versoes import versoes_tabelas
+
+# Índice de busca de materiais em memória, para não fazer LIKE '%...%' (varredura
+# completa) a cada tecla digitada.
+#
+# Texto normalizado (minúsculo, sem acento, só letras/números) -> trigramas para
+# "contém" e vocabulário ordenado de palavras para prefixos curtos (1-2 letras).
+# A atualização é incremental: quando a versão da tabela inventario muda ou o
+# TTL vence (escrita de fora), relê id/material/categoria/quantidade e reindexa
+# só as linhas que mudaram. Rajadas de movimentos recarregam no máximo uma vez
+# por intervalo. A releitura roda numa thread à parte e a busca responde com o
+# índice atual enquanto isso; só a primeira carga do processo espera o banco.
+
+LIMITE_PADRAO = 20
+LIMITE_MAXIMO = 100
+# Acima disso um prefixo curto casa palavras demais para juntar as listas
+MAXIMO_LISTAS_PREFIXO = 32
+
+SQL_CARREGAR = "SELECT id, material, categoria, quantidade FROM inventario WHERE material IS NOT NULL"
+
+_NAO_ALFANUMERICO = re.compile(r"[^0-9a-z]+")
+
+
+def normalizar(texto):
+    # "MÃO FRANCESA 1,5m" -> "mao francesa 1 5m"
+    if texto is None:
+        return ""
+    texto = unicodedata.normalize("NFKD", str(texto))
+    texto = "".join(c for c in texto if not unicodedata.combining(c)).casefold()
+    return _NAO_ALFANUMERICO.sub(" ", texto).strip()
+
+
+def trigramas(texto):
+    # Com bordas: " tr", "tre"... trigramas que começam palavra ajudam a filtrar
+    texto = f" {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def postagens(normalizado, trigramas_, palavras, textos):
+    # (índice, chaves do texto nele) para cada um dos três índices
+    return ((trigramas_, trigramas(normalizado)), (palavras, set(normalizado.split())), (textos, (normalizado,)))
+
+
+def carregar_inventario():
+    from servicos.conexao import get_db_connection
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_CARREGAR)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+class IndiceMateriais:
+    def __init__(self, carregar=carregar_inventario, ttl=30.0, intervalo=1.0, tabela="inventario"):
+        self.carregar = carregar
+        self.ttl = ttl
+        self.intervalo = intervalo
+        self.tabela = tabela
+        self._docs = {}        # id -> (material, categoria, quantidade, normalizado)
+        # Listas de postagem já na ordem de desempate (mais curto, depois
+        # alfabético): a busca percorre e para nos primeiros que servem.
+        # Cada item é a chave (len(normalizado), normalizado, id).
+        self._trigramas = {}   # trigrama -> [chave, ...]
+        self._palavras = {}    # palavra -> [chave, ...]
+        self._textos = {}      # normalizado -> [chave, ...] (nome igual à consulta)
+        self._ordenados = []   # todas as chaves
+        self._vocabulario = []
+        self._versao = None
+        self._carregado_em = 0.0
+        self._lock = threading.Lock()
+        self._atualizando = threading.Lock()
+
+        self._buscas = 0
+        self._atualizacoes = 0
+        self._reindexados = 0
+
+    # ---------- manutenção ----------
+
+    def _postagens(self, normalizado):
+        return postagens(normalizado, self._trigramas, self._palavras, self._textos)
+
+    def _reconstruir(self, docs):
+        # Monta tudo fora do lock e troca de uma vez; em ordem global, cada
+        # append já deixa as listas ordenadas
+        ordenados = sorted((len(n), n, i) for i, (_, _, _, n) in docs.items())
+        trigramas_, palavras, textos = {}, {}, {}
+        for chave in ordenados:
+            for indice, chaves in postagens(chave[1], trigramas_, palavras, textos):
+                for k in chaves:
+                    indice.setdefault(k, []).append(chave)
+        vocabulario = sorted(palavras)
+        with self._lock:
+            self._docs = docs
+            self._ordenados = ordenados
+            self._trigramas, self._palavras, self._textos = trigramas_, palavras, textos
+            self._vocabulario = vocabulario
+
+    def _inserir(self, chave):
+        insort(self._ordenados, chave)
+        for indice, chaves in self._postagens(chave[1]):
+            for k in chaves:
+                insort(indice.setdefault(k, []), chave)
+
+    def _remover(self, chave):
+        del self._ordenados[bisect_left(self._ordenados, chave)]
+        for indice, chaves in self._postagens(chave[1]):
+            for k in chaves:
+                lista = indice[k]
+                del lista[bisect_left(lista, chave)]
+                if not lista:
+                    del indice[k]
+
+    def aplicar(self, linhas):
+        # linhas: (id, material, categoria, quantidade) da tabela inteira.
+        # Só reindexa o que mudou de texto; quantidade e categoria mudam no lugar.
+        # Um aplicar por vez (atualizar() garante): a comparação com o índice
+        # atual roda fora do lock e a busca só espera a troca das linhas que mudaram.
+        docs = self._docs
+        novos = {}
+        alterados = {}   # id -> doc novo (None: removido)
+        removidos = []
+        inseridos = []
+        for id_, material, categoria, quantidade in linhas:
+            novos[id_] = None
+            atual = docs.get(id_)
+            if atual is not None and atual[0] == material:
+                if atual[1] != categoria or atual[2] != quantidade:
+                    alterados[id_] = (material, categoria, quantidade, atual[3])
+                continue
+            if atual is not None:
+                removidos.append((len(atual[3]), atual[3], id_))
+            normalizado = normalizar(material)
+            alterados[id_] = (material, categoria, quantidade, normalizado)
+            inseridos.append((len(normalizado), normalizado, id_))
+        for id_, atual in docs.items():
+            if id_ not in novos:
+                alterados[id_] = None
+                removidos.append((len(atual[3]), atual[3], id_))
+
+        reindexados = len(removidos) + len(inseridos)
+        # Carga inicial ou troca grande (importação): reconstrói; senão bisect
+        if reindexados > len(self._ordenados) // 10:
+            novos_docs = dict(docs)
+            for id_, doc in alterados.items():
+                if doc is None:
+                    del novos_docs[id_]
+                else:
+                    novos_docs[id_] = doc
+            self._reconstruir(novos_docs)
+        elif alterados:
+            with self._lock:
+                for id_, doc in alterados.items():
+                    if doc is None:
+                        del self._docs[id_]
+                    else:
+                        self._docs[id_] = doc
+                for chave in removidos:
+                    self._remover(chave)
+                for chave in inseridos:
+                    self._inserir(chave)
+                if reindexados:
+                    self._vocabulario = sorted(self._palavras)
+        with self._lock:
+            self._reindexados += reindexados
+        return reindexados
+
+    def _vencido(self):
+        idade = time.monotonic() - self._carregado_em
+        if idade < self.intervalo:
+            return False
+        return versoes_tabelas.versao(self.tabela) != self._versao or idade >= self.ttl
+
+    def _recarregar(self):
+        # Com self._atualizando já adquirido; libera ao terminar
+        try:
+            versao = versoes_tabelas.versao(self.tabela)
+            self.aplicar(self.carregar())
+            self._versao = versao
+            self._atualizacoes += 1
+        finally:
+            # Falha (banco fora) também conta: a próxima tentativa espera o intervalo
+            self._carregado_em = time.monotonic()
+            self._atualizando.release()
+
+    def atualizar(self, forcar=False):
+        # Síncrona (primeira carga, benchmarks); uma atualização por vez
+        if not forcar and self._versao is not None and not self._vencido():
+            return False
+        if not self._atualizando.acquire(blocking=self._versao is None):
+            return False
+        self._recarregar()
+        return True
+
+    def atualizar_em_segundo_plano(self):
+        # Primeira carga na própria requisição (ainda não há índice para servir);
+        # depois a releitura vai para uma thread e quem busca não espera o banco
+        if self._versao is None:
+            return self.atualizar()
+        if not self._vencido() or not self._atualizando.acquire(blocking=False):
+            return False
+        threading.Thread(target=self._recarregar, name="busca", daemon=True).start()
+        return True
+
+    # ---------- consulta ----------
+
+    def _por_prefixo(self, termo):
+        # Chaves com alguma palavra começando por termo, em ordem. Prefixo muito
+        # comum ("1", "c"): percorre a ordem global e deixa o filtro decidir.
+        inicio = bisect_left(self._vocabulario, termo)
+        fim = bisect_left(self._vocabulario, termo + "\uffff", inicio)
+        if fim - inicio > MAXIMO_LISTAS_PREFIXO:
+            return iter(self._ordenados)
+        listas = [self._palavras[p] for p in self._vocabulario[inicio:fim]]
+        if len(listas) == 1:
+            return iter(listas[0])
+        return heapq.merge(*listas)
+
+    def _por_trigrama(self, termo):
+        # Lista do trigrama interno mais raro; "termo in normalizado" confirma depois
+        listas = [self._trigramas.get(t, []) for t in trigramas(termo) if t[0] != " " and t[-1] != " "]
+        return iter(min(listas, key=len))
+
+    def buscar(self, q, limite=LIMITE_PADRAO, categoria=None):
+        # Ranking em faixas: nome igual > todo termo começa uma palavra > contém.
+        # Dentro da faixa, o nome mais curto primeiro.
+        self.atualizar_em_segundo_plano()
+        consulta = normalizar(q)
+        termos = sorted(set(consulta.split()), key=len, reverse=True)
+        if not termos:
+            return []
+        inicios = [f" {t}" for t in termos]
+
+        def serve(chave):
+            return categoria is None or self._docs[chave[2]][1] == categoria
+
+        with self._lock:
+            self._buscas += 1
+            exatos = [c for c in self._textos.get(consulta, ()) if serve(c)]
+            prefixados = []
+            contidos = []
+            vistos = set()
+
+            # Todo termo começa uma palavra: só quem tem palavra com o prefixo do
+            # termo mais longo. Listas em ordem, então os primeiros bastam.
+            for chave in self._por_prefixo(termos[0]):
+                normalizado = chave[1]
+                if normalizado == consulta or chave[2] in vistos or not serve(chave):
+                    continue
+                if all(t in f" {normalizado}" for t in inicios):
+                    prefixados.append(chave)
+                elif all(t in normalizado for t in termos):
+                    contidos.append(chave)
+                else:
+                    continue
+                vistos.add(chave[2])
+                if len(exatos) + len(prefixados) >= limite:
+                    break
+
+            # Contém: percorre o trigrama mais raro do termo mais longo
+            falta = limite - len(exatos) - len(prefixados)
+            if falta > 0:
+                origem = self._por_trigrama(termos[0]) if len(termos[0]) >= 3 else iter(self._ordenados)
+                encontrados = 0
+                for chave in origem:
+                    normalizado = chave[1]
+                    if normalizado == consulta or chave[2] in vistos or not serve(chave):
+                        continue
+                    if all(t in normalizado for t in termos):
+                        contidos.append(chave)
+                        vistos.add(chave[2])
+                        encontrados += 1
+                        if encontrados >= falta:
+                            break
+
+            melhores = (exatos + prefixados + sorted(contidos))[:limite]
+            return [
+                {"id": i, "material": self._docs[i][0], "categoria": self._docs[i][1],
+                 "quantidade": self._docs[i][2]}
+                for _, _, i in melhores
+            ]
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "materiais": len(self._docs),
+                "trigramas": len(self._trigramas),
+                "palavras": len(self._palavras),
+                "buscas": self._buscas,
+                "atualizacoes": self._atualizacoes,
+                "reindexados": self._reindexados,
+            }
+
+
+indice_materiais = IndiceMateriais(ttl=float(os.environ.get('VIVERE_BUSCA_TTL', 30)))
@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from servicos.versoes import versoes_tabelas
+
+# Cache de leitura em processo (TTL + LRU) para as consultas que os dashboards
+# ficam repetindo. Cada entrada carrega etiquetas ("inventario", "categorias",
+# "materiais:<categoria>"...) e cada escrita invalida só as etiquetas que afetou.
+#
+# A geração de cada etiqueta é um contador de servicos/versoes.py
+# ("cache:<etiqueta>"). Com os contadores compartilhados entre os workers
+# (servir.py), a invalidação feita em um worker vale nos outros: a entrada
+# guardada com a geração antiga deixa de ser servida na próxima leitura.
+
+ETIQUETA_INVENTARIO = "inventario"
+ETIQUETA_CATEGORIAS = "categorias"
+ETIQUETA_MATERIAIS = "materiais"
+
+
+def etiqueta_materiais(categoria):
+    return f"{ETIQUETA_MATERIAIS}:{categoria}"
+
+
+def _contador(etiqueta):
+    return f"cache:{etiqueta}"
+
+
+CONTADOR_LIMPEZA = _contador("*")
+
+
+class CacheLeitura:
+    def __init__(self, ttl=30.0, capacidade=512, versoes=None):
+        self.ttl = ttl
+        self.capacidade = capacidade
+        self.versoes = versoes or versoes_tabelas
+        self._itens = OrderedDict()  # chave -> (expira_em, valor, etiquetas, geracao)
+        self._por_etiqueta = {}
+        self._lock = threading.Lock()
+
+        self._acertos = 0
+        self._faltas = 0
+        self._expiradas = 0
+        self._despejadas = 0
+        self._invalidadas = 0
+
+    def _geracao(self, etiquetas):
+        # Uma carga iniciada antes de uma invalidação não pode gravar o
+        # resultado velho depois dela
+        versao = self.versoes.versao
+        return (versao(CONTADOR_LIMPEZA),) + tuple(versao(_contador(e)) for e in etiquetas)
+
+    def _remover(self, chave):
+        etiquetas = self._itens.pop(chave)[2]
+        for etiqueta in etiquetas:
+            chaves = self._por_etiqueta.get(etiqueta)
+            if chaves is not None:
+                chaves.discard(chave)
+                if not chaves:
+                    del self._por_etiqueta[etiqueta]
+
+    def obter(self, chave, carregar, etiquetas=()):
+        if self.ttl <= 0:
+            return carregar()
+        achou, valor, geracao, agora = self._procurar(chave, etiquetas)
+        if achou:
+            return valor
+        valor = carregar()
+        self._guardar(chave, valor, etiquetas, geracao, agora)
+        return valor
+
+    async def obter_async(self, chave, carregar, etiquetas=()):
+        # Igual a obter(), com carregar assíncrono (api_async.py); o lock só
+        # protege as estruturas e nunca fica preso durante o await
+        if self.ttl <= 0:
+            return await carregar()
+        achou, valor, geracao, agora = self._procurar(chave, etiquetas)
+        if achou:
+            return valor
+        valor = await carregar()
+        self._guardar(chave, valor, etiquetas, geracao, agora)
+        return valor
+
+    def _procurar(self, chave, etiquetas):
+        agora = time.monotonic()
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                if item[0] <= agora:
+                    self._remover(chave)
+                    self._expiradas += 1
+                elif self._geracao(item[2]) != item[3]:
+                    # Invalidada em outro worker
+                    self._remover(chave)
+                    self._invalidadas += 1
+                else:
+                    self._itens.move_to_end(chave)
+                    self._acertos += 1
+                    return True, item[1], None, agora
+            self._faltas += 1
+            return False, None, self._geracao(etiquetas), agora
+
+    def _guardar(self, chave, valor, etiquetas, geracao, agora):
+        with self._lock:
+            if self._geracao(etiquetas) != geracao:
+                return
+            if chave in self._itens:
+                self._remover(chave)
+            self._itens[chave] = (agora + self.ttl, valor, tuple(etiquetas), geracao)
+            for etiqueta in etiquetas:
+                self._por_etiqueta.setdefault(etiqueta, set()).add(chave)
+            while len(self._itens) > self.capacidade:
+                self._remover(next(iter(self._itens)))
+                self._despejadas += 1
+
+    def invalidar(self, *etiquetas):
+        with self._lock:
+            self.versoes.incrementar(*(_contador(e) for e in etiquetas))
+            for etiqueta in etiquetas:
+                for chave in list(self._por_etiqueta.get(etiqueta, ())):
+                    self._remover(chave)
+                    self._invalidadas += 1
+
+    def limpar(self):
+        with self._lock:
+            self.versoes.incrementar(CONTADOR_LIMPEZA)
+            self._invalidadas += len(self._itens)
+            self._itens.clear()
+            self._por_etiqueta.clear()
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self._acertos + self._faltas
+            return {
+                "ttl": self.ttl,
+                "capacidade": self.capacidade,
+                "itens": len(self._itens),
+                "acertos": self._acertos,
+                "faltas": self._faltas,
+                "taxa_acerto": round(self._acertos / consultas, 4) if consultas else None,
+                "expiradas": self._expiradas,
+                "despejadas": self._despejadas,
+                "invalidadas": self._invalidadas,
+            }
+
+
+cache_leitura = CacheLeitura(
+    ttl=float(os.environ.get('VIVERE_CACHE_TTL', 30)),
+    capacidade=int(os.environ.get('VIVERE_CACHE_CAPACIDADE', 512)),
+)
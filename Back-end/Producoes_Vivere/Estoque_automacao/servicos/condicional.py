@@ -0,0 +1,46 @@
+from email.utils import formatdate
+
+from flask import Response, request
+
+from servicos.versoes import versoes_tabelas
+
+# GET condicional (If-None-Match / If-Modified-Since) sobre as versões das tabelas.
+
+
+def resposta_condicional(tabelas, gerar):
+    # gerar: função que monta a resposta completa; só é chamada se o cliente
+    # não tiver a versão atual. A ETag é lida antes de gerar: se uma escrita
+    # acontecer no meio, o cliente recebe a ETag antiga e revalida de novo.
+    etag, modificado, atual = avaliar(tabelas, request)
+    if atual:
+        resposta = Response(status=304)
+    else:
+        resposta = gerar()
+        if isinstance(resposta, tuple) or resposta.status_code != 200:
+            return resposta
+    return marcar(resposta, etag, modificado)
+
+
+def avaliar(tabelas, pedido):
+    # pedido: request do Flask ou do Quart (mesmos cabeçalhos parseados)
+    if isinstance(tabelas, str):
+        tabelas = (tabelas,)
+    etag = versoes_tabelas.etag(*tabelas)
+    modificado = int(max(versoes_tabelas.modificado_em(t) for t in tabelas))
+
+    if pedido.if_none_match:
+        atual = pedido.if_none_match.contains(etag)
+    elif pedido.if_modified_since:
+        # Last-Modified tem resolução de segundo; duas escritas no mesmo segundo
+        # seriam indistinguíveis, então só confirma datas estritamente posteriores
+        atual = modificado < int(pedido.if_modified_since.timestamp())
+    else:
+        atual = False
+    return etag, modificado, atual
+
+
+def marcar(resposta, etag, modificado):
+    resposta.set_etag(etag)
+    resposta.headers["Last-Modified"] = formatdate(modificado, usegmt=True)
+    resposta.headers["Cache-Control"] = "no-cache"
+    return resposta
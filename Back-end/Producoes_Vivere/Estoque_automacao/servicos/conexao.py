@@ -0,0 +1,241 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import mysql.connector
+
+# Dados da conexão compartilhados pelas rotas do app.py (rotas/) e pelo EstoqueService
+# (podem ser sobrescritos por variáveis de ambiente no servidor do evento)
+DB_CONFIG = {
+    'host': os.environ.get('VIVERE_DB_HOST', '127.0.0.1'),
+    'user': os.environ.get('VIVERE_DB_USUARIO', 'root'),
+    'password': os.environ.get('VIVERE_DB_SENHA', 'Art_@2002'),
+    'database': os.environ.get('VIVERE_DB_NOME', 'vivere_estoque'),
+}
+
+POOL_CONFIG = {
+    'tamanho': int(os.environ.get('VIVERE_POOL_TAMANHO', 5)),
+    'overflow': int(os.environ.get('VIVERE_POOL_OVERFLOW', 10)),
+    'timeout': float(os.environ.get('VIVERE_POOL_TIMEOUT', 10)),
+    'verificar_ao_emprestar': os.environ.get('VIVERE_POOL_VERIFICAR', '1') != '0',
+}
+
+
+class PoolEsgotadoError(Exception):
+    pass
+
+
+class ConexaoDoPool:
+    # Envolve a conexão real: close() devolve ao pool em vez de derrubar o socket,
+    # assim as rotas antigas (conn.close()) continuam funcionando sem mudança.
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, nome):
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            raise mysql.connector.errors.OperationalError("Conexão já devolvida ao pool.")
+        return getattr(conn, nome)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        conn = self.__dict__.get('_conn')
+        if conn is not None:
+            self._conn = None
+            self._pool._devolver(conn)
+
+    def __del__(self):
+        # Rede de segurança para rotas que retornam sem fechar a conexão
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def descartar(self):
+        # Usado quando a conexão ficou em estado duvidoso (erro de rede, etc.)
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool._devolver(conn, descartar=True)
+
+
+class PoolConexoes:
+    def __init__(self, db_config, tamanho=5, overflow=10, timeout=10, verificar_ao_emprestar=True):
+        self.db_config = dict(db_config)
+        self.tamanho = tamanho
+        self.overflow = overflow
+        self.timeout = timeout
+        self.verificar_ao_emprestar = verificar_ao_emprestar
+
+        self._livres = deque()
+        self._cond = threading.Condition()
+        self._abertas = 0
+        self._em_uso = 0
+
+        # Estatísticas para dimensionar o pool
+        self._emprestimos = 0
+        self._esperas = 0
+        self._tempo_espera_total = 0.0
+        self._tempo_espera_max = 0.0
+        self._timeouts = 0
+        self._criadas = 0
+        self._descartadas = 0
+
+    def _conectar(self):
+        conn = mysql.connector.connect(**self.db_config)
+        with self._cond:
+            self._criadas += 1
+        return conn
+
+    def _saudavel(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _fechar(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def obter(self):
+        inicio = None
+        with self._cond:
+            while True:
+                if self._livres:
+                    conn = self._livres.pop()
+                    break
+                if self._abertas < self.tamanho + self.overflow:
+                    # Reserva a vaga antes de conectar, fora do lock
+                    self._abertas += 1
+                    conn = None
+                    break
+                if inicio is None:
+                    inicio = time.monotonic()
+                    self._esperas += 1
+                restante = self.timeout - (time.monotonic() - inicio)
+                if restante <= 0:
+                    self._timeouts += 1
+                    self._registrar_espera(inicio)
+                    raise PoolEsgotadoError(
+                        f"Nenhuma conexão livre após {self.timeout}s "
+                        f"({self._em_uso} em uso, limite {self.tamanho + self.overflow})."
+                    )
+                self._cond.wait(restante)
+            self._em_uso += 1
+            self._emprestimos += 1
+            if inicio is not None:
+                self._registrar_espera(inicio)
+
+        try:
+            if conn is None:
+                conn = self._conectar()
+            elif self.verificar_ao_emprestar and not self._saudavel(conn):
+                self._fechar(conn)
+                with self._cond:
+                    self._descartadas += 1
+                conn = self._conectar()
+        except Exception:
+            with self._cond:
+                self._em_uso -= 1
+                self._abertas -= 1
+                self._cond.notify()
+            raise
+        return ConexaoDoPool(self, conn)
+
+    def _registrar_espera(self, inicio):
+        espera = time.monotonic() - inicio
+        self._tempo_espera_total += espera
+        self._tempo_espera_max = max(self._tempo_espera_max, espera)
+
+    def _devolver(self, conn, descartar=False):
+        if not descartar:
+            try:
+                # Descarta qualquer transação pendente deixada pela rota
+                conn.rollback()
+            except Exception:
+                descartar = True
+
+        with self._cond:
+            self._em_uso -= 1
+            # Conexões de overflow são fechadas assim que sobram
+            if descartar or len(self._livres) >= self.tamanho:
+                self._abertas -= 1
+                self._descartadas += 1
+                fechar = True
+            else:
+                self._livres.append(conn)
+                fechar = False
+            self._cond.notify()
+
+        if fechar:
+            self._fechar(conn)
+
+    @contextmanager
+    def conexao(self):
+        conn = self.obter()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def reiniciar(self):
+        # Chamado no processo filho logo após o fork (servir.py --preload): as
+        # conexões herdadas dividem o socket com o master e os outros workers,
+        # então são esquecidas sem close() (que mandaria COM_QUIT pelo socket
+        # compartilhado). O lock também é recriado.
+        self._livres = deque()
+        self._cond = threading.Condition()
+        self._abertas = 0
+        self._em_uso = 0
+
+    def fechar(self):
+        with self._cond:
+            livres = list(self._livres)
+            self._livres.clear()
+            self._abertas -= len(livres)
+        for conn in livres:
+            self._fechar(conn)
+
+    def estatisticas(self):
+        with self._cond:
+            return {
+                "tamanho": self.tamanho,
+                "overflow": self.overflow,
+                "abertas": self._abertas,
+                "livres": len(self._livres),
+                "em_uso": self._em_uso,
+                "emprestimos": self._emprestimos,
+                "esperas": self._esperas,
+                "tempo_espera_total_ms": round(self._tempo_espera_total * 1000, 3),
+                "tempo_espera_max_ms": round(self._tempo_espera_max * 1000, 3),
+                "timeouts": self._timeouts,
+                "criadas": self._criadas,
+                "descartadas": self._descartadas,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexoes(DB_CONFIG, **POOL_CONFIG)
+    return _pool
+
+
+def get_db_connection():
+    return obter_pool().obter()
@@ -0,0 +1,98 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+import aiomysql
+
+from servicos.conexao import DB_CONFIG, PoolEsgotadoError
+
+# Pool assíncrono (aiomysql) do api_async.py. Quem espera o MySQL é uma
+# corrotina, não uma thread: centenas de clientes cabem num processo e o limite
+# passa a ser só o número de conexões abertas. Passou do máximo, a requisição
+# espera na fila do pool até o timeout, como no PoolConexoes.
+#
+# Só leituras passam por aqui (autocommit, sem transação aberta entre
+# requisições); escritas usam o EstoqueService e o pool síncrono
+# (servicos/estoque_async.py).
+
+POOL_ASYNC_CONFIG = {
+    'minimo': int(os.environ.get('VIVERE_POOL_ASYNC_MINIMO', 5)),
+    'maximo': int(os.environ.get('VIVERE_POOL_ASYNC_MAXIMO', 20)),
+    'timeout': float(os.environ.get('VIVERE_POOL_TIMEOUT', 10)),
+    'reciclar': int(os.environ.get('VIVERE_POOL_ASYNC_RECICLAR', 3600)),
+}
+
+
+class PoolAssincrono:
+    def __init__(self, db_config, minimo=5, maximo=20, timeout=10, reciclar=3600):
+        self.db_config = dict(db_config)
+        self.minimo = minimo
+        self.maximo = maximo
+        self.timeout = timeout
+        self.reciclar = reciclar
+        self._pool = None
+        self._emprestimos = 0
+        self._timeouts = 0
+        self._descartadas = 0
+
+    async def abrir(self):
+        # Chamado no before_serving: o pool fica preso ao event loop do servidor
+        if self._pool is None:
+            self._pool = await aiomysql.create_pool(
+                host=self.db_config['host'], user=self.db_config['user'],
+                password=self.db_config['password'], db=self.db_config['database'],
+                minsize=self.minimo, maxsize=self.maximo, pool_recycle=self.reciclar,
+                autocommit=True, charset='utf8mb4',
+            )
+        return self
+
+    @asynccontextmanager
+    async def conexao(self):
+        if self._pool is None:
+            await self.abrir()
+        try:
+            conn = await asyncio.wait_for(self._pool.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise PoolEsgotadoError(
+                f"Nenhuma conexão livre após {self.timeout}s (limite {self.maximo})."
+            )
+        self._emprestimos += 1
+        try:
+            yield conn
+        except BaseException:
+            # Erro ou cancelamento (cliente desconectou) no meio de uma leitura:
+            # pode haver linhas pendentes no socket, então a conexão não volta
+            conn.close()
+            self._descartadas += 1
+            raise
+        finally:
+            self._pool.release(conn)
+
+    async def fechar(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    def estatisticas(self):
+        return {
+            "minimo": self.minimo,
+            "maximo": self.maximo,
+            "abertas": self._pool.size if self._pool else 0,
+            "livres": self._pool.freesize if self._pool else 0,
+            "emprestimos": self._emprestimos,
+            "timeouts": self._timeouts,
+            "descartadas": self._descartadas,
+        }
+
+
+_pool = None
+
+
+def obter_pool_async():
+    # Sem lock: criado e usado sempre na thread do event loop
+    global _pool
+    if _pool is None:
+        _pool = PoolAssincrono(DB_CONFIG, **POOL_ASYNC_CONFIG)
+    return _pool
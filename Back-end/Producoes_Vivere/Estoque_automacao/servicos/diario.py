@@ -0,0 +1,452 @@
+import json
+import os
+import threading
+import zlib
+
+from servicos.movimentacao import validar_movimento, ler_material_id, agora
+
+# Diário local (write-ahead) dos movimentos, para o MySQL parado (backup, lock
+# no inventario) não segurar a equipe no caminhão. Opcional: VIVERE_DIARIO=1.
+#
+# POST /api/movimentos e POST /api/estoque validam o pedido, acrescentam uma
+# linha ao diário, esperam o fsync e respondem 202 com o seq da linha. Uma
+# thread (ReprodutorDiario) aplica as linhas no banco em ordem e em lotes pelo
+# EstoqueService.aplicar_diario, que grava o último seq aplicado na mesma
+# transação (tabela diario_aplicado, V009): cada linha vale exatamente uma vez,
+# mesmo com queda no meio de um lote. Linha recusada pelo banco (material
+# sumiu, saldo não basta) vai para a auditoria como diario_recusado.
+#
+# Arquivos: <VIVERE_DIARIO_PASTA>/<slot>/<primeiro seq>.diario, uma linha
+# "seq<TAB>crc32<TAB>json" por movimento. O segmento troca ao passar de
+# VIVERE_DIARIO_SEGMENTO bytes; segmentos já aplicados são apagados, menos o
+# último (é o nome dele que guarda o próximo seq). Na abertura, a última linha
+# cortada ao meio por uma queda (crc não confere) é descartada: ela nunca foi
+# confirmada ao cliente.
+#
+# Cada processo (worker do gunicorn) trava um slot com flock e tem a própria
+# sequência: a ordem vale dentro do slot. Um slot sem dono (worker que saiu e
+# não voltou) é esvaziado por reproduzir_diario.py. O lote
+# (/api/movimentos/lote) continua indo direto ao banco.
+#
+# O seq aplicado fica no banco sob "<VIVERE_DIARIO_NOME>/<slot>", não sob o
+# caminho da pasta: mudar o código de diretório não zera a marca. Por isso
+# VIVERE_DIARIO_PASTA é obrigatória com o diário ligado e não pode ficar dentro
+# da árvore do código (um deploy novo deixaria os movimentos já confirmados com
+# 202 na pasta antiga). Dois servidores no mesmo banco precisam de nomes diferentes.
+
+DIARIO_CONFIG = {
+    'ativo': os.environ.get('VIVERE_DIARIO', '0') == '1',
+    'pasta': os.environ.get('VIVERE_DIARIO_PASTA'),
+    'nome': os.environ.get('VIVERE_DIARIO_NOME', 'vivere'),
+    'segmento': int(os.environ.get('VIVERE_DIARIO_SEGMENTO', 16 * 1024 * 1024)),
+    'lote': int(os.environ.get('VIVERE_DIARIO_LOTE', 500)),
+    # 0 só para teste: sem fsync a confirmação não sobrevive a queda de energia
+    'fsync': os.environ.get('VIVERE_DIARIO_FSYNC', '1') != '0',
+}
+
+SQL_ULTIMO_APLICADO = "SELECT ultimo_seq FROM diario_aplicado WHERE diario = %s"
+SQL_SALVAR_APLICADO = (
+    "INSERT INTO diario_aplicado (diario, ultimo_seq, atualizado_em) VALUES (%s, %s, NOW()) "
+    "ON DUPLICATE KEY UPDATE ultimo_seq = VALUES(ultimo_seq), atualizado_em = VALUES(atualizado_em)"
+)
+
+EXTENSAO = ".diario"
+MAX_SLOTS = 256
+
+PASTA_CODIGO = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+class SlotOcupadoError(Exception):
+    pass
+
+
+class DiarioInconsistenteError(Exception):
+    pass
+
+
+class DiarioConfiguracaoError(Exception):
+    pass
+
+
+def validar_pasta(pasta):
+    if not pasta:
+        raise DiarioConfiguracaoError("VIVERE_DIARIO=1 exige VIVERE_DIARIO_PASTA (fora da pasta do código).")
+    real = os.path.realpath(pasta)
+    if os.path.commonpath([real, PASTA_CODIGO]) == PASTA_CODIGO:
+        raise DiarioConfiguracaoError(
+            f"VIVERE_DIARIO_PASTA ({real}) está dentro do código ({PASTA_CODIGO}); "
+            "um deploy em outro diretório abandonaria o diário.")
+    return real
+
+
+def codificar(seq, registro):
+    corpo = json.dumps(registro, ensure_ascii=False, separators=(",", ":")).encode()
+    return b"%d\t%08x\t%s\n" % (seq, zlib.crc32(corpo), corpo)
+
+
+def decodificar(linha):
+    # None para linha incompleta ou corrompida
+    if not linha.endswith(b"\n"):
+        return None
+    try:
+        seq, crc, corpo = linha[:-1].split(b"\t", 2)
+        if int(crc, 16) != zlib.crc32(corpo):
+            return None
+        return int(seq), json.loads(corpo)
+    except ValueError:
+        return None
+
+
+def _sincronizar_pasta(pasta):
+    # O arquivo novo só sobrevive a uma queda depois do fsync da pasta
+    if os.name == "nt":
+        return
+    fd = os.open(pasta, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _travar(caminho):
+    try:
+        import fcntl
+    except ImportError:
+        # Windows (waitress, um processo só): sem trava entre processos
+        return open(caminho, "a")
+    trava = open(caminho, "a")
+    try:
+        fcntl.flock(trava, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        trava.close()
+        raise SlotOcupadoError(caminho)
+    return trava
+
+
+class Diario:
+    def __init__(self, pasta, nome, tamanho_segmento=16 * 1024 * 1024, fsync=True):
+        # pasta: a do slot; use abrir_slot() para escolher uma livre.
+        # nome: chave estável do slot em diario_aplicado ("<nome>/<slot>")
+        self.pasta = os.path.abspath(pasta)
+        self.nome = nome
+        self.tamanho_segmento = tamanho_segmento
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._novos = threading.Condition(threading.Lock())
+        self._trava = None
+        self._arquivo = None
+        self._segmentos = []    # primeiro seq de cada segmento, em ordem
+        self._proximo = 1
+        self._escrito = 0       # último seq escrito no arquivo
+        self._duravel = 0       # último seq com fsync (pode ser lido pelo reprodutor)
+
+        self._registros = 0
+        self._fsyncs = 0
+        self._descartadas_na_abertura = 0
+
+    # ---------- abertura ----------
+
+    def abrir(self):
+        os.makedirs(self.pasta, exist_ok=True)
+        self._trava = _travar(os.path.join(self.pasta, "trava"))
+        self._segmentos = sorted(int(n[:-len(EXTENSAO)]) for n in os.listdir(self.pasta) if n.endswith(EXTENSAO))
+        if not self._segmentos:
+            self._segmentos = [1]
+            open(self._caminho(1), "wb").close()
+            _sincronizar_pasta(self.pasta)
+
+        # Só o último segmento pode ter uma linha cortada pela queda
+        ultimo = self._segmentos[-1]
+        valido, seq = 0, ultimo - 1
+        with open(self._caminho(ultimo), "rb") as arquivo:
+            for linha in arquivo:
+                lida = decodificar(linha)
+                if lida is None:
+                    self._descartadas_na_abertura += 1
+                    break
+                valido += len(linha)
+                seq = lida[0]
+        if self._descartadas_na_abertura:
+            with open(self._caminho(ultimo), "r+b") as arquivo:
+                arquivo.truncate(valido)
+                os.fsync(arquivo.fileno())
+
+        self._proximo = seq + 1
+        self._escrito = self._duravel = seq
+        self._arquivo = open(self._caminho(ultimo), "ab")
+        return self
+
+    def fechar(self):
+        with self._lock:
+            if self._arquivo is not None:
+                self._arquivo.close()
+                self._arquivo = None
+            if self._trava is not None:
+                self._trava.close()
+                self._trava = None
+
+    def _caminho(self, primeiro):
+        return os.path.join(self.pasta, f"{primeiro:016d}{EXTENSAO}")
+
+    # ---------- escrita ----------
+
+    def acrescentar(self, registro):
+        # Volta depois do fsync: só então o movimento pode ser confirmado ao cliente
+        with self._lock:
+            seq = self._proximo
+            self._arquivo.write(codificar(seq, registro))
+            self._arquivo.flush()
+            self._proximo += 1
+            self._escrito = seq
+            self._registros += 1
+            if self._arquivo.tell() >= self.tamanho_segmento:
+                self._trocar_segmento()
+        self._sincronizar(seq)
+        with self._novos:
+            self._novos.notify_all()
+        return seq
+
+    def _trocar_segmento(self):
+        # Com self._lock: o segmento velho vai inteiro para o disco antes de fechar
+        if self.fsync:
+            os.fsync(self._arquivo.fileno())
+            self._fsyncs += 1
+        self._arquivo.close()
+        self._duravel = max(self._duravel, self._escrito)
+        self._segmentos.append(self._proximo)
+        self._arquivo = open(self._caminho(self._proximo), "ab")
+        _sincronizar_pasta(self.pasta)
+
+    def _sincronizar(self, seq):
+        # Group commit: um fsync cobre tudo o que foi escrito até ele, então
+        # com N requisições simultâneas a maioria só espera o fsync de outra
+        if not self.fsync:
+            self._duravel = max(self._duravel, seq)
+            return
+        with self._sync_lock:
+            if self._duravel >= seq:
+                return
+            with self._lock:
+                alvo = self._escrito
+                fd = self._arquivo.fileno()
+            try:
+                os.fsync(fd)
+            except OSError:
+                # O segmento foi trocado (e sincronizado por inteiro) no meio do caminho
+                if self._duravel < seq:
+                    raise
+                return
+            self._fsyncs += 1
+            self._duravel = max(self._duravel, alvo)
+
+    def registrar_movimento(self, material, tipo, quantidade, deposito=None, categoria=None, material_id=None):
+        # Mesmas validações do EstoqueService.registrar_movimento; o que depende
+        # do banco (material existe, saldo basta) fica para o reprodutor
+        quantidade = validar_movimento(tipo, quantidade)
+        material_id = ler_material_id(material_id)
+        if deposito is not None and deposito != "":
+            try:
+                deposito = int(deposito)
+            except (TypeError, ValueError):
+                raise ValueError("Depósito inválido.")
+        else:
+            deposito = None
+        registro = {"material": material, "tipo": tipo, "quantidade": quantidade,
+                    "deposito": deposito, "horario": agora()}
+        if categoria is not None:
+            registro["categoria"] = categoria
+        if material_id is not None:
+            registro["material_id"] = material_id
+        return self.acrescentar(registro)
+
+    def registrar_entrada(self, material_id, quantidade, observacao=""):
+        return self.acrescentar({"material_id": material_id, "tipo": "entrada", "quantidade": quantidade,
+                                 "observacao": observacao, "horario": agora()})
+
+    # ---------- leitura (reprodutor) ----------
+
+    def ler(self, depois_de, maximo, posicao=None):
+        # Até `maximo` linhas duráveis com seq > depois_de. posicao (segmento,
+        # deslocamento) devolvida pela chamada anterior evita reler o segmento.
+        with self._lock:
+            segmentos = list(self._segmentos)
+        duravel = self._duravel
+        if posicao is None or posicao[0] not in segmentos:
+            inicio = max((s for s in segmentos if s <= depois_de + 1), default=segmentos[0])
+            posicao = (inicio, 0)
+        registros = []
+        segmento, deslocamento = posicao
+        while len(registros) < maximo:
+            fim = True
+            with open(self._caminho(segmento), "rb") as arquivo:
+                arquivo.seek(deslocamento)
+                for linha in arquivo:
+                    lida = decodificar(linha)
+                    if lida is None or lida[0] > duravel:
+                        # Linha ainda sem fsync: fica para a próxima leitura
+                        fim = False
+                        break
+                    deslocamento += len(linha)
+                    if lida[0] > depois_de:
+                        registros.append(lida)
+                        if len(registros) >= maximo:
+                            fim = False
+                            break
+            # Fim de um segmento que já tem sucessor: ele está completo, segue para o próximo
+            seguinte = [s for s in segmentos if s > segmento]
+            if not fim or not seguinte:
+                break
+            segmento, deslocamento = seguinte[0], 0
+        return registros, (segmento, deslocamento)
+
+    def descartar_ate(self, seq):
+        # Apaga os segmentos com tudo já aplicado, nunca o atual
+        with self._lock:
+            while len(self._segmentos) > 1 and self._segmentos[1] <= seq + 1:
+                os.remove(self._caminho(self._segmentos.pop(0)))
+
+    def esperar(self, seq, timeout):
+        # Reprodutor dormindo até chegar linha depois de seq
+        with self._novos:
+            if self._duravel <= seq:
+                self._novos.wait(timeout)
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "diario": self.nome,
+                "proximo_seq": self._proximo,
+                "duravel": self._duravel,
+                "segmentos": len(self._segmentos),
+                "registros": self._registros,
+                "fsyncs": self._fsyncs,
+                "descartadas_na_abertura": self._descartadas_na_abertura,
+            }
+
+
+def nome_slot(nome, slot):
+    return f"{nome}/{slot}"
+
+
+def abrir_slot(pasta, nome, tamanho_segmento=16 * 1024 * 1024, fsync=True, slots=range(MAX_SLOTS)):
+    # Primeiro slot livre (sem outro processo com a trava)
+    for slot in slots:
+        try:
+            return Diario(os.path.join(pasta, str(slot)), nome_slot(nome, slot), tamanho_segmento, fsync).abrir()
+        except SlotOcupadoError:
+            continue
+    raise SlotOcupadoError(f"todos os slots de {pasta} estão ocupados")
+
+
+class ReprodutorDiario:
+    def __init__(self, diario, servico=None, lote=500, intervalo=1.0, espera_maxima=30.0):
+        self.diario = diario
+        self.servico = servico
+        self.lote = lote
+        self.intervalo = intervalo
+        self.espera_maxima = espera_maxima
+        self._parar = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self._aplicado = None
+        self._lotes = 0
+        self._aplicados = 0
+        self._recusados = 0
+        self._falhas = 0
+        self._ultimo_erro = None
+
+    def _servico(self):
+        if self.servico is None:
+            from servicos.estoque import obter_estoque
+            self.servico = obter_estoque()
+        return self.servico
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._executar, name="diario", daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self, timeout=10.0):
+        self._parar.set()
+        with self.diario._novos:
+            self.diario._novos.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def reproduzir(self):
+        # Aplica tudo o que está no diário e volta (reproduzir_diario.py e a thread)
+        servico = self._servico()
+        # Antes do nome estável a chave era o caminho da pasta: vale como ponto de partida
+        aplicado = servico.ultimo_aplicado_diario(self.diario.nome, legado=self.diario.pasta)
+        if aplicado >= self.diario._proximo:
+            # O banco já aplicou um seq que o diário ainda não deu: a pasta foi
+            # apagada ou trocada. Aplicar agora pularia movimentos novos.
+            raise DiarioInconsistenteError(
+                f"{self.diario.nome}: banco em {aplicado}, diário em {self.diario._proximo - 1}")
+        posicao = None
+        while not self._parar.is_set():
+            registros, posicao = self.diario.ler(aplicado, self.lote, posicao)
+            if not registros:
+                break
+            resultado = servico.aplicar_diario(self.diario.nome, registros)
+            aplicado = registros[-1][0]
+            self.diario.descartar_ate(aplicado)
+            with self._lock:
+                self._aplicado = aplicado
+                self._lotes += 1
+                self._aplicados += resultado["aplicados"]
+                self._recusados += resultado["recusados"]
+        return aplicado
+
+    def _executar(self):
+        espera = self.intervalo
+        while not self._parar.is_set():
+            try:
+                aplicado = self.reproduzir()
+                espera = self.intervalo
+                self.diario.esperar(aplicado, self.intervalo)
+            except Exception as e:
+                # Banco fora do ar: tenta de novo com espera crescente; o diário segura tudo
+                with self._lock:
+                    self._falhas += 1
+                    self._ultimo_erro = str(e)
+                self._parar.wait(espera)
+                espera = min(espera * 2, self.espera_maxima)
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                **self.diario.estatisticas(),
+                "aplicado": self._aplicado,
+                "pendentes": self.diario._duravel - self._aplicado if self._aplicado is not None else None,
+                "lotes": self._lotes,
+                "aplicados": self._aplicados,
+                "recusados": self._recusados,
+                "falhas": self._falhas,
+                "ultimo_erro": self._ultimo_erro,
+            }
+
+
+_reprodutor = None
+_reprodutor_lock = threading.Lock()
+
+
+def obter_diario(config=DIARIO_CONFIG):
+    # None com o diário desligado; senão abre o slot e sobe o reprodutor na
+    # primeira chamada do processo (depois do fork, no caso do gunicorn)
+    global _reprodutor
+    if not config['ativo']:
+        return None
+    if _reprodutor is None:
+        with _reprodutor_lock:
+            if _reprodutor is None:
+                pasta = validar_pasta(config['pasta'])
+                diario = abrir_slot(pasta, config['nome'], config['segmento'], config['fsync'])
+                _reprodutor = ReprodutorDiario(diario, lote=config['lote']).iniciar()
+    return _reprodutor.diario
+
+
+def estatisticas_diario():
+    return _reprodutor.estatisticas() if _reprodutor is not None else None
@@ -0,0 +1,373 @@
+import os
+import threading
+import time
+from datetime import date
+
+# Disponibilidade de material por período a partir das reservas dos eventos
+# (tabela reservas_eventos, migração V004).
+#
+# Para cada material, uma árvore de segmentos esparsa sobre os dias guarda
+# quanto está reservado em cada dia: reservar soma a quantidade no intervalo
+# [data_inicio, data_fim] do evento e "quanto está livre de 10/09 a 12/09" é
+# estoque - maior reserva num dia do intervalo, ambos em O(log dias).
+#
+# A gravação de uma reserva é conferida no banco (linha do inventário travada +
+# varredura dos eventos que se sobrepõem), então dois workers não vendem a mesma
+# peça duas vezes; o motor em memória serve as leituras e é atualizado depois do
+# commit, com ressincronização por TTL para escritas de outros processos.
+
+DIA_MINIMO = date(2000, 1, 1).toordinal()
+DIA_MAXIMO = date(2099, 12, 31).toordinal()
+# Eventos com estes status não seguram material
+STATUS_SEM_RESERVA = ("Cancelado",)
+
+SQL_RESERVAS = """
+    SELECT r.id, r.evento_id, r.material, r.categoria, r.quantidade, e.data_inicio, e.data_fim, e.status
+    FROM reservas_eventos r
+    JOIN eventos e ON e.id = r.evento_id
+"""
+SQL_TRAVAR_ESTOQUE = (
+    "SELECT COALESCE(SUM(quantidade), 0), COUNT(*) FROM inventario "
+    "WHERE material = %s AND COALESCE(categoria, '') = %s FOR UPDATE"
+)
+# Reservas do mesmo material em eventos que cruzam o período (menos o próprio
+# evento e os que não seguram material, como o motor em memória)
+SQL_RESERVAS_SOBREPOSTAS = """
+    SELECT e.data_inicio, e.data_fim, r.quantidade
+    FROM reservas_eventos r
+    JOIN eventos e ON e.id = r.evento_id
+    WHERE r.material = %s AND r.categoria = %s AND r.evento_id <> %s
+      AND e.data_inicio <= %s AND e.data_fim >= %s
+      AND COALESCE(e.status, '') NOT IN ({})
+""".format(", ".join(["%s"] * len(STATUS_SEM_RESERVA)))
+SQL_RESERVAS_DO_EVENTO = """
+    SELECT material, categoria, quantidade FROM reservas_eventos
+    WHERE evento_id = %s ORDER BY material, categoria FOR UPDATE
+"""
+SQL_SALVAR_RESERVA = """
+    INSERT INTO reservas_eventos (evento_id, material, categoria, quantidade)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id), quantidade = VALUES(quantidade)
+"""
+
+
+class SemDisponibilidadeError(ValueError):
+    def __init__(self, mensagem, livre):
+        super().__init__(mensagem)
+        self.livre = livre
+
+
+def ler_data(valor, nome="data"):
+    if isinstance(valor, date):
+        return valor
+    try:
+        return date.fromisoformat(str(valor)[:10])
+    except (TypeError, ValueError):
+        raise ValueError(f"{nome} deve estar no formato AAAA-MM-DD.")
+
+
+def dia(valor):
+    ordinal = ler_data(valor).toordinal()
+    if not DIA_MINIMO <= ordinal <= DIA_MAXIMO:
+        raise ValueError("Data fora do intervalo suportado (2000 a 2099).")
+    return ordinal
+
+
+def _valores(row):
+    # Aceita cursor comum ou dictionary=True
+    return tuple(row.values()) if isinstance(row, dict) else row
+
+
+def pico_reservado(intervalos, inicio, fim):
+    # Linha de varredura: maior soma de quantidades num mesmo dia de [inicio, fim].
+    # intervalos: [(ini, fim, quantidade)] em ordinais, fim inclusivo.
+    marcos = []
+    for ini, fim_intervalo, quantidade in intervalos:
+        ini, fim_intervalo = max(ini, inicio), min(fim_intervalo, fim)
+        if ini <= fim_intervalo:
+            marcos.append((ini, quantidade))
+            marcos.append((fim_intervalo + 1, -quantidade))
+    # Saídas antes das entradas no mesmo dia: quem termina ontem não soma com quem começa hoje
+    marcos.sort(key=lambda m: (m[0], m[1]))
+    pico = atual = 0
+    for _, delta in marcos:
+        atual += delta
+        pico = max(pico, atual)
+    return pico
+
+
+class ArvoreReservas:
+    # Árvore de segmentos esparsa (nós criados sob demanda) com soma em
+    # intervalo e máximo em intervalo. A soma pendente fica no nó e não desce:
+    # maximo[nó] = pendente[nó] + max(maximo dos filhos).
+
+    def __init__(self, inicio=DIA_MINIMO, fim=DIA_MAXIMO):
+        self.inicio = inicio
+        self.fim = fim
+        # Listas paralelas; 0 nos filhos significa "sem filho" (a raiz nunca é filha)
+        self._esquerda = [0]
+        self._direita = [0]
+        self._maximo = [0]
+        self._pendente = [0]
+
+    def _novo(self):
+        self._esquerda.append(0)
+        self._direita.append(0)
+        self._maximo.append(0)
+        self._pendente.append(0)
+        return len(self._maximo) - 1
+
+    def somar(self, inicio, fim, valor):
+        self._somar(0, self.inicio, self.fim, inicio, fim, valor)
+
+    def _somar(self, no, lo, hi, inicio, fim, valor):
+        if inicio <= lo and hi <= fim:
+            self._pendente[no] += valor
+            self._maximo[no] += valor
+            return
+        meio = (lo + hi) // 2
+        if inicio <= meio:
+            if not self._esquerda[no]:
+                self._esquerda[no] = self._novo()
+            self._somar(self._esquerda[no], lo, meio, inicio, fim, valor)
+        if fim > meio:
+            if not self._direita[no]:
+                self._direita[no] = self._novo()
+            self._somar(self._direita[no], meio + 1, hi, inicio, fim, valor)
+        esquerda, direita = self._esquerda[no], self._direita[no]
+        self._maximo[no] = self._pendente[no] + max(
+            self._maximo[esquerda] if esquerda else 0,
+            self._maximo[direita] if direita else 0,
+        )
+
+    def maximo(self, inicio, fim):
+        return self._max(0, self.inicio, self.fim, inicio, fim)
+
+    def _max(self, no, lo, hi, inicio, fim):
+        if inicio <= lo and hi <= fim:
+            return self._maximo[no]
+        meio = (lo + hi) // 2
+        melhor = 0
+        if inicio <= meio and self._esquerda[no]:
+            melhor = self._max(self._esquerda[no], lo, meio, inicio, fim)
+        if fim > meio and self._direita[no]:
+            melhor = max(melhor, self._max(self._direita[no], meio + 1, hi, inicio, fim))
+        return self._pendente[no] + melhor
+
+    def acima_de(self, limite, inicio=None, fim=None):
+        # Trechos contínuos [(ini, fim, pico)] com reserva > limite; só desce em
+        # nós cujo máximo passa do limite.
+        trechos = []
+        self._acima(0, self.inicio, self.fim, limite,
+                    self.inicio if inicio is None else inicio,
+                    self.fim if fim is None else fim, 0, trechos)
+        return trechos
+
+    def _acima(self, no, lo, hi, limite, inicio, fim, acumulado, trechos):
+        if hi < inicio or lo > fim or acumulado + self._maximo[no] <= limite:
+            return
+        acumulado += self._pendente[no]
+        esquerda, direita = self._esquerda[no], self._direita[no]
+        if not esquerda and not direita:
+            self._juntar(trechos, max(lo, inicio), min(hi, fim), acumulado)
+            return
+        meio = (lo + hi) // 2
+        # Metade sem filho tem reserva = acumulado no intervalo inteiro
+        if esquerda:
+            self._acima(esquerda, lo, meio, limite, inicio, fim, acumulado, trechos)
+        elif acumulado > limite and lo <= fim and meio >= inicio:
+            self._juntar(trechos, max(lo, inicio), min(meio, fim), acumulado)
+        if direita:
+            self._acima(direita, meio + 1, hi, limite, inicio, fim, acumulado, trechos)
+        elif acumulado > limite and meio + 1 <= fim and hi >= inicio:
+            self._juntar(trechos, max(meio + 1, inicio), min(hi, fim), acumulado)
+
+    @staticmethod
+    def _juntar(trechos, ini, fim, valor):
+        if trechos and trechos[-1][1] + 1 == ini:
+            trechos[-1] = (trechos[-1][0], fim, max(trechos[-1][2], valor))
+        else:
+            trechos.append((ini, fim, valor))
+
+    def nos(self):
+        return len(self._maximo)
+
+
+def carregar_reservas():
+    from servicos.conexao import get_db_connection
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_RESERVAS)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+class MotorDisponibilidade:
+    def __init__(self, carregar=carregar_reservas, ttl=60.0):
+        self.carregar = carregar
+        self.ttl = ttl
+        self._arvores = {}    # (material, categoria) -> ArvoreReservas
+        self._reservas = {}   # id -> (evento_id, (material, categoria), quantidade)
+        self._eventos = {}    # evento_id -> (dia_inicio, dia_fim, ativo)
+        self._por_evento = {}  # evento_id -> {reserva_id, ...}
+        self._carregado_em = None
+        self._lock = threading.Lock()
+
+    # ---------- estado ----------
+
+    def _somar_reserva(self, reserva_id, sinal):
+        evento_id, chave, quantidade = self._reservas[reserva_id]
+        inicio, fim, ativo = self._eventos.get(evento_id, (None, None, False))
+        if ativo:
+            arvore = self._arvores.get(chave)
+            if arvore is None:
+                self._arvores[chave] = arvore = ArvoreReservas()
+            arvore.somar(inicio, fim, sinal * quantidade)
+
+    def _sincronizar(self):
+        linhas = self.carregar()
+        with self._lock:
+            self._arvores = {}
+            self._reservas = {}
+            self._eventos = {}
+            self._por_evento = {}
+            for reserva_id, evento_id, material, categoria, quantidade, inicio, fim, status in linhas:
+                self._eventos[evento_id] = (dia(inicio), dia(fim), status not in STATUS_SEM_RESERVA)
+                self._reservas[reserva_id] = (evento_id, (material, categoria or ""), quantidade)
+                self._por_evento.setdefault(evento_id, set()).add(reserva_id)
+                self._somar_reserva(reserva_id, 1)
+            self._carregado_em = time.monotonic()
+
+    def garantir_carregado(self):
+        if self._carregado_em is None or time.monotonic() - self._carregado_em >= self.ttl:
+            self._sincronizar()
+
+    # ---------- escritas (depois do commit) ----------
+
+    def salvar_reserva(self, reserva_id, evento_id, material, categoria, quantidade, inicio, fim, status):
+        with self._lock:
+            if self._carregado_em is None:
+                return
+            if reserva_id in self._reservas:
+                self._somar_reserva(reserva_id, -1)
+            self._eventos[evento_id] = (dia(inicio), dia(fim), status not in STATUS_SEM_RESERVA)
+            self._reservas[reserva_id] = (evento_id, (material, categoria or ""), quantidade)
+            self._por_evento.setdefault(evento_id, set()).add(reserva_id)
+            self._somar_reserva(reserva_id, 1)
+
+    def remover_reserva(self, reserva_id):
+        with self._lock:
+            if reserva_id in self._reservas:
+                self._somar_reserva(reserva_id, -1)
+                evento_id = self._reservas.pop(reserva_id)[0]
+                self._por_evento[evento_id].discard(reserva_id)
+
+    def atualizar_evento(self, evento_id, inicio, fim, status):
+        # Evento mudou de data ou de status: tira as reservas do período antigo e põe no novo
+        with self._lock:
+            if evento_id not in self._eventos:
+                return
+            ids = self._por_evento.get(evento_id, ())
+            for reserva_id in ids:
+                self._somar_reserva(reserva_id, -1)
+            self._eventos[evento_id] = (dia(inicio), dia(fim), status not in STATUS_SEM_RESERVA)
+            for reserva_id in ids:
+                self._somar_reserva(reserva_id, 1)
+
+    # ---------- leitura ----------
+
+    def reservado(self, material, categoria, inicio, fim):
+        # Maior quantidade reservada num mesmo dia de [inicio, fim]
+        self.garantir_carregado()
+        with self._lock:
+            arvore = self._arvores.get((material, categoria or ""))
+            return arvore.maximo(dia(inicio), dia(fim)) if arvore else 0
+
+    def materiais_reservados(self):
+        self.garantir_carregado()
+        with self._lock:
+            return list(self._arvores)
+
+    def conflitos(self, estoques, inicio=None, fim=None):
+        # Overbooking: dias em que a reserva passa do estoque.
+        # estoques: {(material, categoria): quantidade}
+        self.garantir_carregado()
+        inicio = dia(inicio) if inicio is not None else None
+        fim = dia(fim) if fim is not None else None
+        resultado = []
+        with self._lock:
+            com_excesso = {}
+            for chave, arvore in self._arvores.items():
+                trechos = arvore.acima_de(estoques.get(chave, 0), inicio, fim)
+                if trechos:
+                    com_excesso[chave] = trechos
+            # Períodos dos eventos ativos de cada material em excesso, numa passada só
+            periodos = {chave: [] for chave in com_excesso}
+            for evento_id, chave, _ in self._reservas.values():
+                if chave in periodos and self._eventos[evento_id][2]:
+                    periodos[chave].append(self._eventos[evento_id][:2] + (evento_id,))
+            for chave, trechos in com_excesso.items():
+                estoque = estoques.get(chave, 0)
+                for ini, fim_trecho, pico in trechos:
+                    resultado.append({
+                        "material": chave[0], "categoria": chave[1],
+                        "inicio": date.fromordinal(ini).isoformat(), "fim": date.fromordinal(fim_trecho).isoformat(),
+                        "estoque": estoque, "reservado": pico, "excesso": pico - estoque,
+                        "eventos": sorted({e for i, f, e in periodos[chave] if i <= fim_trecho and f >= ini}),
+                    })
+        return resultado
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "materiais": len(self._arvores),
+                "reservas": len(self._reservas),
+                "eventos": len(self._eventos),
+                "nos": sum(a.nos() for a in self._arvores.values()),
+            }
+
+
+def _conferir(cursor, evento, material, categoria, quantidade):
+    # Trava a linha do material: reservas concorrentes dele passam uma de cada vez
+    inicio, fim = dia(evento["data_inicio"]), dia(evento["data_fim"])
+    cursor.execute(SQL_TRAVAR_ESTOQUE, (material, categoria))
+    estoque, linhas = _valores(cursor.fetchone())
+    if not linhas:
+        raise LookupError("Material não encontrado no inventário.")
+    cursor.execute(SQL_RESERVAS_SOBREPOSTAS, (material, categoria, evento["id"],
+                                              evento["data_fim"], evento["data_inicio"]) + STATUS_SEM_RESERVA)
+    intervalos = [(dia(i), dia(f), q) for i, f, q in map(_valores, cursor.fetchall())]
+    livre = int(estoque) - pico_reservado(intervalos, inicio, fim)
+    if quantidade > livre:
+        raise SemDisponibilidadeError(
+            f"Só há {max(livre, 0)} disponível(is) de {material} no período do evento.", max(livre, 0))
+
+
+def reservar(cursor, evento, material, categoria, quantidade):
+    # Grava (ou troca a quantidade de) uma reserva dentro da transação do chamador.
+    # evento: dict com id, data_inicio, data_fim e status. Retorna o id da reserva.
+    if evento.get("status") not in STATUS_SEM_RESERVA:
+        _conferir(cursor, evento, material, categoria, quantidade)
+    cursor.execute(SQL_SALVAR_RESERVA, (evento["id"], material, categoria, quantidade))
+    return cursor.lastrowid
+
+
+def conferir_evento(cursor, evento):
+    # Antes de mudar datas ou status de um evento: refaz, na transação do chamador,
+    # a mesma checagem de reservar() para cada reserva dele com os valores novos.
+    # Ordem fixa de material/categoria para as travas não se cruzarem.
+    if evento.get("status") in STATUS_SEM_RESERVA:
+        return
+    cursor.execute(SQL_RESERVAS_DO_EVENTO, (evento["id"],))
+    for material, categoria, quantidade in list(map(_valores, cursor.fetchall())):
+        try:
+            _conferir(cursor, evento, material, categoria, quantidade)
+        except LookupError:
+            raise SemDisponibilidadeError(f"{material} não está mais no inventário.", 0)
+
+
+motor_disponibilidade = MotorDisponibilidade(ttl=float(os.environ.get('VIVERE_DISPONIBILIDADE_TTL', 60)))
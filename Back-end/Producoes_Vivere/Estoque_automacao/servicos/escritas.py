@@ -0,0 +1,18 @@
+from servicos.cache import cache_leitura
+from servicos.versoes import versoes_tabelas
+
+# Ponto único chamado depois do commit de qualquer escrita (EstoqueService e
+# rotas do app.py). A ordem importa: o cache cai antes da versão subir, assim
+# quem enxergar a versão nova nunca recebe o dado antigo do cache.
+
+
+def notificar_escrita(tabelas, *etiquetas, cache=cache_leitura):
+    if isinstance(tabelas, str):
+        tabelas = (tabelas,)
+    cache.invalidar(*etiquetas)
+    versoes_tabelas.incrementar(*tabelas)
+
+
+def notificar_limpeza(*tabelas, cache=cache_leitura):
+    cache.limpar()
+    versoes_tabelas.incrementar(*tabelas)
@@ -1,61 +1,389 @@
-import mysql.connector
-from modelos.movimento import Movimento
+from modelos.movimento import Movimento, ColecaoMovimentos
 from modelos.equipamentos import Equipamento
-from datetime import datetime
-from tabulate import tabulate
-from contextlib import contextmanager
+import threading
+from contextlib import contextmanager, closing
+from servicos.conexao import obter_pool
+from servicos.cache import (cache_leitura, etiqueta_materiais, ETIQUETA_INVENTARIO,
+                            ETIQUETA_CATEGORIAS, ETIQUETA_MATERIAIS)
+from servicos.escritas import notificar_escrita, notificar_limpeza
+from servicos.alertas import monitor_estoque
+from servicos.auditoria import auditoria as auditoria_padrao
+from servicos.paginacao import paginar
+from servicos.streaming import iterar_lotes, TAMANHO_LOTE
+from servicos.movimentacao import (validar_movimento, aplicar_movimento, aplicar_entrada_por_id, inserir_movimentos,
+                                   ler_material_id, agora, MODOS_LOTE)
+from servicos.diario import SQL_ULTIMO_APLICADO, SQL_SALVAR_APLICADO
+from servicos.saldos import movimentar
+from servicos.mudancas import Mudancas, invalidar as invalidar_mudancas
+from servicos import resumo
+
+# Leituras da API, compartilhadas com a camada assíncrona (servicos/estoque_async.py)
+SQL_INVENTARIO = "SELECT id, material, categoria, quantidade FROM inventario"
+SQL_CATEGORIAS = "SELECT DISTINCT categoria FROM inventario"
+SQL_MATERIAIS_CATEGORIA = "SELECT material, quantidade FROM inventario WHERE categoria = %s AND quantidade > 0"
+SQL_MOVIMENTOS = "SELECT material, tipo, quantidade, horario FROM movimentos"
+SQL_ESTOQUE = "SELECT id, material, categoria, quantidade FROM inventario ORDER BY categoria"
+SQL_MATERIAIS = "SELECT DISTINCT material AS nome_item, categoria FROM inventario WHERE material IS NOT NULL"
+SQL_CADASTRAR = "INSERT INTO inventario (categoria, material, quantidade) VALUES (%s, %s, %s)"
+# Formato do ColecaoMovimentos.from_db_rows (modelos/movimento.py)
+SQL_MOVIMENTOS_COLUNAS = "SELECT id_movimento, material, tipo, quantidade, horario, deposito FROM movimentos"
+
+
+def consulta_movimentos(desde=None, ate=None, sql=SQL_MOVIMENTOS):
+    filtros, params = [], []
+    if desde:
+        filtros.append("horario >= %s")
+        params.append(desde)
+    if ate:
+        filtros.append("horario <= %s")
+        params.append(ate)
+    if not filtros:
+        return sql, params
+    return sql + " WHERE " + " AND ".join(filtros), params
+
+
+def linha_inventario(r):
+    return {"id": r[0], "material": r[1], "categoria": r[2], "quantidade": r[3]}
+
+
+def linha_material(r):
+    return {"material": r[0], "quantidade": r[1]}
+
+
+def numerar_materiais(materiais):
+    # /api/materiais: id sequencial só para a tela, não é o id do inventário
+    for idx, item in enumerate(materiais):
+        item["id"] = idx + 1
+    return materiais
+
+
+def linha_movimento(r):
+    return {"material": r[0], "tipo": r[1], "quantidade": r[2], "horario": r[3].strftime("%Y-%m-%d %H:%M:%S")}
+
+
+def _entrada_por_id(registro):
+    # Registro do Diario.registrar_entrada; os de movimento sempre trazem "deposito"
+    # (e podem trazer material_id também)
+    return "deposito" not in registro
+
+
+def observacao_deposito(deposito, origem=""):
+    partes = [origem] if origem else []
+    if deposito is not None:
+        partes.append(f"depósito {deposito}")
+    return ", ".join(partes)
+
+
+def formatar_horario(item):
+    if item.get("horario") is not None:
+        item["horario"] = item["horario"].strftime("%Y-%m-%d %H:%M:%S")
+    return item
+
 
 class EstoqueService:
-    def __init__(self):
-        # Dados da conexão mantidos aqui
-        self.db_config = {
-            'host': '127.0.0.1',
-            'user': 'root',
-            'password': 'Art_@2002',
-            'database': 'vivere_estoque'
-        }
+    def __init__(self, pool=None, cache=None, monitor=None, auditoria=None):
+        # Conexões vêm do pool compartilhado com as rotas do app.py
+        self.pool = pool or obter_pool()
+        self.cache = cache or cache_leitura
+        self.monitor = monitor or monitor_estoque
+        self.auditoria = auditoria or auditoria_padrao
 
     @contextmanager
     def _get_connection(self):
-        conn = mysql.connector.connect(**self.db_config)
+        conn = self.pool.obter()
         try:
             yield conn
         finally:
             conn.close()
 
-    def registrar_movimento(self, nome_material, tipo, quantidade):
+    def _apos_escrita(self, tabelas, *etiquetas):
+        # Chamado depois do commit: derruba só as leituras em cache afetadas e sobe a versão das tabelas
+        notificar_escrita(tabelas, *etiquetas, cache=self.cache)
+
+    def registrar_movimento(self, nome_material, tipo, quantidade, deposito=None, categoria=None, material_id=None):
+        # deposito: também credita/debita o saldo do material nesse depósito.
+        # categoria ou material_id (id da linha do inventário) escolhem a linha
+        # quando o nome existe em mais de uma categoria.
+        quantidade = validar_movimento(tipo, quantidade)
+        deposito = self._ler_deposito(deposito)
+        material_id = ler_material_id(material_id)
         with self._get_connection() as conn:
-            cursor = conn.cursor(dictionary=True)
+            cursor = conn.cursor()
             try:
-                cursor.execute("SELECT material, quantidade FROM inventario WHERE material = %s", (nome_material,))
-                equipamento = cursor.fetchone()
-                if not equipamento:
-                    raise ValueError("Equipamento não encontrado.")
+                nova_quantidade, nome_material, categoria = aplicar_movimento(cursor, nome_material, tipo, quantidade,
+                                                                              categoria, material_id)
+                if deposito is not None:
+                    movimentar(cursor, deposito, nome_material, tipo, quantidade)
+                horario = agora()
+                ids = inserir_movimentos(cursor, [(nome_material, tipo, quantidade, horario, deposito)])
+                deltas = resumo.DeltasResumo()
+                deltas.movimento(horario, tipo, quantidade, [categoria], nome_material)
+                deltas.gravar(cursor)
+                mudancas = Mudancas()
+                mudancas.atualizar("inventario", nome_material)
+                mudancas.inserir("movimentos", *ids)
+                mudancas.gravar(cursor)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        self._apos_escrita(("inventario", "movimentos") + (("saldos_deposito",) if deposito is not None else ()),
+                           ETIQUETA_INVENTARIO, ETIQUETA_MATERIAIS)
+        self.monitor.aplicar_movimento(nome_material, quantidade if tipo == "entrada" else -quantidade, categoria)
+        self.auditoria.registrar_estoque(tipo, nome_material, quantidade, observacao_deposito(deposito))
+        return nova_quantidade
+
+    def cadastrar_material(self, categoria, material, quantidade):
+        # POST /api/inventario; retorna o id da linha nova. A auditoria fica na
+        # rota, que sabe o caminho da requisição
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(SQL_CADASTRAR, (categoria, material, quantidade))
+                novo_id = cursor.lastrowid
+                deltas = resumo.DeltasResumo()
+                deltas.estoque(categoria, quantidade, materiais=1)
+                deltas.gravar(cursor)
+                mudancas = Mudancas()
+                mudancas.inserir("inventario", material)
+                mudancas.gravar(cursor)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        self._apos_escrita("inventario", ETIQUETA_INVENTARIO, ETIQUETA_CATEGORIAS, etiqueta_materiais(categoria))
+        self.monitor.definir_saldo(material, categoria, quantidade)
+        return novo_id
 
-                quantidade = int(quantidade)
-                if tipo not in ["entrada", "saida"]:
-                    raise ValueError("Tipo inválido.")
+    @staticmethod
+    def _ler_deposito(deposito):
+        if deposito is None or deposito == "":
+            return None
+        try:
+            return int(deposito)
+        except (TypeError, ValueError):
+            raise ValueError("Depósito inválido.")
 
-                if tipo == "saida" and equipamento['quantidade'] < quantidade:
-                    raise ValueError("Quantidade insuficiente para saída.")
+    def registrar_movimentos_lote(self, itens, modo="tudo_ou_nada"):
+        # Aplica várias linhas de entrada/saída numa única transação.
+        # tudo_ou_nada: qualquer linha recusada desfaz o lote inteiro.
+        # melhor_esforco: linhas recusadas são reportadas e as demais gravadas.
+        if modo not in MODOS_LOTE:
+            raise ValueError("Modo inválido.")
 
-                nova_quantidade = equipamento['quantidade'] + quantidade if tipo == "entrada" else equipamento['quantidade'] - quantidade
+        resultados = []
+        validos = []
+        for indice, item in enumerate(itens):
+            material = item.get("material") or item.get("nome")
+            tipo = item.get("tipo")
+            resultado = {"indice": indice, "material": material, "categoria": item.get("categoria"),
+                         "material_id": item.get("material_id"), "tipo": tipo,
+                         "quantidade": item.get("quantidade"), "deposito": item.get("deposito"),
+                         "ok": False, "erro": None}
+            resultados.append(resultado)
+            try:
+                resultado["material_id"] = ler_material_id(resultado["material_id"])
+                if not material and resultado["material_id"] is None:
+                    raise ValueError("Material não informado.")
+                resultado["quantidade"] = validar_movimento(tipo, item.get("quantidade"))
+                resultado["deposito"] = self._ler_deposito(item.get("deposito"))
+                validos.append(resultado)
+            except (TypeError, ValueError) as e:
+                resultado["erro"] = str(e)
 
-                cursor.execute(
-                    "UPDATE inventario SET quantidade = %s WHERE material = %s",
-                    (nova_quantidade, nome_material)
-                )
+        if modo == "tudo_ou_nada" and len(validos) < len(resultados):
+            for r in validos:
+                r["erro"] = "Lote desfeito."
+            return {"aplicado": False, "resultados": resultados}
+        if not validos:
+            return {"aplicado": False, "resultados": resultados}
 
-                horario = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                cursor.execute(
-                    "INSERT INTO movimentos (material, tipo, quantidade, horario) VALUES (%s, %s, %s, %s)",
-                    (nome_material, tipo, quantidade, horario)
-                )
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                # Ordem fixa por material: lotes concorrentes travam as linhas na
+                # mesma sequência e não entram em deadlock entre si
+                aplicados = []
+                for resultado in sorted(validos, key=lambda r: (r["material"] or "", r["material_id"] or 0,
+                                                                 r["indice"])):
+                    deposito = resultado["deposito"]
+                    try:
+                        if deposito is not None and modo == "melhor_esforco":
+                            # Saldo do depósito recusado desfaz só esta linha, inclusive o inventário
+                            cursor.execute("SAVEPOINT linha_lote")
+                        (resultado["nova_quantidade"], resultado["material"],
+                         resultado["categoria"]) = aplicar_movimento(
+                            cursor, resultado["material"], resultado["tipo"], resultado["quantidade"],
+                            resultado["categoria"], resultado["material_id"]
+                        )
+                        if deposito is not None:
+                            movimentar(cursor, deposito, resultado["material"], resultado["tipo"],
+                                       resultado["quantidade"])
+                    except ValueError as e:
+                        resultado["erro"] = str(e)
+                        resultado.pop("nova_quantidade", None)
+                        if deposito is not None and modo == "melhor_esforco":
+                            cursor.execute("ROLLBACK TO SAVEPOINT linha_lote")
+                        if modo == "tudo_ou_nada":
+                            conn.rollback()
+                            for r in resultados:
+                                r.pop("nova_quantidade", None)
+                                if r is not resultado:
+                                    r["erro"] = r["erro"] or "Lote desfeito."
+                            return {"aplicado": False, "resultados": resultados}
+                        continue
+                    aplicados.append(resultado)
+
+                horario = agora()
+                ids = inserir_movimentos(cursor, [
+                    (r["material"], r["tipo"], r["quantidade"], horario, r["deposito"])
+                    for r in sorted(aplicados, key=lambda r: r["indice"])
+                ])
+                deltas = resumo.DeltasResumo()
+                mudancas = Mudancas()
+                for r in aplicados:
+                    deltas.movimento(horario, r["tipo"], r["quantidade"], [r["categoria"]], r["material"])
+                    mudancas.atualizar("inventario", r["material"])
+                deltas.gravar(cursor)
+                mudancas.inserir("movimentos", *ids)
+                mudancas.gravar(cursor)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+        for resultado in aplicados:
+            resultado["ok"] = True
+            self.monitor.aplicar_movimento(
+                resultado["material"],
+                resultado["quantidade"] if resultado["tipo"] == "entrada" else -resultado["quantidade"],
+                resultado["categoria"],
+            )
+            self.auditoria.registrar_estoque(resultado["tipo"], resultado["material"], resultado["quantidade"],
+                                             observacao_deposito(resultado["deposito"], "lote"))
+        if aplicados:
+            tabelas = ("inventario", "movimentos")
+            if any(r["deposito"] is not None for r in aplicados):
+                tabelas += ("saldos_deposito",)
+            self._apos_escrita(tabelas, ETIQUETA_INVENTARIO, ETIQUETA_MATERIAIS)
+        return {"aplicado": bool(aplicados), "resultados": resultados}
+
+    def registrar_entrada(self, material_id, quantidade, observacao=""):
+        # Entrada pelo id da linha do inventário (POST /api/estoque); retorna o nome do material
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                material, categoria = aplicar_entrada_por_id(cursor, material_id, quantidade)
+                deltas = resumo.DeltasResumo()
+                deltas.estoque(categoria, quantidade)
+                deltas.gravar(cursor)
+                mudancas = Mudancas()
+                mudancas.atualizar("inventario", material)
+                mudancas.gravar(cursor)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        self._apos_escrita("inventario", ETIQUETA_INVENTARIO, etiqueta_materiais(categoria))
+        self.monitor.aplicar_movimento(material, quantidade, categoria or "")
+        self.auditoria.registrar_estoque("entrada", material, quantidade, observacao)
+        return material
+
+    def ultimo_aplicado_diario(self, diario, legado=None):
+        # legado: chave antiga do mesmo slot, lida só se a nova ainda não existe
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(SQL_ULTIMO_APLICADO, (diario,))
+                row = cursor.fetchone()
+                if row is None and legado:
+                    cursor.execute(SQL_ULTIMO_APLICADO, (legado,))
+                    row = cursor.fetchone()
+                return row[0] if row else 0
+            finally:
+                cursor.close()
+
+    def aplicar_diario(self, diario, registros):
+        # registros: [(seq, registro)] do diário local (servicos/diario.py), em
+        # ordem. Aplica tudo numa transação junto com o último seq: uma falha no
+        # meio desfaz o lote inteiro e a próxima tentativa pula o que o banco já
+        # tem, então cada registro vale exatamente uma vez. Registro recusado
+        # (material sumiu, saldo não basta) desfaz só a própria linha.
+        aplicados, recusados = [], []
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(SQL_ULTIMO_APLICADO + " FOR UPDATE", (diario,))
+                row = cursor.fetchone()
+                ultimo = row[0] if row else 0
+                deltas = resumo.DeltasResumo()
+                mudancas = Mudancas()
+                linhas = []
+                for seq, r in registros:
+                    if seq <= ultimo:
+                        continue
+                    cursor.execute("SAVEPOINT registro_diario")
+                    try:
+                        if _entrada_por_id(r):
+                            r["material"], r["categoria"] = aplicar_entrada_por_id(cursor, r["material_id"],
+                                                                                   r["quantidade"])
+                        else:
+                            _, r["material"], r["categoria"] = aplicar_movimento(
+                                cursor, r["material"], r["tipo"], r["quantidade"], r.get("categoria"),
+                                r.get("material_id"))
+                            if r.get("deposito") is not None:
+                                movimentar(cursor, r["deposito"], r["material"], r["tipo"], r["quantidade"])
+                    except ValueError as e:
+                        cursor.execute("ROLLBACK TO SAVEPOINT registro_diario")
+                        recusados.append((seq, r, str(e)))
+                        continue
+                    if _entrada_por_id(r):
+                        deltas.estoque(r["categoria"], r["quantidade"])
+                    else:
+                        linhas.append((r["material"], r["tipo"], r["quantidade"], r["horario"], r.get("deposito")))
+                        deltas.movimento(r["horario"], r["tipo"], r["quantidade"], [r["categoria"]], r["material"])
+                    mudancas.atualizar("inventario", r["material"])
+                    aplicados.append(r)
+                mudancas.inserir("movimentos", *inserir_movimentos(cursor, linhas))
+                deltas.gravar(cursor)
+                mudancas.gravar(cursor)
+                if registros and registros[-1][0] > ultimo:
+                    cursor.execute(SQL_SALVAR_APLICADO, (diario, registros[-1][0]))
                 conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
             finally:
                 cursor.close()
 
+        if aplicados:
+            tabelas = ("inventario", "movimentos")
+            if any(r.get("deposito") is not None for r in aplicados):
+                tabelas += ("saldos_deposito",)
+            self._apos_escrita(tabelas, ETIQUETA_INVENTARIO, ETIQUETA_MATERIAIS)
+        for r in aplicados:
+            delta = r["quantidade"] if r["tipo"] == "entrada" else -r["quantidade"]
+            self.monitor.aplicar_movimento(r["material"], delta, r["categoria"] or "")
+            self.auditoria.registrar_estoque(r["tipo"], r["material"], r["quantidade"],
+                                             r.get("observacao") or observacao_deposito(r.get("deposito"), "diário"))
+        for seq, r, erro in recusados:
+            material = r.get("material") or f"id {r.get('material_id')}"
+            self.auditoria.registrar("diario_recusado",
+                                     f"Diário {diario}, seq {seq}: {r['tipo']} de {r['quantidade']} x {material}: {erro}")
+        return {"aplicados": len(aplicados), "recusados": len(recusados)}
+
     def mostrar_disponiveis(self):
+        # Só o terminal usa: o tabulate não entra na importação do app
+        from tabulate import tabulate
+
         with self._get_connection() as conn:
             cursor = conn.cursor()
             try:
@@ -69,6 +397,8 @@ class EstoqueService:
                 cursor.close()
 
     def listar_movimentacoes(self):
+        from tabulate import tabulate
+
         with self._get_connection() as conn:
             cursor = conn.cursor()
             try:
@@ -92,18 +422,44 @@ class EstoqueService:
                     "INSERT INTO inventario (material, categoria, quantidade) VALUES (%s, %s, %s)",
                     (nome_material, categoria, quantidade)
                 )
+                deltas = resumo.DeltasResumo()
+                deltas.estoque(categoria, quantidade, materiais=1)
+                deltas.gravar(cursor)
+                mudancas = Mudancas()
+                mudancas.inserir("inventario", nome_material)
+                mudancas.gravar(cursor)
                 conn.commit()
             finally:
                 cursor.close()
+        self._apos_escrita("inventario", ETIQUETA_INVENTARIO, ETIQUETA_CATEGORIAS, etiqueta_materiais(categoria))
+        self.monitor.definir_saldo(nome_material, categoria, quantidade)
+        self.auditoria.registrar("cadastro", f"Material {nome_material} ({categoria}) cadastrado com {quantidade}")
 
     def remover_equipamento(self, nome_material):
         with self._get_connection() as conn:
             cursor = conn.cursor()
             try:
+                # Linhas travadas antes do DELETE: o resumo desconta exatamente o que sai
+                cursor.execute(
+                    "SELECT COALESCE(categoria, ''), quantidade FROM inventario WHERE material = %s FOR UPDATE",
+                    (nome_material,)
+                )
+                removidas = cursor.fetchall()
                 cursor.execute("DELETE FROM inventario WHERE material = %s", (nome_material,))
+                deltas = resumo.DeltasResumo()
+                for categoria, quantidade in removidas:
+                    deltas.estoque(categoria, -quantidade, materiais=-1)
+                deltas.gravar(cursor)
+                mudancas = Mudancas()
+                if removidas:
+                    mudancas.apagar("inventario", nome_material)
+                mudancas.gravar(cursor)
                 conn.commit()
             finally:
                 cursor.close()
+        self._apos_escrita("inventario", ETIQUETA_INVENTARIO, ETIQUETA_CATEGORIAS, ETIQUETA_MATERIAIS)
+        self.monitor.definir_saldo(nome_material, None, None)
+        self.auditoria.registrar("remocao", f"Material {nome_material} removido ({len(removidas)} linha(s))")
 
     def buscar_equipamento(self, nome_material):
         with self._get_connection() as conn:
@@ -116,6 +472,9 @@ class EstoqueService:
                 cursor.close()
 
     def listar_equipamentos(self):
+        return self.cache.obter(("listar_equipamentos",), self._consultar_equipamentos, (ETIQUETA_INVENTARIO,))
+
+    def _consultar_equipamentos(self):
         with self._get_connection() as conn:
             cursor = conn.cursor(dictionary=True)
             try:
@@ -125,6 +484,13 @@ class EstoqueService:
                 cursor.close()
 
     def listar_por_categoria(self, nome_categoria):
+        return self.cache.obter(
+            ("listar_por_categoria", nome_categoria),
+            lambda: self._consultar_por_categoria(nome_categoria),
+            (ETIQUETA_MATERIAIS, etiqueta_materiais(nome_categoria)),
+        )
+
+    def _consultar_por_categoria(self, nome_categoria):
         with self._get_connection() as conn:
             cursor = conn.cursor(dictionary=True)
             try:
@@ -137,10 +503,13 @@ class EstoqueService:
                 cursor.close()
 
     def listar_categorias(self):
+        return self.cache.obter(("categorias",), self._consultar_categorias, (ETIQUETA_CATEGORIAS,))
+
+    def _consultar_categorias(self):
         with self._get_connection() as conn:
             cursor = conn.cursor()
             try:
-                cursor.execute("SELECT DISTINCT categoria FROM inventario")
+                cursor.execute(SQL_CATEGORIAS)
                 return [row[0] for row in cursor.fetchall()]
             finally:
                 cursor.close()
@@ -151,43 +520,82 @@ class EstoqueService:
             try:
                 cursor.execute("DELETE FROM inventario")
                 cursor.execute("DELETE FROM movimentos")
+                resumo.zerar(cursor)
+                invalidar_mudancas(cursor)
                 conn.commit()
             finally:
                 cursor.close()
+        notificar_limpeza("inventario", "movimentos", cache=self.cache)
+        self.monitor.descartar()
+        self.auditoria.registrar("limpeza", "Inventário e movimentos apagados")
 
     def verificar_estoque(self, nome_material):
         equipamento = self.buscar_equipamento(nome_material)
         return equipamento is not None and equipamento['quantidade'] > 0
 
+    # Totais lidos de resumo_totais (uma linha pela chave primária), não de SUM/COUNT nas tabelas
     def calcular_total_estoque(self):
+        return self._ler_total(resumo.TOTAL_ESTOQUE)
+
+    def calcular_total_movimentos(self):
+        return self._ler_total(resumo.TOTAL_MOVIMENTOS)
+
+    def _ler_total(self, chave):
         with self._get_connection() as conn:
             cursor = conn.cursor()
             try:
-                cursor.execute("SELECT SUM(quantidade) FROM inventario")
-                total = cursor.fetchone()[0]
-                return total or 0
+                return resumo.total(cursor, chave)
             finally:
                 cursor.close()
 
-    def calcular_total_movimentos(self):
+    def obter_resumo(self, dias=resumo.DIAS_PADRAO):
         with self._get_connection() as conn:
             cursor = conn.cursor()
             try:
-                cursor.execute("SELECT COUNT(*) FROM movimentos")
-                total = cursor.fetchone()[0]
-                return total or 0
+                return resumo.ler_resumo(cursor, dias)
             finally:
                 cursor.close()
 
     # 🔽 MÉTODOS PARA API
 
     def obter_inventario(self):
+        return self.cache.obter(("inventario",), self._consultar_inventario, (ETIQUETA_INVENTARIO,))
+
+    def _consultar_inventario(self):
         with self._get_connection() as conn:
             cursor = conn.cursor()
             try:
-                cursor.execute("SELECT material, categoria, quantidade FROM inventario")
-                rows = cursor.fetchall()
-                return [{"material": r[0], "categoria": r[1], "quantidade": r[2]} for r in rows]
+                cursor.execute(SQL_INVENTARIO)
+                return [linha_inventario(r) for r in cursor.fetchall()]
+            finally:
+                cursor.close()
+
+    # /api/estoque e /api/inventario paginados: mesmas chaves nas duas camadas
+    CHAVE_INVENTARIO = ["id"]
+    COLUNAS_INVENTARIO = {"id": "id", "categoria": "categoria", "material": "material", "quantidade": "quantidade"}
+    # Índice (categoria) da V011, com o id implícito: sem filesort. Categoria
+    # NULL vem primeiro e o cursor trata NULL (servicos/paginacao.py)
+    CHAVE_ESTOQUE = ["categoria", "id"]
+    COLUNAS_ESTOQUE = {"id": "id", "material": "material", "categoria": "categoria", "quantidade": "quantidade"}
+
+    def obter_estoque_completo(self):
+        return self.cache.obter(("app:estoque",), self._consultar_estoque, (ETIQUETA_INVENTARIO,))
+
+    def _consultar_estoque(self):
+        with self._get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(SQL_ESTOQUE)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+
+    def listar_materiais(self):
+        with self._get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(SQL_MATERIAIS)
+                return numerar_materiais(cursor.fetchall())
             finally:
                 cursor.close()
 
@@ -195,21 +603,90 @@ class EstoqueService:
         with self._get_connection() as conn:
             cursor = conn.cursor()
             try:
-                cursor.execute("SELECT material, tipo, quantidade, horario FROM movimentos")
-                rows = cursor.fetchall()
-                return [{"material": r[0], "tipo": r[1], "quantidade": r[2], "horario": r[3].strftime("%Y-%m-%d %H:%M:%S")} for r in rows]
+                cursor.execute(SQL_MOVIMENTOS)
+                return [linha_movimento(r) for r in cursor.fetchall()]
+            finally:
+                cursor.close()
+
+    def iterar_movimentacoes(self, desde=None, ate=None, tamanho_lote=TAMANHO_LOTE):
+        # Gera lotes de dicts lidos de um cursor sem buffer: a memória fica
+        # limitada a um lote, não importa quantos movimentos existam.
+        sql, params = consulta_movimentos(desde, ate)
+        # closing: cliente que desconecta fecha o gerador interno na hora (descarta a conexão)
+        with closing(self._iterar_lotes(sql, params, tamanho_lote)) as lotes:
+            for rows in lotes:
+                yield [linha_movimento(r) for r in rows]
+
+    def carregar_movimentos(self, desde=None, ate=None, tamanho_lote=TAMANHO_LOTE):
+        # Histórico para relatórios em colunas (ColecaoMovimentos): ~30 bytes
+        # por movimento, sem um objeto Python por linha
+        sql, params = consulta_movimentos(desde, ate, SQL_MOVIMENTOS_COLUNAS)
+        return ColecaoMovimentos.from_lotes(self._iterar_lotes(sql, params, tamanho_lote))
+
+    def _iterar_lotes(self, sql, params, tamanho_lote):
+        conn = self.pool.obter()
+        cursor = None
+        completo = False
+        try:
+            cursor = conn.cursor(buffered=False)
+            # O servidor espera o cliente consumir o resultado; clientes lentos não devem derrubar a exportação
+            cursor.execute("SET SESSION net_write_timeout = 600")
+            cursor.execute(sql, params)
+            yield from iterar_lotes(cursor, tamanho_lote)
+            completo = True
+        finally:
+            if completo:
+                # A conexão volta ao pool: o próximo a usá-la fica com o timeout global
+                cursor.execute("SET SESSION net_write_timeout = DEFAULT")
+                cursor.close()
+                conn.close()
+            else:
+                # Resultado não lido até o fim (cliente desconectou): a conexão
+                # não pode voltar ao pool com linhas pendentes no socket
+                conn.descartar()
+
+    CHAVE_MOVIMENTOS = ["horario", "id_movimento"]
+    COLUNAS_MOVIMENTOS = {
+        "id": "id_movimento", "material": "material", "tipo": "tipo",
+        "quantidade": "quantidade", "horario": "horario", "deposito": "deposito",
+    }
+
+    def obter_movimentacoes_paginadas(self, pagina):
+        # pagina: resultado de servicos.paginacao.ler_paginacao (mais recentes primeiro)
+        with self._get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                return paginar(cursor, "movimentos", self.COLUNAS_MOVIMENTOS, self.CHAVE_MOVIMENTOS, pagina,
+                               ordem="DESC", coluna_tempo="horario", formatar=formatar_horario)
             finally:
                 cursor.close()
 
     def obter_materiais_por_categoria(self, categoria):
+        return self.cache.obter(
+            ("materiais", categoria),
+            lambda: self._consultar_materiais_por_categoria(categoria),
+            (ETIQUETA_MATERIAIS, etiqueta_materiais(categoria)),
+        )
+
+    def _consultar_materiais_por_categoria(self, categoria):
         with self._get_connection() as conn:
             cursor = conn.cursor()
             try:
-                cursor.execute(
-                    "SELECT material, quantidade FROM inventario WHERE categoria = %s AND quantidade > 0",
-                    (categoria,)
-                )
-                rows = cursor.fetchall()
-                return [{"material": r[0], "quantidade": r[1]} for r in rows]
+                cursor.execute(SQL_MATERIAIS_CATEGORIA, (categoria,))
+                return [linha_material(r) for r in cursor.fetchall()]
             finally:
                 cursor.close()
+
+
+_estoque = None
+_estoque_lock = threading.Lock()
+
+
+def obter_estoque():
+    # Instância única do serviço, criada na primeira requisição (como obter_pool)
+    global _estoque
+    if _estoque is None:
+        with _estoque_lock:
+            if _estoque is None:
+                _estoque = EstoqueService()
+    return _estoque
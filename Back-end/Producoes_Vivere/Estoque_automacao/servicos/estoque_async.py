@@ -0,0 +1,147 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from aiomysql import DictCursor, SSCursor
+
+from servicos.cache import etiqueta_materiais, ETIQUETA_INVENTARIO, ETIQUETA_CATEGORIAS, ETIQUETA_MATERIAIS
+from servicos.conexao import POOL_CONFIG
+from servicos.conexao_async import obter_pool_async
+from servicos.busca import indice_materiais
+from servicos.estoque import (EstoqueService, obter_estoque, SQL_INVENTARIO, SQL_CATEGORIAS,
+                              SQL_MATERIAIS_CATEGORIA, SQL_MOVIMENTOS, SQL_ESTOQUE, SQL_MATERIAIS,
+                              consulta_movimentos, numerar_materiais, linha_inventario, linha_material,
+                              linha_movimento, formatar_horario)
+from servicos.paginacao import montar_consulta_pagina, montar_pagina
+from servicos.streaming import iterar_lotes_async, TAMANHO_LOTE
+
+# Camada assíncrona sobre o EstoqueService, usada pelo api_async.py.
+#
+# Leituras (o grosso do tráfego: dashboards em polling e check-ins) vão direto
+# pelo aiomysql, com o mesmo SQL, formato e cache de leitura do EstoqueService.
+# Escritas chamam o próprio EstoqueService numa thread do executor: a lógica
+# transacional (UPDATE condicional, lote com savepoint, saldo por depósito,
+# resumo) fica num lugar só, e o notificar_escrita dele derruba o mesmo cache e
+# as mesmas versões que as leituras daqui usam, porque é o mesmo processo.
+#
+# O executor tem o tamanho do pool síncrono: uma escrita nunca espera conexão
+# ocupando uma thread à toa, e escritas além disso esperam na fila do executor.
+
+ESCRITORES = int(os.environ.get('VIVERE_ASYNC_ESCRITORES', POOL_CONFIG['tamanho'] + POOL_CONFIG['overflow']))
+
+
+class EstoqueServiceAsync:
+    COLUNAS_MOVIMENTOS = EstoqueService.COLUNAS_MOVIMENTOS
+    CHAVE_INVENTARIO = EstoqueService.CHAVE_INVENTARIO
+    COLUNAS_INVENTARIO = EstoqueService.COLUNAS_INVENTARIO
+    CHAVE_ESTOQUE = EstoqueService.CHAVE_ESTOQUE
+    COLUNAS_ESTOQUE = EstoqueService.COLUNAS_ESTOQUE
+
+    def __init__(self, pool=None, servico=None, cache=None, escritores=ESCRITORES):
+        self.pool = pool or obter_pool_async()
+        self.servico = servico or obter_estoque()
+        self.cache = cache or self.servico.cache
+        self._executor = ThreadPoolExecutor(max_workers=escritores, thread_name_prefix="escrita")
+
+    async def _em_thread(self, funcao, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(funcao, *args))
+
+    async def _consultar(self, sql, params=(), cursor_classe=None):
+        async with self.pool.conexao() as conn:
+            cursor = await conn.cursor(cursor_classe) if cursor_classe else await conn.cursor()
+            try:
+                await cursor.execute(sql, params)
+                return await cursor.fetchall()
+            finally:
+                await cursor.close()
+
+    def fechar(self):
+        self._executor.shutdown(wait=True)
+
+    # Escritas: EstoqueService numa thread
+
+    async def registrar_movimento(self, nome_material, tipo, quantidade, deposito=None, categoria=None,
+                                  material_id=None):
+        return await self._em_thread(self.servico.registrar_movimento, nome_material, tipo, quantidade, deposito,
+                                     categoria, material_id)
+
+    async def registrar_movimentos_lote(self, itens, modo="tudo_ou_nada"):
+        return await self._em_thread(self.servico.registrar_movimentos_lote, itens, modo)
+
+    async def registrar_entrada(self, material_id, quantidade, observacao=""):
+        return await self._em_thread(self.servico.registrar_entrada, material_id, quantidade, observacao)
+
+    async def cadastrar_material(self, categoria, material, quantidade):
+        return await self._em_thread(self.servico.cadastrar_material, categoria, material, quantidade)
+
+    async def registrar_no_diario(self, registrar, *args):
+        # Diario.registrar_movimento/registrar_entrada: grava em arquivo (com fsync)
+        return await self._em_thread(registrar, *args)
+
+    async def buscar_materiais(self, texto, limite, categoria=None):
+        # Índice em memória; só a primeira carga (e a releitura, quando vencida) vai ao banco
+        return await self._em_thread(indice_materiais.buscar, texto, limite, categoria)
+
+    # Leituras: aiomysql, mesmas chaves e etiquetas de cache do EstoqueService
+
+    async def obter_inventario(self):
+        return await self.cache.obter_async(("inventario",), self._consultar_inventario, (ETIQUETA_INVENTARIO,))
+
+    async def _consultar_inventario(self):
+        return [linha_inventario(r) for r in await self._consultar(SQL_INVENTARIO)]
+
+    async def listar_categorias(self):
+        return await self.cache.obter_async(("categorias",), self._consultar_categorias, (ETIQUETA_CATEGORIAS,))
+
+    async def _consultar_categorias(self):
+        return [row[0] for row in await self._consultar(SQL_CATEGORIAS)]
+
+    async def obter_materiais_por_categoria(self, categoria):
+        return await self.cache.obter_async(
+            ("materiais", categoria),
+            lambda: self._consultar_materiais_por_categoria(categoria),
+            (ETIQUETA_MATERIAIS, etiqueta_materiais(categoria)),
+        )
+
+    async def _consultar_materiais_por_categoria(self, categoria):
+        return [linha_material(r) for r in await self._consultar(SQL_MATERIAIS_CATEGORIA, (categoria,))]
+
+    async def obter_estoque_completo(self):
+        return await self.cache.obter_async(("app:estoque",), self._consultar_estoque, (ETIQUETA_INVENTARIO,))
+
+    async def _consultar_estoque(self):
+        return list(await self._consultar(SQL_ESTOQUE, (), DictCursor))
+
+    async def listar_materiais(self):
+        return numerar_materiais(list(await self._consultar(SQL_MATERIAIS, (), DictCursor)))
+
+    async def obter_pagina(self, colunas, chave, pagina):
+        # /api/inventario e /api/estoque paginados (chaves em EstoqueService)
+        sql, params = montar_consulta_pagina("inventario", colunas, chave, pagina)
+        return montar_pagina(await self._consultar(sql, params, DictCursor), colunas, chave, pagina)
+
+    async def obter_movimentacoes(self):
+        return [linha_movimento(r) for r in await self._consultar(SQL_MOVIMENTOS)]
+
+    async def obter_movimentacoes_paginadas(self, pagina):
+        sql, params = montar_consulta_pagina("movimentos", self.COLUNAS_MOVIMENTOS, EstoqueService.CHAVE_MOVIMENTOS,
+                                             pagina, ordem="DESC", coluna_tempo="horario")
+        rows = await self._consultar(sql, params, DictCursor)
+        return montar_pagina(rows, self.COLUNAS_MOVIMENTOS, EstoqueService.CHAVE_MOVIMENTOS, pagina,
+                             formatar=formatar_horario)
+
+    async def iterar_movimentacoes(self, desde=None, ate=None, tamanho_lote=TAMANHO_LOTE):
+        # Como EstoqueService.iterar_movimentacoes: cursor sem buffer, um lote por
+        # vez. Se o cliente sair no meio, o pool descarta a conexão (conexao_async.py).
+        sql, params = consulta_movimentos(desde, ate)
+        async with self.pool.conexao() as conn:
+            cursor = await conn.cursor(SSCursor)
+            await cursor.execute("SET SESSION net_write_timeout = 600")
+            await cursor.execute(sql, params)
+            async for rows in iterar_lotes_async(cursor, tamanho_lote):
+                yield [linha_movimento(r) for r in rows]
+            # Leitura completa: devolve o timeout padrão antes da conexão voltar ao pool
+            await cursor.execute("SET SESSION net_write_timeout = DEFAULT")
+            # Só aqui: o close() de um SSCursor lê até o fim o que sobrou no socket
+            await cursor.close()
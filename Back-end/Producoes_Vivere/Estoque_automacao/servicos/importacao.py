@@ -0,0 +1,205 @@
+import csv
+import os
+import tempfile
+import time
+
+import mysql.connector
+
+from servicos.conexao import DB_CONFIG
+from servicos import resumo
+from servicos.mudancas import invalidar as invalidar_mudancas
+
+# Carga em massa do inventário.
+#
+# substituir: grava tudo numa tabela de staging e troca com a inventario num
+#             único RENAME TABLE, então quem lê nunca vê o inventário vazio.
+# mesclar:    upsert pela chave única (material, categoria) da migração V001;
+#             materiais que não estão no arquivo ficam como estão.
+
+COLUNAS = ["categoria", "material", "quantidade", "observacoes"]
+MODOS = ("substituir", "mesclar")
+TAMANHO_LOTE = 5000
+TABELA_STAGING = "inventario_staging"
+TABELA_ANTIGA = "inventario_antigo"
+
+# Na staging, linha repetida (material, categoria) fica com a última ocorrência,
+# igual ao drop_duplicates(keep="last") — importante quando a entrada chega em fluxo
+SQL_INSERIR_STAGING = (
+    f"INSERT INTO {TABELA_STAGING} (categoria, material, quantidade, observacoes) VALUES (%s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE quantidade = VALUES(quantidade), observacoes = VALUES(observacoes)"
+)
+SQL_MESCLAR = (
+    "INSERT INTO inventario (categoria, material, quantidade, observacoes) VALUES (%s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE quantidade = VALUES(quantidade), "
+    "observacoes = VALUES(observacoes)"
+)
+SQL_MESCLAR_STAGING = (
+    f"INSERT INTO inventario (categoria, material, quantidade, observacoes) "
+    f"SELECT categoria, material, quantidade, observacoes FROM {TABELA_STAGING} "
+    "ON DUPLICATE KEY UPDATE quantidade = VALUES(quantidade), "
+    "observacoes = VALUES(observacoes)"
+)
+
+
+def normalizar_dataframe(df):
+    # Limpeza vetorizada (sem iterrows): strings aparadas, 'nan' vira vazio,
+    # quantidade inválida vira 0 e material repetido na mesma categoria fica com a última linha
+    import pandas as pd
+
+    df = df.reindex(columns=COLUNAS)
+    for coluna in ("categoria", "material", "observacoes"):
+        df[coluna] = df[coluna].fillna("").astype(str).str.strip().replace({"nan": "", "None": ""})
+    df = df[df["material"] != ""]
+    df["quantidade"] = pd.to_numeric(df["quantidade"], errors="coerce").fillna(0).astype(int)
+    return df.drop_duplicates(subset=["material", "categoria"], keep="last")
+
+
+def normalizar_linha(categoria, material, quantidade, observacoes=None):
+    # Mesma regra do normalizar_dataframe, linha a linha, para a leitura em fluxo.
+    # Retorna None para linhas sem material ou sem quantidade.
+    if material is None or quantidade is None or quantidade == "":
+        return None
+    material = str(material).strip()
+    if not material:
+        return None
+    try:
+        quantidade = int(float(quantidade))
+    except (TypeError, ValueError):
+        quantidade = 0
+    categoria = "" if categoria is None else str(categoria).strip()
+    observacoes = "" if observacoes is None else str(observacoes).strip()
+    return (categoria, material, quantidade, observacoes)
+
+
+def em_tuplas(df):
+    # astype(object) troca numpy.int64 por int, que o mysql.connector sabe converter
+    return list(df.astype(object).itertuples(index=False, name=None))
+
+
+def conectar_importacao():
+    # Conexão própria (fora do pool): permite LOAD DATA LOCAL INFILE
+    return mysql.connector.connect(**DB_CONFIG, allow_local_infile=True)
+
+
+class ImportadorInventario:
+    def __init__(self, conn, modo="substituir", tamanho_lote=TAMANHO_LOTE, usar_load_data=None):
+        # usar_load_data: True força, False desliga, None tenta e cai para executemany
+        if modo not in MODOS:
+            raise ValueError("Modo inválido.")
+        self.conn = conn
+        self.modo = modo
+        self.tamanho_lote = tamanho_lote
+        self.usar_load_data = usar_load_data
+        self.cursor = conn.cursor()
+        self.linhas = 0
+        self.lotes = 0
+        self.inicio = None
+        self._usa_staging = False
+        self._usou_load_data = False
+
+    def iniciar(self):
+        self.inicio = time.perf_counter()
+        # mesclar com LOAD DATA também passa pela staging (LOAD DATA não faz upsert sem trocar ids)
+        self._usa_staging = self.modo == "substituir" or self.usar_load_data is not False
+        if self._usa_staging:
+            self.cursor.execute(f"DROP TABLE IF EXISTS {TABELA_STAGING}")
+            self.cursor.execute(f"CREATE TABLE {TABELA_STAGING} LIKE inventario")
+
+    def _load_data(self, linhas):
+        with tempfile.NamedTemporaryFile("w", newline="", encoding="utf-8", suffix=".tsv", delete=False) as f:
+            csv.writer(f, delimiter="\t", lineterminator="\n", quoting=csv.QUOTE_MINIMAL).writerows(linhas)
+            caminho = f.name
+        try:
+            self.cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s REPLACE INTO TABLE {TABELA_STAGING} CHARACTER SET utf8mb4 "
+                "FIELDS TERMINATED BY '\\t' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' LINES TERMINATED BY '\\n' "
+                "(categoria, material, quantidade, observacoes)",
+                (caminho,)
+            )
+        finally:
+            os.remove(caminho)
+
+    def _executemany(self, linhas):
+        sql = SQL_INSERIR_STAGING if self._usa_staging else SQL_MESCLAR
+        for i in range(0, len(linhas), self.tamanho_lote):
+            self.cursor.executemany(sql, linhas[i:i + self.tamanho_lote])
+
+    def carregar(self, linhas):
+        # linhas: lista de tuplas (categoria, material, quantidade, observacoes)
+        if not linhas:
+            return
+        if self._usa_staging and self.usar_load_data is not False:
+            try:
+                self._load_data(linhas)
+                self._usou_load_data = True
+            except mysql.connector.Error:
+                if self.usar_load_data:
+                    raise
+                # local_infile desligado no servidor: segue com executemany
+                self.usar_load_data = False
+                self._executemany(linhas)
+        else:
+            self._executemany(linhas)
+        self.linhas += len(linhas)
+        self.lotes += 1
+
+    def finalizar(self):
+        if self.modo == "substituir":
+            self.conn.commit()
+            # Troca atômica: leitores veem o inventário antigo ou o novo, nunca vazio
+            self.cursor.execute(f"DROP TABLE IF EXISTS {TABELA_ANTIGA}")
+            self.cursor.execute(
+                f"RENAME TABLE inventario TO {TABELA_ANTIGA}, {TABELA_STAGING} TO inventario"
+            )
+            self.cursor.execute(f"DROP TABLE {TABELA_ANTIGA}")
+            # Carga em massa não passa pelos deltas: o resumo do estoque é refeito
+            # de uma vez e os tablets refazem a carga (feed do /api/sync recomeça)
+            resumo.reconstruir(self.cursor, movimentos=False)
+            invalidar_mudancas(self.cursor)
+            self.conn.commit()
+        else:
+            if self._usa_staging:
+                self.cursor.execute(SQL_MESCLAR_STAGING)
+            resumo.reconstruir(self.cursor, movimentos=False)
+            invalidar_mudancas(self.cursor)
+            self.conn.commit()
+            if self._usa_staging:
+                self.cursor.execute(f"DROP TABLE IF EXISTS {TABELA_STAGING}")
+        return self.relatorio()
+
+    def abortar(self):
+        try:
+            self.conn.rollback()
+            if self._usa_staging:
+                self.cursor.execute(f"DROP TABLE IF EXISTS {TABELA_STAGING}")
+        finally:
+            self.cursor.close()
+
+    def relatorio(self):
+        duracao = time.perf_counter() - self.inicio
+        return {
+            "modo": self.modo,
+            "linhas": self.linhas,
+            "lotes": self.lotes,
+            "load_data": self._usou_load_data,
+            "segundos": round(duracao, 3),
+            "linhas_por_segundo": round(self.linhas / duracao) if duracao > 0 else None,
+        }
+
+
+def importar_linhas(lotes, modo="substituir", tamanho_lote=TAMANHO_LOTE, usar_load_data=None):
+    # lotes: iterável de listas de tuplas; abre a conexão, carrega e faz a troca/commit
+    conn = conectar_importacao()
+    importador = ImportadorInventario(conn, modo, tamanho_lote, usar_load_data)
+    try:
+        importador.iniciar()
+        for linhas in lotes:
+            importador.carregar(linhas)
+        relatorio = importador.finalizar()
+        importador.cursor.close()
+        return relatorio
+    except Exception:
+        importador.abortar()
+        raise
+    finally:
+        conn.close()
@@ -0,0 +1,158 @@
+from datetime import datetime
+
+from servicos.mudancas import ids_inseridos
+
+# Motor de movimentação: cada movimento é um único UPDATE condicional sobre
+# exatamente uma linha do inventário, então duas saídas concorrentes nunca
+# passam pela mesma checagem de saldo. O mesmo nome de material pode existir em
+# mais de uma categoria (a chave única é (material, categoria)), então a linha
+# vem do id (material_id), de (material, categoria) ou do nome quando ele é
+# único. Só quando o UPDATE não altera nada a linha é travada (SELECT ... FOR
+# UPDATE) para separar material inexistente, nome ambíguo e saldo insuficiente.
+
+TIPOS_MOVIMENTO = ("entrada", "saida")
+MODOS_LOTE = ("tudo_ou_nada", "melhor_esforco")
+
+SQL_ENTRADA = "UPDATE inventario SET quantidade = LAST_INSERT_ID(quantidade + %s) WHERE {}"
+SQL_SAIDA = "UPDATE inventario SET quantidade = LAST_INSERT_ID(quantidade - %s) WHERE {} AND quantidade >= %s"
+# Chaves do UPDATE. CHAVE_NOME confere material e categoria lidos sem trava:
+# linha renomeada ou trocada de categoria no meio cai no caminho lento
+CHAVE_ID = "id = %s"
+CHAVE_CATEGORIA = "material = %s AND categoria = %s"
+CHAVE_NOME = "id = %s AND material = %s AND COALESCE(categoria, '') = %s"
+SQL_LINHA_ID = "SELECT material, COALESCE(categoria, '') FROM inventario WHERE id = %s"
+SQL_LINHAS_NOME = "SELECT id, COALESCE(categoria, '') FROM inventario WHERE material = %s"
+
+SQL_TRAVAR_MATERIAL = (
+    "SELECT id, material, COALESCE(categoria, ''), quantidade FROM inventario WHERE material = %s FOR UPDATE"
+)
+SQL_TRAVAR_MATERIAL_CATEGORIA = (
+    "SELECT id, material, COALESCE(categoria, ''), quantidade FROM inventario "
+    "WHERE material = %s AND COALESCE(categoria, '') = %s FOR UPDATE"
+)
+SQL_TRAVAR_LINHA = (
+    "SELECT id, material, COALESCE(categoria, ''), quantidade FROM inventario WHERE id = %s FOR UPDATE"
+)
+SQL_INSERIR_MOVIMENTO = (
+    "INSERT INTO movimentos (material, tipo, quantidade, horario, deposito) VALUES (%s, %s, %s, %s, %s)"
+)
+
+
+class MaterialNaoEncontradoError(ValueError):
+    pass
+
+
+class EstoqueInsuficienteError(ValueError):
+    pass
+
+
+class MaterialAmbiguoError(ValueError):
+    pass
+
+
+def validar_movimento(tipo, quantidade):
+    if tipo not in TIPOS_MOVIMENTO:
+        raise ValueError("Tipo inválido.")
+    quantidade = int(quantidade)
+    if quantidade <= 0:
+        raise ValueError("Quantidade deve ser maior que zero.")
+    return quantidade
+
+
+def ler_material_id(valor):
+    if valor is None or valor == "":
+        return None
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ValueError("material_id inválido.")
+
+
+def _tupla(row):
+    return tuple(row.values()) if isinstance(row, dict) else row
+
+
+def travar_linha(cursor, nome_material=None, categoria=None, material_id=None):
+    # (id, material, categoria, quantidade) da linha que o movimento altera,
+    # travada até o commit. material_id tem precedência sobre nome e categoria.
+    if material_id is not None:
+        cursor.execute(SQL_TRAVAR_LINHA, (material_id,))
+    elif categoria is not None:
+        cursor.execute(SQL_TRAVAR_MATERIAL_CATEGORIA, (nome_material, categoria))
+    else:
+        cursor.execute(SQL_TRAVAR_MATERIAL, (nome_material,))
+    rows = [_tupla(r) for r in cursor.fetchall()]
+    if not rows:
+        raise MaterialNaoEncontradoError("Equipamento não encontrado.")
+    if len(rows) > 1:
+        categorias = ", ".join(r[2] or "(sem categoria)" for r in rows)
+        raise MaterialAmbiguoError(
+            f"{nome_material} existe em mais de uma categoria ({categorias}); informe a categoria ou o material_id."
+        )
+    return rows[0]
+
+
+def _atualizar(cursor, tipo, quantidade, chave, params):
+    if tipo == "entrada":
+        cursor.execute(SQL_ENTRADA.format(chave), (quantidade, *params))
+    else:
+        cursor.execute(SQL_SAIDA.format(chave), (quantidade, *params, quantidade))
+    return cursor.rowcount == 1
+
+
+def aplicar_movimento(cursor, nome_material, tipo, quantidade, categoria=None, material_id=None):
+    # Retorna (novo saldo, material, categoria) da linha alterada. O
+    # LAST_INSERT_ID(expr) faz o MySQL devolver o saldo gravado no próprio
+    # pacote de resposta do UPDATE, sem precisar de um SELECT extra.
+    if material_id is not None:
+        if _atualizar(cursor, tipo, quantidade, CHAVE_ID, (material_id,)):
+            saldo = cursor.lastrowid
+            # A linha já é nossa (travada pelo UPDATE): leitura pela chave primária, sem espera
+            cursor.execute(SQL_LINHA_ID, (material_id,))
+            material, categoria_linha = _tupla(cursor.fetchone())
+            return saldo, material, categoria_linha
+    elif categoria is not None:
+        # Categoria '' não acha linha com NULL: essa vai pelo caminho lento
+        if _atualizar(cursor, tipo, quantidade, CHAVE_CATEGORIA, (nome_material, categoria)):
+            return cursor.lastrowid, nome_material, categoria
+    else:
+        # Só o nome: uma leitura sem trava diz se ele é único e qual a categoria
+        cursor.execute(SQL_LINHAS_NOME, (nome_material,))
+        rows = cursor.fetchall()
+        if len(rows) == 1:
+            id_linha, categoria_linha = _tupla(rows[0])
+            if _atualizar(cursor, tipo, quantidade, CHAVE_NOME, (id_linha, nome_material, categoria_linha)):
+                return cursor.lastrowid, nome_material, categoria_linha
+
+    # Caminho lento: nenhuma linha alterada. Trava a linha para descobrir se o
+    # material não existe, se o nome é ambíguo ou se o saldo realmente não basta.
+    id_linha, material, categoria_linha, saldo = travar_linha(cursor, nome_material, categoria, material_id)
+    if tipo == "saida" and saldo < quantidade:
+        raise EstoqueInsuficienteError("Quantidade insuficiente para saída.")
+    # Com a linha travada o UPDATE não falha mais
+    cursor.execute(SQL_ENTRADA.format(CHAVE_ID), (quantidade if tipo == "entrada" else -quantidade, id_linha))
+    return cursor.lastrowid, material, categoria_linha
+
+
+def aplicar_entrada_por_id(cursor, material_id, quantidade):
+    # Entrada do /api/estoque, pela linha do inventário; retorna (material, categoria)
+    if not _atualizar(cursor, "entrada", quantidade, CHAVE_ID, (material_id,)):
+        raise MaterialNaoEncontradoError("Material não encontrado")
+    cursor.execute(SQL_LINHA_ID, (material_id,))
+    return _tupla(cursor.fetchone())
+
+
+def agora():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def inserir_movimentos(cursor, linhas):
+    # linhas: [(material, tipo, quantidade, horario, deposito), ...]; deposito pode ser None.
+    # Retorna os ids gravados (para o feed de mudanças)
+    if not linhas:
+        return range(0)
+    if len(linhas) == 1:
+        cursor.execute(SQL_INSERIR_MOVIMENTO, linhas[0])
+    else:
+        cursor.executemany(SQL_INSERIR_MOVIMENTO, linhas)
+    return ids_inseridos(cursor)
@@ -0,0 +1,220 @@
+import os
+import unicodedata
+
+# Feed de mudanças (migração V010) para o /api/sync: os tablets dos depósitos
+# baixam inventario, movimentos e alocacoes uma vez e depois só o que mudou.
+#
+# Quem escreve nessas tabelas junta as chaves alteradas num Mudancas e chama
+# gravar(cursor) por último, depois do DeltasResumo.gravar, logo antes do
+# commit. gravar() reserva as versões no contador de mudancas_versao (uma
+# linha só): a trava dela fica até o commit, então as versões saem na ordem
+# dos commits e quem leu até a versão V já viu tudo o que veio antes. O custo
+# é serializar os commits dessas escritas, o que os movimentos já pagavam na
+# linha "movimentos" de resumo_totais.
+#
+# mudancas guarda uma linha por chave, com a última operação (a chave
+# primária faz a compactação por chave no próprio INSERT). O /api/sync devolve
+# as chaves com versão > desde junto com as linhas atuais, lidas no mesmo
+# snapshot: o cliente aplica "insert"/"update" como upsert e "delete" como
+# remoção.
+#   inventario -> chave = material (as linhas do material, uma por categoria)
+#   movimentos -> chave = id_movimento
+#   alocacoes  -> chave = id
+#
+# compactar_mudancas.py (agendar no cron) apaga o que passou de
+# VIVERE_SYNC_RETER_DIAS e sobe o "minimo": cliente com desde abaixo dele
+# recebe 410 e refaz a carga completa. Escritas em massa (importação,
+# limpar_estoque) chamam invalidar(): o feed recomeça e todos recarregam.
+
+LIMITE_PADRAO = 500
+LIMITE_MAXIMO = 5000
+RETER_DIAS = int(os.environ.get('VIVERE_SYNC_RETER_DIAS', 30))
+LOTE_COMPACTACAO = 10000
+
+SQL_RESERVAR_VERSOES = "UPDATE mudancas_versao SET versao = LAST_INSERT_ID(versao + %s) WHERE id = 1"
+SQL_GRAVAR_MUDANCA = (
+    "INSERT INTO mudancas (tabela, chave, operacao, versao, criado_em) VALUES (%s, %s, %s, %s, NOW()) "
+    "ON DUPLICATE KEY UPDATE operacao = VALUES(operacao), versao = VALUES(versao), criado_em = VALUES(criado_em)"
+)
+# O MySQL aplica o SET da esquerda para a direita: minimo recebe a versão já somada
+SQL_INVALIDAR = "UPDATE mudancas_versao SET versao = versao + 1, minimo = versao WHERE id = 1"
+SQL_ESTADO = "SELECT versao, minimo FROM mudancas_versao WHERE id = 1"
+SQL_LER_MUDANCAS = "SELECT tabela, chave, operacao, versao FROM mudancas WHERE versao > %s ORDER BY versao LIMIT %s"
+
+SQL_LINHAS = {
+    "inventario": "SELECT id, material, categoria, quantidade FROM inventario WHERE material IN ({})",
+    "movimentos": ("SELECT id_movimento AS id, material, tipo, quantidade, horario, deposito "
+                   "FROM movimentos WHERE id_movimento IN ({})"),
+    "alocacoes": ("SELECT a.id, a.material, d.nome AS deposito, a.quantidade, a.data_alocacao, a.observacao "
+                  "FROM alocacoes a JOIN depositos d ON a.deposito = d.id WHERE a.id IN ({})"),
+}
+
+SQL_HORIZONTE_DIAS = "SELECT MAX(versao) FROM mudancas WHERE criado_em < NOW() - INTERVAL %s DAY"
+SQL_HORIZONTE_MANTER = "SELECT versao FROM mudancas ORDER BY versao DESC LIMIT 1 OFFSET %s"
+SQL_SUBIR_MINIMO = "UPDATE mudancas_versao SET minimo = GREATEST(minimo, %s) WHERE id = 1"
+SQL_APAGAR_ATE = "DELETE FROM mudancas WHERE versao <= %s ORDER BY versao LIMIT %s"
+
+
+class FeedCompactadoError(Exception):
+    # O cliente está numa versão que o feed já não cobre: carga completa
+    def __init__(self, mensagem, versao, minimo):
+        super().__init__(mensagem)
+        self.versao = versao
+        self.minimo = minimo
+
+
+def ids_inseridos(cursor):
+    # Ids de um INSERT de várias linhas (execute ou executemany): o InnoDB
+    # reserva ids consecutivos para um INSERT ... VALUES com número conhecido
+    # de linhas, e lastrowid é o primeiro
+    return range(cursor.lastrowid, cursor.lastrowid + cursor.rowcount)
+
+
+class Mudancas:
+    def __init__(self):
+        self.chaves = {}  # (tabela, chave) -> operacao, na ordem em que apareceram
+
+    def _marcar(self, tabela, chave, operacao):
+        chave = str(chave)
+        anterior = self.chaves.get((tabela, chave))
+        # Dentro da transação: insert seguido de update continua insert,
+        # delete seguido de insert vira update
+        if operacao == "update" and anterior == "insert":
+            return
+        if operacao == "insert" and anterior == "delete":
+            operacao = "update"
+        self.chaves[(tabela, chave)] = operacao
+
+    def inserir(self, tabela, *chaves):
+        for chave in chaves:
+            self._marcar(tabela, chave, "insert")
+
+    def atualizar(self, tabela, *chaves):
+        for chave in chaves:
+            self._marcar(tabela, chave, "update")
+
+    def apagar(self, tabela, *chaves):
+        for chave in chaves:
+            self._marcar(tabela, chave, "delete")
+
+    def gravar(self, cursor):
+        if not self.chaves:
+            return
+        cursor.execute(SQL_RESERVAR_VERSOES, (len(self.chaves),))
+        primeira = cursor.lastrowid - len(self.chaves) + 1
+        linhas = [(tabela, chave, operacao, primeira + i)
+                  for i, ((tabela, chave), operacao) in enumerate(self.chaves.items())]
+        if len(linhas) == 1:
+            cursor.execute(SQL_GRAVAR_MUDANCA, linhas[0])
+        else:
+            cursor.executemany(SQL_GRAVAR_MUDANCA, linhas)
+
+
+def invalidar(cursor):
+    # Escrita em massa que não passa chave a chave: o histórico anterior deixa
+    # de valer e todo cliente refaz a carga completa
+    cursor.execute(SQL_INVALIDAR)
+    cursor.execute("DELETE FROM mudancas")
+
+
+def _valores(row):
+    return tuple(row.values()) if isinstance(row, dict) else row
+
+
+def estado(cursor):
+    cursor.execute(SQL_ESTADO)
+    row = cursor.fetchone()
+    return tuple(int(v) for v in _valores(row)) if row else (0, 0)
+
+
+def _chave_inventario(material):
+    # Mesma comparação da collation do MySQL (_ai_ci, PAD SPACE): o nome
+    # digitado no movimento pode diferir do cadastrado em caixa ou acento
+    texto = unicodedata.normalize("NFKD", material)
+    return "".join(c for c in texto if not unicodedata.combining(c)).casefold().rstrip()
+
+
+def _linhas_atuais(cursor, tabela, chaves):
+    cursor.execute(SQL_LINHAS[tabela].format(", ".join(["%s"] * len(chaves))), list(chaves))
+    colunas = [c[0] for c in cursor.description]
+    por_chave = {}
+    for row in cursor.fetchall():
+        item = dict(zip(colunas, _valores(row)))
+        if tabela == "movimentos":
+            # Mesmo formato do /api/movimentos
+            item["horario"] = item["horario"].strftime("%Y-%m-%d %H:%M:%S")
+        chave = _chave_inventario(item["material"]) if tabela == "inventario" else str(item["id"])
+        por_chave.setdefault(chave, []).append(item)
+    return por_chave
+
+
+def ler_mudancas(cursor, desde, limite=LIMITE_PADRAO):
+    # Chaves alteradas depois de `desde`, em ordem de versão, com as linhas
+    # atuais. Chamar numa transação só (snapshot do REPEATABLE READ): versões
+    # e linhas saem do mesmo instante.
+    versao, minimo = estado(cursor)
+    if desde < minimo or desde > versao:
+        raise FeedCompactadoError(
+            f"Versão {desde} fora do feed (mínimo {minimo}, atual {versao}); refaça a carga completa.",
+            versao, minimo)
+    cursor.execute(SQL_LER_MUDANCAS, (desde, limite + 1))
+    registros = [_valores(r) for r in cursor.fetchall()]
+    mais = len(registros) > limite
+    registros = registros[:limite]
+
+    por_tabela = {}
+    for tabela, chave, operacao, _ in registros:
+        if operacao != "delete":
+            por_tabela.setdefault(tabela, []).append(chave)
+    atuais = {tabela: _linhas_atuais(cursor, tabela, chaves) for tabela, chaves in por_tabela.items()}
+
+    itens = []
+    for tabela, chave, operacao, versao_chave in registros:
+        item = {"tabela": tabela, "chave": chave, "operacao": operacao, "versao": int(versao_chave)}
+        if operacao != "delete":
+            linhas = atuais[tabela].get(_chave_inventario(chave) if tabela == "inventario" else chave)
+            if linhas:
+                item["linhas"] = linhas
+            else:
+                # Apagada por fora do feed (escrita direta no banco)
+                item["operacao"] = "delete"
+        itens.append(item)
+    return {
+        "versao": int(registros[-1][3]) if mais else versao,
+        "minimo": minimo,
+        "mais": mais,
+        "mudancas": itens,
+    }
+
+
+def compactar(conn, dias=RETER_DIAS, manter=None, lote=LOTE_COMPACTACAO):
+    # Apaga as versões mais velhas que `dias` (e além das `manter` mais novas)
+    # e sobe o mínimo antes, para nenhum cliente receber um feed com buraco
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_HORIZONTE_DIAS, (dias,))
+        horizonte = _valores(cursor.fetchone())[0] or 0
+        if manter is not None:
+            cursor.execute(SQL_HORIZONTE_MANTER, (manter,))
+            row = cursor.fetchone()
+            if row:
+                horizonte = max(horizonte, _valores(row)[0])
+        conn.rollback()
+        apagadas = 0
+        if horizonte:
+            cursor.execute(SQL_SUBIR_MINIMO, (horizonte,))
+            conn.commit()
+            while True:
+                cursor.execute(SQL_APAGAR_ATE, (horizonte, lote))
+                apagadas += cursor.rowcount
+                conn.commit()
+                if cursor.rowcount < lote:
+                    break
+        versao, minimo = estado(cursor)
+        conn.rollback()
+        return {"versao": versao, "minimo": minimo, "apagadas": apagadas}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
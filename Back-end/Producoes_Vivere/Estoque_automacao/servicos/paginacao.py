@@ -0,0 +1,152 @@
+import base64
+import json
+from datetime import datetime
+
+# Paginação por cursor (keyset): a próxima página começa depois da última chave
+# vista, usando o índice da ordenação, então o custo de cada página não depende
+# do tamanho do histórico (ao contrário de OFFSET).
+
+LIMITE_PADRAO = 100
+LIMITE_MAXIMO = 1000
+PARAMETROS_PAGINACAO = ("limit", "after", "desde", "ate", "campos")
+
+
+class ParametrosInvalidosError(ValueError):
+    pass
+
+
+def codificar_cursor(valores):
+    bruto = json.dumps(valores, default=str, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(bruto).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor, tamanho):
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valores = json.loads(bruto)
+    except (ValueError, TypeError):
+        raise ParametrosInvalidosError("Cursor inválido.")
+    if not isinstance(valores, list) or len(valores) != tamanho:
+        raise ParametrosInvalidosError("Cursor inválido.")
+    return valores
+
+
+def _ler_data(valor, nome):
+    try:
+        return datetime.fromisoformat(valor)
+    except ValueError:
+        raise ParametrosInvalidosError(f"Parâmetro '{nome}' deve estar no formato AAAA-MM-DD[THH:MM:SS].")
+
+
+def ler_periodo(args):
+    desde = _ler_data(args["desde"], "desde") if args.get("desde") else None
+    ate = _ler_data(args["ate"], "ate") if args.get("ate") else None
+    return desde, ate
+
+
+def pedido_paginado(args):
+    return any(args.get(p) is not None for p in PARAMETROS_PAGINACAO)
+
+
+def ler_paginacao(args, colunas):
+    # args: request.args (ou qualquer dict); colunas: campos que podem ser pedidos
+    try:
+        limite = int(args.get("limit", LIMITE_PADRAO))
+    except (TypeError, ValueError):
+        raise ParametrosInvalidosError("Parâmetro 'limit' deve ser inteiro.")
+    if limite < 1:
+        raise ParametrosInvalidosError("Parâmetro 'limit' deve ser maior que zero.")
+
+    campos = None
+    if args.get("campos"):
+        campos = [c.strip() for c in args["campos"].split(",") if c.strip()]
+        invalidos = [c for c in campos if c not in colunas]
+        if invalidos:
+            raise ParametrosInvalidosError(f"Campos inválidos: {', '.join(invalidos)}.")
+
+    desde, ate = ler_periodo(args)
+    return {
+        "limite": min(limite, LIMITE_MAXIMO),
+        "apos": args.get("after") or None,
+        "desde": desde,
+        "ate": ate,
+        "campos": campos,
+    }
+
+
+def _condicao_apos(chave, valores, ordem):
+    # (a, b) > (x, y) expandido em OR/AND, que o MySQL resolve como faixa no
+    # índice; devolve o SQL e os parâmetros. Valor NULL no cursor vira IS NULL /
+    # IS NOT NULL: em ordem ASC o MySQL põe os NULL primeiro, então colunas da
+    # chave que aceitam NULL só podem ser usadas com ASC.
+    operador = "<" if ordem == "DESC" else ">"
+    partes, params = [], []
+    for i, expr in enumerate(chave):
+        condicoes = []
+        for anterior, valor in zip(chave[:i], valores[:i]):
+            if valor is None:
+                condicoes.append(f"{anterior} IS NULL")
+            else:
+                condicoes.append(f"{anterior} = %s")
+                params.append(valor)
+        if valores[i] is None:
+            condicoes.append(f"{expr} IS NOT NULL")
+        else:
+            condicoes.append(f"{expr} {operador} %s")
+            params.append(valores[i])
+        partes.append("(" + " AND ".join(condicoes) + ")")
+    return "(" + " OR ".join(partes) + ")", params
+
+
+def paginar(cursor, origem, colunas, chave, pagina, ordem="ASC", filtros=None, parametros=None,
+            coluna_tempo=None, formatar=None):
+    # origem: "tabela" ou "tabela a JOIN ..."; colunas: {alias: expressão SQL};
+    # chave: expressões da ordenação (a última deve ser única, normalmente o id).
+    # O cursor precisa ser de dicionário.
+    sql, params = montar_consulta_pagina(origem, colunas, chave, pagina, ordem, filtros, parametros, coluna_tempo)
+    cursor.execute(sql, params)
+    return montar_pagina(cursor.fetchall(), colunas, chave, pagina, formatar)
+
+
+def montar_consulta_pagina(origem, colunas, chave, pagina, ordem="ASC", filtros=None, parametros=None,
+                           coluna_tempo=None):
+    # SQL e parâmetros de paginar(), separados para quem executa de outro jeito (aiomysql)
+    aliases = pagina["campos"] or list(colunas)
+    select = [f"{colunas[a]} AS {a}" for a in aliases]
+    select += [f"{expr} AS _chave{i}" for i, expr in enumerate(chave)]
+
+    where = list(filtros or [])
+    params = list(parametros or [])
+    if coluna_tempo and pagina["desde"]:
+        where.append(f"{coluna_tempo} >= %s")
+        params.append(pagina["desde"])
+    if coluna_tempo and pagina["ate"]:
+        where.append(f"{coluna_tempo} <= %s")
+        params.append(pagina["ate"])
+    if pagina["apos"]:
+        condicao, params_apos = _condicao_apos(chave, decodificar_cursor(pagina["apos"], len(chave)), ordem)
+        where.append(condicao)
+        params.extend(params_apos)
+
+    sql = f"SELECT {', '.join(select)} FROM {origem}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY " + ", ".join(f"{expr} {ordem}" for expr in chave)
+    sql += " LIMIT %s"
+    params.append(pagina["limite"] + 1)
+    return sql, params
+
+
+def montar_pagina(rows, colunas, chave, pagina, formatar=None):
+    # rows: linhas em dict da consulta de montar_consulta_pagina (uma a mais que o limite)
+    aliases = pagina["campos"] or list(colunas)
+    proximo = None
+    if len(rows) > pagina["limite"]:
+        rows = rows[:pagina["limite"]]
+        proximo = codificar_cursor([rows[-1][f"_chave{i}"] for i in range(len(chave))])
+
+    itens = []
+    for row in rows:
+        item = {a: row[a] for a in aliases}
+        itens.append(formatar(item) if formatar else item)
+    return {"itens": itens, "proximo_cursor": proximo, "limite": pagina["limite"]}
@@ -0,0 +1,211 @@
+from datetime import date, timedelta
+
+from servicos.analise import SQL_SOMAR_HORA, SQL_SOMAR_DIA as SQL_SOMAR_DIA_MATERIAL, linhas_movimento
+
+# Agregados do painel (migração V007): totais por categoria, por dia/tipo de
+# movimento e gerais, mantidos pelas próprias escritas. Ler o resumo custa o
+# mesmo com 100 ou 10 milhões de movimentos.
+#
+# Quem escreve junta os deltas num DeltasResumo e chama gravar(cursor) por
+# último, logo antes do commit: as linhas de resumo são as mais disputadas, então
+# ficam travadas o mínimo possível, e sempre na mesma ordem (rollups por
+# material da V008, categorias, dias, totais) para escritas concorrentes não
+# entrarem em deadlock.
+
+TOTAL_ESTOQUE = "estoque"
+TOTAL_MATERIAIS = "materiais"
+TOTAL_MOVIMENTOS = "movimentos"
+DIAS_PADRAO = 30
+DIAS_MAXIMO = 366
+
+SQL_SOMAR_CATEGORIA = (
+    "INSERT INTO resumo_categorias (categoria, materiais, quantidade) VALUES (%s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE materiais = materiais + VALUES(materiais), quantidade = quantidade + VALUES(quantidade)"
+)
+SQL_SOMAR_DIA = (
+    "INSERT INTO resumo_movimentos_dia (dia, tipo, movimentos, quantidade) VALUES (%s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE movimentos = movimentos + VALUES(movimentos), quantidade = quantidade + VALUES(quantidade)"
+)
+SQL_SOMAR_TOTAL = (
+    "INSERT INTO resumo_totais (chave, valor) VALUES (%s, %s) "
+    "ON DUPLICATE KEY UPDATE valor = valor + VALUES(valor)"
+)
+
+SQL_TOTAIS = "SELECT chave, valor FROM resumo_totais"
+SQL_TOTAL = "SELECT valor FROM resumo_totais WHERE chave = %s"
+SQL_CATEGORIAS = (
+    "SELECT categoria, materiais, quantidade FROM resumo_categorias WHERE materiais > 0 ORDER BY categoria"
+)
+SQL_DIAS = (
+    "SELECT dia, tipo, movimentos, quantidade FROM resumo_movimentos_dia WHERE dia >= %s ORDER BY dia, tipo"
+)
+
+# Valores esperados, calculados das tabelas base (reconstrução e verificação)
+SQL_CALCULAR_CATEGORIAS = (
+    "SELECT COALESCE(categoria, ''), COUNT(*), COALESCE(SUM(quantidade), 0) "
+    "FROM inventario GROUP BY COALESCE(categoria, '')"
+)
+SQL_CALCULAR_DIAS = (
+    "SELECT DATE(horario), tipo, COUNT(*), SUM(quantidade) FROM movimentos GROUP BY DATE(horario), tipo"
+)
+SQL_CALCULAR_TOTAIS = (
+    "SELECT 'estoque', COALESCE(SUM(quantidade), 0) FROM inventario "
+    "UNION ALL SELECT 'materiais', COUNT(*) FROM inventario "
+    "UNION ALL SELECT 'movimentos', COUNT(*) FROM movimentos"
+)
+
+SQL_RECONSTRUIR_ESTOQUE = [
+    "DELETE FROM resumo_categorias",
+    "INSERT INTO resumo_categorias (categoria, materiais, quantidade) " + SQL_CALCULAR_CATEGORIAS,
+    "INSERT INTO resumo_totais (chave, valor) "
+    "SELECT 'estoque', COALESCE(SUM(quantidade), 0) FROM inventario "
+    "UNION ALL SELECT 'materiais', COUNT(*) FROM inventario "
+    "ON DUPLICATE KEY UPDATE valor = VALUES(valor)",
+]
+SQL_RECONSTRUIR_MOVIMENTOS = [
+    "DELETE FROM resumo_movimentos_dia",
+    "INSERT INTO resumo_movimentos_dia (dia, tipo, movimentos, quantidade) " + SQL_CALCULAR_DIAS,
+    "INSERT INTO resumo_totais (chave, valor) SELECT 'movimentos', COUNT(*) FROM movimentos "
+    "ON DUPLICATE KEY UPDATE valor = VALUES(valor)",
+]
+SQL_ZERAR = [
+    "DELETE FROM movimentos_hora",
+    "DELETE FROM movimentos_dia_material",
+    "DELETE FROM resumo_categorias",
+    "DELETE FROM resumo_movimentos_dia",
+    "UPDATE resumo_totais SET valor = 0",
+]
+
+
+class DeltasResumo:
+    def __init__(self):
+        self.categorias = {}  # categoria -> [materiais, quantidade]
+        self.dias = {}        # (dia, tipo) -> [movimentos, quantidade]
+        self.totais = {}      # chave -> valor
+        self.horas = {}       # (material, categoria, tipo, hora) -> [movimentos, quantidade]
+        self.dias_material = {}
+
+    def _total(self, chave, valor):
+        if valor:
+            self.totais[chave] = self.totais.get(chave, 0) + valor
+
+    def estoque(self, categoria, quantidade, materiais=0):
+        # Material novo (materiais=1), removido (-1) ou só quantidade mudando (0)
+        atual = self.categorias.setdefault(categoria or "", [0, 0])
+        atual[0] += materiais
+        atual[1] += quantidade
+        self._total(TOTAL_ESTOQUE, quantidade)
+        self._total(TOTAL_MATERIAIS, materiais)
+
+    def movimento(self, horario, tipo, quantidade, categorias, material=None):
+        # horario: datetime ou "AAAA-MM-DD HH:MM:SS"; categorias: linhas do
+        # inventário que o UPDATE do movimento alterou; material: também soma
+        # nos rollups por material (servicos/analise.py)
+        if material is not None:
+            self.analise(material, tipo, quantidade, horario, categorias)
+        dia = str(horario)[:10]
+        atual = self.dias.setdefault((dia, tipo), [0, 0])
+        atual[0] += 1
+        atual[1] += quantidade
+        self._total(TOTAL_MOVIMENTOS, 1)
+        for categoria in categorias:
+            self.estoque(categoria, quantidade if tipo == "entrada" else -quantidade)
+
+    def analise(self, material, tipo, quantidade, horario, categorias):
+        # Só os rollups por material; movimento() já chama com as categorias
+        # que alterou. Direto aqui: movimento que não mexe no saldo do inventário
+        horas, dias = linhas_movimento(material, tipo, quantidade, horario, categorias)
+        for destino, linhas in ((self.horas, horas), (self.dias_material, dias)):
+            for *chave, movimentos, qtd in linhas:
+                atual = destino.setdefault(tuple(chave), [0, 0])
+                atual[0] += movimentos
+                atual[1] += qtd
+
+    def gravar(self, cursor):
+        categorias = [(c, m, q) for c, (m, q) in sorted(self.categorias.items()) if m or q]
+        dias = [(d, t, n, q) for (d, t), (n, q) in sorted(self.dias.items())]
+        totais = sorted(self.totais.items())
+        horas = [(*chave, n, q) for chave, (n, q) in sorted(self.horas.items())]
+        dias_material = [(*chave, n, q) for chave, (n, q) in sorted(self.dias_material.items())]
+        for sql, linhas in ((SQL_SOMAR_HORA, horas), (SQL_SOMAR_DIA_MATERIAL, dias_material),
+                            (SQL_SOMAR_CATEGORIA, categorias), (SQL_SOMAR_DIA, dias), (SQL_SOMAR_TOTAL, totais)):
+            if len(linhas) == 1:
+                cursor.execute(sql, linhas[0])
+            elif linhas:
+                cursor.executemany(sql, linhas)
+
+
+def _linhas(cursor):
+    return [tuple(r.values()) if isinstance(r, dict) else r for r in cursor.fetchall()]
+
+
+def total(cursor, chave):
+    cursor.execute(SQL_TOTAL, (chave,))
+    row = cursor.fetchone()
+    if row is None:
+        return 0
+    return int(row["valor"] if isinstance(row, dict) else row[0])
+
+
+def ler_resumo(cursor, dias=DIAS_PADRAO, hoje=None):
+    # Totais gerais, por categoria e movimentos dos últimos `dias` dias
+    cursor.execute(SQL_TOTAIS)
+    totais = {chave: int(valor) for chave, valor in _linhas(cursor)}
+    cursor.execute(SQL_CATEGORIAS)
+    categorias = [{"categoria": c, "materiais": int(m), "quantidade": int(q)} for c, m, q in _linhas(cursor)]
+    inicio = (hoje or date.today()) - timedelta(days=dias - 1)
+    cursor.execute(SQL_DIAS, (inicio,))
+    por_dia = {}
+    for dia, tipo, movimentos, quantidade in _linhas(cursor):
+        atual = por_dia.setdefault(str(dia), {"dia": str(dia), "entradas": 0, "saidas": 0,
+                                              "quantidade_entrada": 0, "quantidade_saida": 0})
+        chave = "entrada" if tipo == "entrada" else "saida"
+        atual[chave + "s"] = int(movimentos)
+        atual["quantidade_" + chave] = int(quantidade)
+    return {
+        "total_estoque": totais.get(TOTAL_ESTOQUE, 0),
+        "total_materiais": totais.get(TOTAL_MATERIAIS, 0),
+        "total_movimentos": totais.get(TOTAL_MOVIMENTOS, 0),
+        "categorias": categorias,
+        "movimentos_por_dia": list(por_dia.values()),
+    }
+
+
+def reconstruir(cursor, estoque=True, movimentos=True):
+    # Refaz os agregados a partir das tabelas base, na transação do chamador.
+    # O INSERT ... SELECT trava as linhas lidas: escritas concorrentes esperam.
+    for sql in (SQL_RECONSTRUIR_ESTOQUE if estoque else []) + (SQL_RECONSTRUIR_MOVIMENTOS if movimentos else []):
+        cursor.execute(sql)
+
+
+def zerar(cursor):
+    for sql in SQL_ZERAR:
+        cursor.execute(sql)
+
+
+def verificar(cursor):
+    # Divergências entre os agregados gravados e o que as tabelas base dão hoje
+    divergencias = []
+
+    def comparar(tabela, gravado, esperado, zero):
+        for chave in sorted(gravado.keys() | esperado.keys(), key=str):
+            g, e = gravado.get(chave, zero), esperado.get(chave, zero)
+            if g != e:
+                divergencias.append({"tabela": tabela, "chave": chave, "gravado": list(g), "esperado": list(e)})
+
+    cursor.execute("SELECT categoria, materiais, quantidade FROM resumo_categorias")
+    gravado = {c: (int(m), int(q)) for c, m, q in _linhas(cursor) if m or q}
+    cursor.execute(SQL_CALCULAR_CATEGORIAS)
+    comparar("resumo_categorias", gravado, {c: (int(m), int(q)) for c, m, q in _linhas(cursor)}, (0, 0))
+
+    cursor.execute("SELECT dia, tipo, movimentos, quantidade FROM resumo_movimentos_dia")
+    gravado = {(str(d), t): (int(n), int(q)) for d, t, n, q in _linhas(cursor) if n or q}
+    cursor.execute(SQL_CALCULAR_DIAS)
+    comparar("resumo_movimentos_dia", gravado,
+             {(str(d), t): (int(n), int(q)) for d, t, n, q in _linhas(cursor)}, (0, 0))
+
+    cursor.execute(SQL_TOTAIS)
+    gravado = {c: (int(v),) for c, v in _linhas(cursor)}
+    cursor.execute(SQL_CALCULAR_TOTAIS)
+    comparar("resumo_totais", gravado, {c: (int(v),) for c, v in _linhas(cursor)}, (0,))
+    return divergencias
@@ -0,0 +1,163 @@
+from servicos.movimentacao import EstoqueInsuficienteError, agora
+
+# Saldo por (depósito, material) na tabela saldos_deposito (migração V006).
+#
+# As alocações, transferências e movimentos com depósito gravam o histórico e
+# ajustam o saldo na mesma transação, então ver o conteúdo de um depósito é
+# ler as linhas dele pela chave primária (deposito, material), sem somar e
+# ordenar o histórico inteiro. As linhas são tocadas sempre em ordem de
+# (deposito, material): duas transações que mexem nos mesmos saldos travam na
+# mesma sequência e não entram em deadlock entre si.
+#
+# O histórico continua sendo a fonte da verdade; reconciliar() refaz os saldos
+# a partir dele (reconciliar_saldos.py).
+
+SQL_CREDITAR = (
+    "INSERT INTO saldos_deposito (deposito, material, quantidade) VALUES (%s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE quantidade = quantidade + VALUES(quantidade)"
+)
+SQL_DEBITAR = (
+    "UPDATE saldos_deposito SET quantidade = quantidade - %s "
+    "WHERE deposito = %s AND material = %s AND quantidade >= %s"
+)
+SQL_INSERIR_TRANSFERENCIA = (
+    "INSERT INTO transferencias (material, origem, destino, quantidade, horario, observacao) "
+    "VALUES (%s, %s, %s, %s, %s, %s)"
+)
+SQL_SALDOS_DEPOSITO = (
+    "SELECT material, quantidade, atualizado_em FROM saldos_deposito "
+    "WHERE deposito = %s AND quantidade > 0 ORDER BY material"
+)
+SQL_TOTAL_DEPOSITO = (
+    "SELECT COUNT(*) AS materiais, COALESCE(SUM(quantidade), 0) AS quantidade "
+    "FROM saldos_deposito WHERE deposito = %s AND quantidade > 0"
+)
+SQL_TOTAIS = (
+    "SELECT d.id AS deposito, d.nome AS nome_deposito, COUNT(s.material) AS materiais, "
+    "COALESCE(SUM(s.quantidade), 0) AS quantidade "
+    "FROM depositos d LEFT JOIN saldos_deposito s ON s.deposito = d.id AND s.quantidade > 0 "
+    "GROUP BY d.id, d.nome ORDER BY d.id"
+)
+
+# Saldo esperado a partir do histórico; alocacoes.deposito guarda o id como texto
+SQL_HISTORICO = """
+    SELECT deposito, material, SUM(quantidade) FROM (
+        SELECT CAST(deposito AS UNSIGNED) AS deposito, material, quantidade FROM alocacoes
+        UNION ALL SELECT destino, material, quantidade FROM transferencias
+        UNION ALL SELECT origem, material, -quantidade FROM transferencias
+        UNION ALL SELECT deposito, material, IF(tipo = 'entrada', quantidade, -quantidade)
+            FROM movimentos WHERE deposito IS NOT NULL
+    ) historico
+    GROUP BY deposito, material
+"""
+SQL_TRAVAR_SALDOS = "SELECT deposito, material, quantidade FROM saldos_deposito FOR UPDATE"
+SQL_DEFINIR_SALDO = (
+    "INSERT INTO saldos_deposito (deposito, material, quantidade) VALUES (%s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE quantidade = VALUES(quantidade)"
+)
+
+
+class SaldoDepositoInsuficienteError(EstoqueInsuficienteError):
+    pass
+
+
+class TransferenciaInvalidaError(ValueError):
+    pass
+
+
+def _linhas(cursor):
+    return [tuple(r.values()) if isinstance(r, dict) else r for r in cursor.fetchall()]
+
+
+def aplicar_deltas(cursor, deltas):
+    # deltas: {(deposito, material): quantidade}; positivo credita, negativo
+    # debita (só com saldo suficiente). Créditos seguidos vão num executemany.
+    creditos = []
+    for (deposito, material), delta in sorted(deltas.items()):
+        if delta > 0:
+            creditos.append((deposito, material, delta))
+            continue
+        if delta < 0:
+            if creditos:
+                cursor.executemany(SQL_CREDITAR, creditos)
+                creditos = []
+            cursor.execute(SQL_DEBITAR, (-delta, deposito, material, -delta))
+            if cursor.rowcount == 0:
+                raise SaldoDepositoInsuficienteError(
+                    f"Saldo insuficiente de {material} no depósito {deposito}.")
+    if creditos:
+        cursor.executemany(SQL_CREDITAR, creditos)
+
+
+def somar_deltas(linhas):
+    # linhas: [(deposito, material, quantidade)] -> {(deposito, material): soma}
+    deltas = {}
+    for deposito, material, quantidade in linhas:
+        chave = (int(deposito), material)
+        deltas[chave] = deltas.get(chave, 0) + quantidade
+    return deltas
+
+
+def transferir(cursor, material, origem, destino, quantidade, observacao=None):
+    # Dentro da transação do chamador (que faz o commit). Retorna o id da transferência.
+    try:
+        origem, destino, quantidade = int(origem), int(destino), int(quantidade)
+    except (TypeError, ValueError):
+        raise TransferenciaInvalidaError("origem, destino e quantidade devem ser inteiros.")
+    if not material:
+        raise TransferenciaInvalidaError("Material não informado.")
+    if quantidade <= 0:
+        raise TransferenciaInvalidaError("Quantidade deve ser maior que zero.")
+    if origem == destino:
+        raise TransferenciaInvalidaError("Origem e destino devem ser depósitos diferentes.")
+
+    aplicar_deltas(cursor, {(origem, material): -quantidade, (destino, material): quantidade})
+    cursor.execute(SQL_INSERIR_TRANSFERENCIA, (material, origem, destino, quantidade, agora(), observacao))
+    return cursor.lastrowid
+
+
+def movimentar(cursor, deposito, material, tipo, quantidade):
+    # Parte do depósito de um movimento de entrada/saída
+    aplicar_deltas(cursor, {(int(deposito), material): quantidade if tipo == "entrada" else -quantidade})
+
+
+def saldos_do_deposito(cursor, deposito):
+    cursor.execute(SQL_SALDOS_DEPOSITO, (deposito,))
+    return cursor.fetchall()
+
+
+def total_do_deposito(cursor, deposito):
+    cursor.execute(SQL_TOTAL_DEPOSITO, (deposito,))
+    return cursor.fetchone()
+
+
+def totais(cursor):
+    cursor.execute(SQL_TOTAIS)
+    return cursor.fetchall()
+
+
+def reconciliar(cursor, corrigir=False):
+    # Compara saldos_deposito com o histórico e, se corrigir, regrava as
+    # divergências. Os saldos são travados antes de ler o histórico: escritas
+    # em andamento esperam, e as já confirmadas entram na leitura.
+    cursor.execute(SQL_TRAVAR_SALDOS)
+    registrados = {(int(d), m): int(q) for d, m, q in _linhas(cursor)}
+    cursor.execute(SQL_HISTORICO)
+    esperados = {(int(d), m): int(q) for d, m, q in _linhas(cursor)}
+
+    divergencias = []
+    for chave in sorted(registrados.keys() | esperados.keys()):
+        registrado = registrados.get(chave, 0)
+        esperado = esperados.get(chave, 0)
+        if registrado != esperado:
+            divergencias.append({
+                "deposito": chave[0], "material": chave[1],
+                "registrado": registrados.get(chave), "esperado": esperado,
+                "diferenca": esperado - registrado,
+            })
+
+    if corrigir and divergencias:
+        cursor.executemany(SQL_DEFINIR_SALDO, [
+            (d["deposito"], d["material"], d["esperado"]) for d in divergencias
+        ])
+    return divergencias
@@ -0,0 +1,69 @@
+import json
+
+# Exportações grandes sem montar a lista inteira em memória: o cursor lê em
+# lotes (fetchmany) e cada lote já sai serializado para a resposta HTTP.
+
+TAMANHO_LOTE = 2000
+FORMATOS = ("json", "ndjson")
+MIMETYPES = {"json": "application/json", "ndjson": "application/x-ndjson"}
+
+
+def iterar_lotes(cursor, tamanho=TAMANHO_LOTE):
+    while True:
+        rows = cursor.fetchmany(tamanho)
+        if not rows:
+            return
+        yield rows
+
+
+def _dumps(item):
+    return json.dumps(item, ensure_ascii=False, default=str, separators=(",", ":"))
+
+
+def gerar_json_array(lotes):
+    # lotes: iterável de listas de dicts; gera um array JSON válido em pedaços
+    yield "["
+    primeiro = True
+    for lote in lotes:
+        if not lote:
+            continue
+        pedaco = ",".join(_dumps(item) for item in lote)
+        yield pedaco if primeiro else "," + pedaco
+        primeiro = False
+    yield "]"
+
+
+def gerar_ndjson(lotes):
+    for lote in lotes:
+        if lote:
+            yield "".join(_dumps(item) + "\n" for item in lote)
+
+
+def gerar(formato, lotes):
+    return gerar_ndjson(lotes) if formato == "ndjson" else gerar_json_array(lotes)
+
+
+async def gerar_async(formato, lotes):
+    # Mesma saída de gerar(), para lotes vindos de um gerador assíncrono (api_async.py)
+    if formato == "json":
+        yield "["
+    primeiro = True
+    async for lote in lotes:
+        if not lote:
+            continue
+        if formato == "ndjson":
+            yield "".join(_dumps(item) + "\n" for item in lote)
+        else:
+            pedaco = ",".join(_dumps(item) for item in lote)
+            yield pedaco if primeiro else "," + pedaco
+            primeiro = False
+    if formato == "json":
+        yield "]"
+
+
+async def iterar_lotes_async(cursor, tamanho=TAMANHO_LOTE):
+    while True:
+        rows = await cursor.fetchmany(tamanho)
+        if not rows:
+            return
+        yield rows
@@ -0,0 +1,97 @@
+import ctypes
+import os
+import threading
+import time
+import uuid
+import zlib
+
+# Contador de versão por tabela, incrementado por cada caminho de escrita.
+# Serve de ETag para as leituras: se a versão do cliente é a atual, a resposta
+# é 304 sem tocar no MySQL. O cache de leitura usa os mesmos contadores como
+# geração das etiquetas (servicos/cache.py).
+#
+# Os contadores ficam num vetor de posições fixas (nome -> crc32 % posicoes).
+# No gunicorn o servir.py chama compartilhar() no master, antes do fork: o
+# vetor passa para memória compartilhada herdada por todos os workers, então a
+# escrita feita em um worker muda a ETag e derruba o cache nos outros. Dois
+# nomes na mesma posição só custam uma revalidação a mais, nunca um 304 errado.
+#
+# Escritas feitas fora do servidor (importador, scripts) não sobem o contador,
+# então a ETag também muda a cada janela de tempo (mesma ordem do TTL do cache
+# de leitura): o atraso máximo fica limitado, como no cache.
+
+POSICOES = 1024
+
+
+def _posicao(nome, posicoes):
+    return zlib.crc32(nome.encode("utf-8")) % posicoes
+
+
+class VersoesTabelas:
+    def __init__(self, janela=30.0, posicoes=POSICOES):
+        self.janela = janela
+        self.posicoes = posicoes
+        self.instancia = uuid.uuid4().hex[:8]
+        self.compartilhado = False
+        self._inicio = time.time()
+        self._versoes = (ctypes.c_longlong * posicoes)()
+        self._modificado = (ctypes.c_double * posicoes)()
+        self._indices = {}
+        self._lock = threading.Lock()
+
+    def compartilhar(self):
+        # Antes do fork, no processo que vai gerar os workers. O identificador da
+        # instância também é herdado: todos os workers dão a mesma ETag
+        import multiprocessing
+
+        versoes = multiprocessing.RawArray(ctypes.c_longlong, self.posicoes)
+        modificado = multiprocessing.RawArray(ctypes.c_double, self.posicoes)
+        with self._lock:
+            versoes[:] = self._versoes[:]
+            modificado[:] = self._modificado[:]
+            self._versoes, self._modificado = versoes, modificado
+        self._lock = multiprocessing.Lock()
+        self.compartilhado = True
+
+    def reiniciar(self):
+        # Worker recém-criado por fork. Com os contadores compartilhados nada
+        # muda; sem eles, o worker herdou o identificador do master e, sem um
+        # novo, dois workers confirmariam a ETag um do outro
+        if not self.compartilhado:
+            self.instancia = uuid.uuid4().hex[:8]
+            self._lock = threading.Lock()
+
+    def _indice(self, nome):
+        indice = self._indices.get(nome)
+        if indice is None:
+            indice = self._indices[nome] = _posicao(nome, self.posicoes)
+        return indice
+
+    def incrementar(self, *tabelas):
+        agora = time.time()
+        indices = {self._indice(t) for t in tabelas}
+        with self._lock:
+            for indice in indices:
+                self._versoes[indice] += 1
+                self._modificado[indice] = agora
+
+    def versao(self, tabela):
+        return self._versoes[self._indice(tabela)]
+
+    def _janela_atual(self):
+        return int(time.time() // self.janela) if self.janela > 0 else 0
+
+    def modificado_em(self, tabela):
+        modificado = self._modificado[self._indice(tabela)] or self._inicio
+        if self.janela > 0:
+            modificado = max(modificado, self._janela_atual() * self.janela)
+        return modificado
+
+    def etag(self, *tabelas):
+        indices = [self._indice(t) for t in tabelas]
+        with self._lock:
+            versoes = ".".join(str(self._versoes[i]) for i in indices)
+        return f"{self.instancia}-{self._janela_atual()}-{versoes}"
+
+
+versoes_tabelas = VersoesTabelas(janela=float(os.environ.get('VIVERE_ETAG_JANELA', 30)))
@@ -0,0 +1,162 @@
+import argparse
+import multiprocessing
+import os
+
+from servicos.conexao import POOL_CONFIG
+
+# Servidor de produção do app.py, no lugar do app.run(debug=True):
+# gunicorn com vários processos (pre-fork) e algumas threads em cada um.
+#
+# Uso:
+#   python servir.py                          -> app.py na porta 5000
+#   python servir.py --app api                -> api.py (o mesmo app, mantido por compatibilidade)
+#   python servir.py --workers 4 --threads 8
+#   kill -HUP <pid do master>                 -> recarrega o código trocando os workers sem derrubar conexões
+#   kill -TERM <pid do master>                -> encerra esperando as requisições em andamento
+#
+# Padrão: 2 x núcleos + 1 workers (VIVERE_WORKERS ou --workers mudam). Os
+# contadores de versão das tabelas vão para memória compartilhada no master,
+# antes do fork (servicos/versoes.py): uma escrita em qualquer worker muda a
+# ETag em todos (a revalidação dá 304 em qualquer um) e derruba as entradas
+# afetadas do cache de leitura de cada worker na próxima leitura, e o índice
+# de busca relê quando a versão do inventário muda. O motor de disponibilidade
+# e o monitor de estoque baixo continuam por worker, ressincronizando pelo TTL;
+# a reserva em si confere o estoque no banco, com trava, em qualquer worker.
+#
+# Cada worker importa o app depois do fork e abre o próprio pool de conexões,
+# então o MySQL vê até workers x (tamanho + overflow) conexões: o número
+# automático de workers respeita VIVERE_DB_MAX_CONEXOES.
+#
+# No Windows (sem fork) usa o waitress: um processo só, com workers x threads threads.
+
+APPS = {"app": "app:app", "api": "api:app"}
+
+SERVIDOR_CONFIG = {
+    'workers': int(os.environ.get('VIVERE_WORKERS', 0)),  # 0 -> pelo número de CPUs
+    # Uma thread por conexão fixa do pool: o overflow fica para os picos
+    'threads': int(os.environ.get('VIVERE_THREADS', POOL_CONFIG['tamanho'])),
+    # Segundos que uma conexão ociosa fica aberta; os dashboards fazem polling
+    # de poucos em poucos segundos e reaproveitam a mesma conexão
+    'keepalive': int(os.environ.get('VIVERE_KEEPALIVE', 5)),
+    'timeout': int(os.environ.get('VIVERE_WORKER_TIMEOUT', 30)),
+    'graceful_timeout': int(os.environ.get('VIVERE_GRACEFUL_TIMEOUT', 30)),
+    # Recicla o worker depois de N requisições (com variação, para não reiniciarem juntos)
+    'max_requests': int(os.environ.get('VIVERE_MAX_REQUISICOES', 5000)),
+    'max_conexoes_mysql': int(os.environ.get('VIVERE_DB_MAX_CONEXOES', 150)),
+}
+
+
+def workers_padrao(cpus=None, config=SERVIDOR_CONFIG):
+    # 2 x núcleos + 1 (recomendação do gunicorn), sem passar do que o MySQL aceita
+    cpus = cpus or multiprocessing.cpu_count()
+    por_worker = POOL_CONFIG['tamanho'] + POOL_CONFIG['overflow']
+    limite = max(1, config['max_conexoes_mysql'] // por_worker)
+    return max(1, min(2 * cpus + 1, limite))
+
+
+def ao_iniciar(server):
+    # No master, antes de qualquer fork: os workers herdam os mesmos contadores
+    from servicos.versoes import versoes_tabelas
+
+    versoes_tabelas.compartilhar()
+
+
+def apos_fork(server, worker):
+    # Com --preload o app já foi importado no master: pool e fila da auditoria
+    # vieram junto com o fork e precisam ser do worker
+    from servicos.auditoria import auditoria
+    from servicos.conexao import obter_pool
+    from servicos.versoes import versoes_tabelas
+
+    obter_pool().reiniciar()
+    versoes_tabelas.reiniciar()
+    auditoria.reiniciar()
+
+
+def ao_sair(server, worker):
+    # Worker encerrando (HUP, TERM, max_requests): grava o que está na fila da auditoria
+    from servicos.auditoria import auditoria
+
+    auditoria.encerrar()
+
+
+def opcoes_gunicorn(host, porta, workers, threads, preload=False, acessos=False, config=SERVIDOR_CONFIG):
+    opcoes = {
+        'bind': f"{host}:{porta}",
+        'workers': workers,
+        # gthread: threads por worker e keep-alive (o worker sync fecha a conexão a cada resposta)
+        'worker_class': 'gthread',
+        'threads': threads,
+        'keepalive': config['keepalive'],
+        'timeout': config['timeout'],
+        'graceful_timeout': config['graceful_timeout'],
+        'max_requests': config['max_requests'],
+        'max_requests_jitter': config['max_requests'] // 10,
+        'preload_app': preload,
+        'on_starting': ao_iniciar,
+        'post_fork': apos_fork,
+        'worker_exit': ao_sair,
+        'accesslog': '-' if acessos else None,
+        'errorlog': '-',
+    }
+    if os.path.isdir('/dev/shm'):
+        # Arquivo de heartbeat dos workers em memória: disco lento não dispara timeout falso
+        opcoes['worker_tmp_dir'] = '/dev/shm'
+    return opcoes
+
+
+def servir_gunicorn(alvo, opcoes):
+    from gunicorn.app.base import BaseApplication
+    from gunicorn.util import import_app
+
+    class Aplicacao(BaseApplication):
+        def load_config(self):
+            for nome, valor in opcoes.items():
+                if valor is not None:
+                    self.cfg.set(nome, valor)
+
+        def load(self):
+            return import_app(alvo)
+
+    Aplicacao().run()
+
+
+def servir_waitress(alvo, host, porta, threads):
+    from importlib import import_module
+    from waitress import serve
+
+    modulo, nome = alvo.split(":")
+    serve(getattr(import_module(modulo), nome), host=host, port=porta, threads=threads)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de produção (gunicorn, ou waitress no Windows)")
+    parser.add_argument("--app", choices=sorted(APPS), default="app")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--porta", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=SERVIDOR_CONFIG['workers'],
+                        help="0 -> 2 x núcleos + 1, limitado por VIVERE_DB_MAX_CONEXOES")
+    parser.add_argument("--threads", type=int, default=SERVIDOR_CONFIG['threads'])
+    parser.add_argument("--preload", action="store_true",
+                        help="importa o app no master (sobe mais rápido; o HUP não recarrega o código)")
+    parser.add_argument("--acessos", action="store_true", help="log de acesso no stdout")
+    args = parser.parse_args()
+
+    alvo = APPS[args.app]
+    workers = args.workers or workers_padrao()
+    try:
+        if os.name == "nt":
+            raise ImportError("gunicorn não roda no Windows")
+        import gunicorn  # noqa: F401
+    except ImportError:
+        try:
+            import waitress  # noqa: F401
+        except ImportError:
+            print("❌ Erro: instale o gunicorn (Linux) ou o waitress (Windows).")
+            raise SystemExit(1)
+        print(f"✅ {alvo} em {args.host}:{args.porta} (waitress, {workers * args.threads} threads)")
+        servir_waitress(alvo, args.host, args.porta, workers * args.threads)
+    else:
+        print(f"✅ {alvo} em {args.host}:{args.porta} (gunicorn, {workers} workers x {args.threads} threads)")
+        servir_gunicorn(alvo, opcoes_gunicorn(args.host, args.porta, workers, args.threads,
+                                              preload=args.preload, acessos=args.acessos))